@@ -0,0 +1,434 @@
+"""
+Server-side analytics for the dashboards.
+
+Each report is computed with a few grouped queries instead of the client
+downloading every submission/progress row and aggregating in the browser.
+Response keys match what `frontend/src/services/analyticsService.js` renders.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, Max, Q, Sum
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+
+from .models import (
+    Course, Enrollment, LectureProgress, Assignment, Test, TestSubmission, AssignmentSubmission, ActivityLog,
+    RollupWatermark, AnalyticsCacheVersion, DailyUserStat, DailyCourseStat, DailyContentStat, DailyActivityStat,
+)
+
+User = get_user_model()
+
+# dashboard `timeRange` -> window length in days
+TIME_RANGES = {
+    'daily': 1,
+    'weekly': 7,
+    'monthly': 30,
+    'quarterly': 90,
+    'yearly': 365,
+}
+DEFAULT_TIME_RANGE = 'monthly'
+
+
+def window_start(time_range, now=None):
+    """Start of the reporting window for a dashboard timeRange (monthly if unknown)."""
+    days = TIME_RANGES.get(time_range, TIME_RANGES[DEFAULT_TIME_RANGE])
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def _average(total, marked, *_):
+    return round(float(total) / marked) if marked else 0
+
+
+def _score_totals(qs, group_by):
+    """{group value: (sum of marks, marked submissions, all submissions)} in one grouped query."""
+    rows = (
+        qs.order_by().values(group_by)
+        .annotate(total=Sum('marks_obtained'), marked=Count('marks_obtained'), n=Count('id'))
+        .values_list(group_by, 'total', 'marked', 'n')
+    )
+    return {key: (total or 0, marked, n) for key, total, marked, n in rows}
+
+
+def _merge_totals(*totals):
+    merged = {}
+    for part in totals:
+        for key, values in part.items():
+            merged[key] = tuple(a + b for a, b in zip(merged.get(key, (0, 0, 0)), values))
+    return merged
+
+
+def student_analytics(student, time_range=DEFAULT_TIME_RANGE):
+    """Overview, per-course performance, study activity and recent scores of one student."""
+    now = timezone.now()
+    since = window_start(time_range, now)
+    tests = TestSubmission.objects.filter(start_time__gte=since)
+    assignments = AssignmentSubmission.objects.filter(submission_date__gte=since)
+
+    # overall score and rank: one grouped query per submission table over all students
+    per_student = _merge_totals(_score_totals(tests, 'student_id'), _score_totals(assignments, 'student_id'))
+    overall_score = _average(*per_student.get(student.id, (0, 0, 0)))
+    rank = 1 + sum(1 for sid, totals in per_student.items() if sid != student.id and _average(*totals) > overall_score)
+
+    enrollments = list(
+        Enrollment.objects.filter(student=student).select_related('course')
+        .only('course_id', 'progress_percentage', 'course__title').order_by('enrollment_date')
+    )
+    watch_minutes = LectureProgress.objects.filter(student=student).aggregate(m=Sum('watch_time_minutes'))['m'] or 0
+
+    overview = {
+        'overallScore': overall_score,
+        'studyHours': round(watch_minutes / 60),
+        'totalCourses': len(enrollments),
+        'rank': rank,
+        'totalStudents': User.objects.filter(role='student').count(),
+    }
+
+    # per-course performance
+    own_tests = tests.filter(student=student)
+    own_assignments = assignments.filter(student=student)
+    test_totals = _score_totals(own_tests, 'test__course_id')
+    assignment_totals = _score_totals(own_assignments, 'assignment__course_id')
+    course_totals = _merge_totals(test_totals, assignment_totals)
+    course_performance = [
+        {
+            'courseId': e.course_id,
+            'course': e.course.title,
+            'score': _average(*course_totals.get(e.course_id, (0, 0, 0))),
+            'progress': min(100, round(float(e.progress_percentage or 0))),
+            'assignments': assignment_totals.get(e.course_id, (0, 0, 0))[2],
+            'tests': test_totals.get(e.course_id, (0, 0, 0))[2],
+        }
+        for e in enrollments
+    ]
+
+    # study activity: watch time of lectures completed per day in the window
+    today = timezone.localdate()
+    days = max(1, (now - since).days)
+    per_day = dict(
+        LectureProgress.objects.filter(student=student, completed_at__gte=since).order_by()
+        .annotate(day=TruncDate('completed_at')).values('day')
+        .annotate(minutes=Sum('watch_time_minutes')).values_list('day', 'minutes')
+    )
+    study_activity = []
+    for offset in range(days - 1, -1, -1):
+        day = today - timedelta(days=offset)
+        study_activity.append({'date': day.isoformat(), 'hours': round((per_day.get(day) or 0) / 60, 1)})
+
+    # five most recent scores across tests and assignments
+    recent = [
+        {
+            'type': 'Test',
+            'subject': s.test.title,
+            'date': s.start_time.isoformat(),
+            'score': round(float(s.marks_obtained or 0)),
+            'maxScore': round(float(s.test.total_marks or 100)),
+        }
+        for s in own_tests.select_related('test').only('start_time', 'marks_obtained', 'test__title', 'test__total_marks').order_by('-start_time')[:5]
+    ] + [
+        {
+            'type': 'Assignment',
+            'subject': s.assignment.title,
+            'date': s.submission_date.isoformat(),
+            'score': round(float(s.marks_obtained or 0)),
+            'maxScore': round(float(s.assignment.total_marks or 100)),
+        }
+        for s in own_assignments.select_related('assignment').only('submission_date', 'marks_obtained', 'assignment__title', 'assignment__total_marks').order_by('-submission_date')[:5]
+    ]
+    recent.sort(key=lambda r: r['date'], reverse=True)
+
+    return {
+        'timeRange': time_range if time_range in TIME_RANGES else DEFAULT_TIME_RANGE,
+        'overview': overview,
+        'coursePerformance': course_performance,
+        'studyActivity': study_activity,
+        'recentScores': recent[:5],
+    }
+
+
+def _percent(part, whole):
+    return round(float(part) / float(whole) * 100) if whole else 0
+
+
+def teacher_cache_key(teacher_id, time_range, version=0):
+    return f'analytics:teacher:{teacher_id}:v{version}:{time_range}'
+
+
+def invalidate_teacher_analytics(**course_lookup):
+    """Retire every cached timeRange of the report of the instructor of the course matching `course_lookup`.
+
+    Bumps the version stored in the database rather than deleting cache keys:
+    with a per-process cache (the LocMem default) a delete would only reach
+    the process that handled the write. One UPDATE, which does nothing for
+    teachers whose report was never cached; entries of old versions expire
+    on their own.
+    """
+    instructors = Course.objects.filter(**course_lookup).values('instructor_id')
+    AnalyticsCacheVersion.objects.filter(teacher_id__in=instructors).update(version=F('version') + 1)
+
+
+def teacher_analytics(teacher, time_range=DEFAULT_TIME_RANGE):
+    """Cached wrapper around `compute_teacher_analytics` (TEACHER_ANALYTICS_CACHE_SECONDS, default 60).
+
+    Enrollment and submission saves invalidate the entry (see core.signals), as
+    do the bulk writers that bypass signals (grading.apply_score_delta,
+    progress.apply_completions, heartbeats.flush); the cache key carries the teacher's stored version, so this costs one
+    primary-key lookup per request.
+    """
+    if time_range not in TIME_RANGES:
+        time_range = DEFAULT_TIME_RANGE
+    version, _ = AnalyticsCacheVersion.objects.get_or_create(teacher=teacher)
+    key = teacher_cache_key(teacher.id, time_range, version.version)
+    report = cache.get(key)
+    if report is None:
+        report = compute_teacher_analytics(teacher, time_range)
+        cache.set(key, report, getattr(settings, 'TEACHER_ANALYTICS_CACHE_SECONDS', 60))
+    return report
+
+
+def compute_teacher_analytics(teacher, time_range=DEFAULT_TIME_RANGE):
+    """Overview, engagement and per-course rollups over the courses `teacher` instructs."""
+    since = window_start(time_range)
+    courses = list(Course.objects.filter(instructor=teacher).order_by('title').values_list('id', 'title'))
+
+    enrollments = Enrollment.objects.filter(course__instructor=teacher)
+    enrollment_rows = {
+        row['course_id']: row
+        for row in enrollments.order_by().values('course_id').annotate(
+            n=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+            progress=Avg('progress_percentage'),
+        )
+    }
+    test_rows = {
+        row['test__course_id']: row
+        for row in TestSubmission.objects.filter(test__course__instructor=teacher, start_time__gte=since)
+        .order_by().values('test__course_id').annotate(
+            n=Count('id'),
+            marked=Count('marks_obtained'),
+            total=Sum('marks_obtained'),
+            possible=Sum('test__total_marks', filter=Q(marks_obtained__isnull=False)),
+        )
+    }
+    assignment_sub_rows = {
+        row['assignment__course_id']: row
+        for row in AssignmentSubmission.objects.filter(assignment__course__instructor=teacher, submission_date__gte=since)
+        .order_by().values('assignment__course_id').annotate(
+            n=Count('id'), marked=Count('marks_obtained'), total=Sum('marks_obtained'),
+        )
+    }
+    assignment_rows = {
+        row['course_id']: row
+        for row in Assignment.objects.filter(course__instructor=teacher).order_by().values('course_id').annotate(
+            n=Count('id', distinct=True),
+            submitted=Count('id', distinct=True, filter=Q(submissions__isnull=False)),
+        )
+    }
+    progress = LectureProgress.objects.filter(lecture__course__instructor=teacher)
+    active_learners = progress.filter(completed_at__gte=since).values('student_id').distinct().count()
+    watch_minutes = progress.aggregate(m=Sum('watch_time_minutes'))['m'] or 0
+    distinct_students = enrollments.values('student_id').distinct().count()
+
+    def row(rows, course_id, name):
+        return (rows.get(course_id) or {}).get(name) or 0
+
+    course_performance = []
+    totals = {'enrolled': 0, 'completed': 0, 'progress_sum': 0.0, 'score': 0, 'marked': 0,
+              'test_total': 0, 'test_possible': 0, 'assignments': 0, 'submitted_assignments': 0}
+    for course_id, title in courses:
+        enrolled = row(enrollment_rows, course_id, 'n')
+        marked = row(test_rows, course_id, 'marked') + row(assignment_sub_rows, course_id, 'marked')
+        score = row(test_rows, course_id, 'total') + row(assignment_sub_rows, course_id, 'total')
+        n_assignments = row(assignment_rows, course_id, 'n')
+        course_performance.append({
+            'courseId': course_id,
+            'course': title,
+            'students': enrolled,
+            'avgScore': _average(score, marked),
+            'avgTestPercentage': _percent(row(test_rows, course_id, 'total'), row(test_rows, course_id, 'possible')),
+            'avgProgress': round(float(row(enrollment_rows, course_id, 'progress'))),
+            'completionRate': _percent(row(enrollment_rows, course_id, 'completed'), enrolled),
+            # share of expected assignment submissions (assignments x enrolled students) received
+            'submissionRate': _percent(row(assignment_sub_rows, course_id, 'n'), n_assignments * enrolled),
+        })
+        totals['enrolled'] += enrolled
+        totals['completed'] += row(enrollment_rows, course_id, 'completed')
+        totals['progress_sum'] += float(row(enrollment_rows, course_id, 'progress')) * enrolled
+        totals['score'] += score
+        totals['marked'] += marked
+        totals['test_total'] += row(test_rows, course_id, 'total')
+        totals['test_possible'] += row(test_rows, course_id, 'possible')
+        totals['assignments'] += n_assignments
+        totals['submitted_assignments'] += row(assignment_rows, course_id, 'submitted')
+
+    avg_progress = round(totals['progress_sum'] / totals['enrolled']) if totals['enrolled'] else 0
+    completion_rate = _percent(totals['completed'], totals['enrolled'])
+    participation = _percent(active_learners, distinct_students)
+    return {
+        'timeRange': time_range,
+        'overview': {
+            'totalStudents': totals['enrolled'],
+            'avgProgress': avg_progress,
+            'avgScore': _average(totals['score'], totals['marked']),
+            'studyTime': watch_minutes * 60,
+        },
+        'engagement': {
+            'activeLearners': active_learners,
+            'totalLearners': distinct_students,
+            'completionRate': completion_rate,
+            'averageProgress': avg_progress,
+        },
+        'engagementMetrics': [
+            {'metric': 'Student Participation', 'value': participation, 'trend': '+0%'},
+            {'metric': 'Assignment Completion', 'value': _percent(totals['submitted_assignments'], totals['assignments']), 'trend': '+0%'},
+            {'metric': 'Test Performance', 'value': _percent(totals['test_total'], totals['test_possible']), 'trend': '+0%'},
+            {'metric': 'Course Completion', 'value': completion_rate, 'trend': '+0%'},
+        ],
+        'coursePerformance': course_performance,
+    }
+
+
+def _daily_series(since_day, today, *series):
+    """[{date, <name>: n, ...}] for every day in the window from {name: {day: n}} dicts."""
+    days = []
+    day = since_day
+    while day <= today:
+        entry = {'date': day.isoformat()}
+        for name, per_day in series:
+            entry[name] = per_day.get(day, 0)
+        days.append(entry)
+        day += timedelta(days=1)
+    return days
+
+
+def admin_analytics(time_range=DEFAULT_TIME_RANGE):
+    """Platform-wide figures for the admin dashboard.
+
+    Event counts (registrations, enrollments, submissions, downloads, uploads,
+    activity) come from the daily rollups kept by `update_daily_rollups`, so
+    they cost O(days). Current-state figures (active users, enrollment
+    completion) are single aggregate queries.
+    """
+    if time_range not in TIME_RANGES:
+        time_range = DEFAULT_TIME_RANGE
+    now = timezone.now()
+    today = timezone.localdate()
+    since_day = today - timedelta(days=TIME_RANGES[time_range] - 1)
+    month_ago = today - timedelta(days=29)
+
+    users_by_role = dict(
+        DailyUserStat.objects.order_by().values('role').annotate(n=Sum('new_users')).values_list('role', 'n')
+    )
+    new_users = dict(
+        DailyUserStat.objects.filter(date__gte=since_day).order_by().values('date')
+        .annotate(n=Sum('new_users')).values_list('date', 'n')
+    )
+    new_this_month = DailyUserStat.objects.filter(date__gte=month_ago).aggregate(n=Sum('new_users'))['n'] or 0
+
+    course_days = {
+        row['date']: row
+        for row in DailyCourseStat.objects.filter(date__gte=since_day).order_by().values('date')
+        .annotate(enrollments=Sum('new_enrollments'), submissions=Sum('submissions'))
+    }
+    trending = list(
+        DailyCourseStat.objects.filter(date__gte=since_day).order_by().values('course_id', 'course__title')
+        .annotate(n=Sum('new_enrollments')).filter(n__gt=0).order_by('-n')[:5]
+    )
+    content = DailyContentStat.objects.aggregate(uploads=Sum('uploads'), videos=Sum('video_uploads'))
+    content_days = {
+        row['date']: row
+        for row in DailyContentStat.objects.filter(date__gte=since_day).values('date', 'downloads', 'uploads')
+    }
+    monthly_uploads = DailyContentStat.objects.filter(date__gte=month_ago).aggregate(n=Sum('uploads'))['n'] or 0
+    activity_by_type = dict(
+        DailyActivityStat.objects.filter(date__gte=since_day).order_by().values('activity_type')
+        .annotate(n=Sum('count')).values_list('activity_type', 'n')
+    )
+    activity_days = dict(
+        DailyActivityStat.objects.filter(date__gte=since_day).order_by().values('date')
+        .annotate(n=Sum('count')).values_list('date', 'n')
+    )
+
+    # current state rather than events: one aggregate each
+    active = User.objects.aggregate(
+        daily=Count('id', filter=Q(last_login__gte=now - timedelta(days=1))),
+        weekly=Count('id', filter=Q(last_login__gte=now - timedelta(days=7))),
+        monthly=Count('id', filter=Q(last_login__gte=now - timedelta(days=30))),
+    )
+    enrollment = Enrollment.objects.aggregate(
+        n=Count('id'),
+        completed=Count('id', filter=Q(status='completed')),
+        dropped=Count('id', filter=Q(status='dropped')),
+        grade=Avg('final_grade'),
+        progress=Avg('progress_percentage'),
+    )
+    watch_minutes = LectureProgress.objects.aggregate(m=Sum('watch_time_minutes'))['m'] or 0
+    total_users = sum(users_by_role.values())
+    popular = list(
+        Course.objects.filter(total_enrollments__gt=0).order_by('-total_enrollments')
+        .values('id', 'title', 'total_enrollments', 'average_rating')[:5]
+    )
+    # peak usage over the last 24 hours (served by the created_at index)
+    per_hour = dict(
+        ActivityLog.objects.filter(created_at__gte=now - timedelta(hours=24)).order_by()
+        .annotate(hour=TruncHour('created_at')).values('hour').annotate(n=Count('id')).values_list('hour', 'n')
+    )
+    current_hour = now.replace(minute=0, second=0, microsecond=0)
+    usage = []
+    for offset in range(23, -1, -1):
+        hour = current_hour - timedelta(hours=offset)
+        usage.append({'hour': f'{timezone.localtime(hour).hour:02d}:00', 'users': per_hour.get(hour, 0)})
+    last_run = RollupWatermark.objects.aggregate(t=Max('updated_at'))['t']
+
+    return {
+        'timeRange': time_range,
+        'rollupsUpdatedAt': last_run.isoformat() if last_run else None,
+        'userAnalytics': {
+            'activeUsers': active,
+            'newRegistrations': {
+                'students': users_by_role.get('student', 0),
+                'teachers': users_by_role.get('teacher', 0),
+                'thisMonth': new_this_month,
+            },
+            'byRole': users_by_role,
+            'engagement': {
+                'avgTime': round(watch_minutes / (total_users or 1) / 60, 1),
+                'logins': active['weekly'],
+                'dropouts': _percent(enrollment['dropped'], enrollment['n']),
+            },
+        },
+        'courseAnalytics': {
+            'completion': _percent(enrollment['completed'], enrollment['n']),
+            'averageGrades': round(float(enrollment['grade'] or 0)),
+            'engagement': round(float(enrollment['progress'] or 0)),
+            'popular': [
+                {'courseId': c['id'], 'name': c['title'], 'enrollments': c['total_enrollments'],
+                 'rating': f"{float(c['average_rating'] or 0):.1f}"}
+                for c in popular
+            ],
+            'trending': [
+                {'courseId': c['course_id'], 'name': c['course__title'], 'newEnrollments': c['n']} for c in trending
+            ],
+        },
+        'systemWide': {
+            'usage': usage,
+            'content': {
+                'totalFiles': content['uploads'] or 0,
+                'totalVideos': content['videos'] or 0,
+                'totalQuizzes': Test.objects.count(),
+                'monthlyUploads': monthly_uploads,
+            },
+            'activityByType': activity_by_type,
+        },
+        'daily': _daily_series(
+            since_day, today,
+            ('newUsers', new_users),
+            ('enrollments', {d: r['enrollments'] for d, r in course_days.items()}),
+            ('submissions', {d: r['submissions'] for d, r in course_days.items()}),
+            ('downloads', {d: r['downloads'] for d, r in content_days.items()}),
+            ('uploads', {d: r['uploads'] for d, r in content_days.items()}),
+            ('activity', activity_days),
+        ),
+    }
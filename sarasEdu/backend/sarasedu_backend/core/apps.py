@@ -11,3 +11,10 @@ class CoreConfig(AppConfig):
         except Exception:
             # avoid crashing app import if signals fail in some environments
             pass
+        # precompile role-scoping rules used by BaseModelViewSet.get_queryset;
+        # any pair missing here is built lazily on first request
+        try:
+            from . import scoping
+            scoping.compile_rules()
+        except Exception:
+            pass
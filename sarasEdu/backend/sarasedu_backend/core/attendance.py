@@ -0,0 +1,122 @@
+"""
+Bulk attendance marking and attendance statistics.
+
+A class register is submitted as one request: enrollment of every listed
+student is checked with a single query and all valid rows are upserted on
+`(student, course, date)` in one statement, instead of one POST (and one
+unique check) per student. Statistics are conditional `Count`s grouped by
+student or course, so summaries never load the raw records.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .dbutils import bulk_upsert
+from .models import AttendanceRecord, Enrollment
+
+
+STATUSES = tuple(value for value, _label in AttendanceRecord.STATUS)
+
+
+def max_bulk_rows():
+    return getattr(settings, 'ATTENDANCE_BULK_MAX_ROWS', 1000)
+
+
+def _student_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def mark_bulk(course, date, entries, marked_by):
+    """Upsert attendance of `course` on `date` from `[{student, status, notes}]`.
+
+    Invalid rows (unknown status, student not enrolled, listed twice) are
+    reported and skipped; the rest are written together. Returns one result
+    dict per entry, in input order.
+    """
+    results = []
+    for entry in entries:
+        entry = entry if isinstance(entry, dict) else {}
+        results.append({'student': _student_id(entry.get('student')), 'status': entry.get('status')})
+
+    ids = {r['student'] for r in results if r['student'] is not None}
+    enrolled = set(
+        Enrollment.objects.filter(course=course, student_id__in=ids).values_list('student_id', flat=True)
+    )
+
+    valid = {}
+    for result, entry in zip(results, entries):
+        student_id = result['student']
+        if student_id is None:
+            result['error'] = 'student is required.'
+        elif result['status'] not in STATUSES:
+            result['error'] = f'status must be one of: {", ".join(STATUSES)}.'
+        elif student_id not in enrolled:
+            result['error'] = 'Student is not enrolled in this course.'
+        elif student_id in valid:
+            result['error'] = 'Student is listed more than once.'
+        else:
+            valid[student_id] = (result, entry.get('notes') or None)
+
+    with transaction.atomic():
+        existing = set(
+            AttendanceRecord.objects.filter(course=course, date=date, student_id__in=valid)
+            .values_list('student_id', flat=True)
+        )
+        rows = [
+            AttendanceRecord(
+                student_id=student_id, course=course, date=date, status=result['status'], notes=notes,
+                marked_by=marked_by,
+            )
+            for student_id, (result, notes) in valid.items()
+        ]
+        bulk_upsert(
+            AttendanceRecord, rows,
+            unique_fields=['student', 'course', 'date'], update_fields=['status', 'notes', 'marked_by'],
+        )
+
+    for student_id, (result, _notes) in valid.items():
+        result['result'] = 'updated' if student_id in existing else 'created'
+    for result in results:
+        if 'error' in result:
+            result['result'] = 'error'
+    return results
+
+
+# ?group= value -> columns each stats row is grouped by
+STATS_GROUPS = {
+    'student': ('student_id', 'student__username', 'student__first_name', 'student__last_name'),
+    'course': ('course_id', 'course__title'),
+}
+
+
+def _counts():
+    return {
+        'total': Count('id'),
+        **{status: Count('id', filter=Q(status=status)) for status in STATUSES},
+    }
+
+
+def with_rates(row):
+    """Add `<status>_rate` percentages to a row of status counts."""
+    total = row['total']
+    for status in STATUSES:
+        row[f'{status}_rate'] = round(row[status] * 100.0 / total, 1) if total else 0.0
+    return row
+
+
+def stats_rows(records, group='student'):
+    """Per-student or per-course status counts of `records`, one grouped query.
+
+    Returns an ordered values() queryset (so it can be paginated); pass each
+    row through `with_rates` for the percentages.
+    """
+    columns = STATS_GROUPS[group]
+    return records.order_by().values(*columns).annotate(**_counts()).order_by(columns[0])
+
+
+def stats_summary(records):
+    """Status counts and rates over all of `records`."""
+    return with_rates(records.aggregate(**_counts()))
@@ -0,0 +1,107 @@
+"""
+Content-addressed, reference-counted upload storage.
+
+Every upload is hashed (SHA-256, over the bytes as they stream in) and its
+content stored once, under `cas/<d[:2]>/<d[2:4]>/<digest><ext>`. A `ContentBlob`
+row records that copy and how many rows point at it (`Upload`s and
+`AssignmentSubmission`s), so uploading a file that is already stored (the same
+syllabus by several teachers, the same PDF to several assignments) skips the
+storage write and is just one insert plus a counter bump. Deleting a row
+releases its reference; the stored object goes with the last one.
+"""
+import hashlib
+import os
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+
+from . import thumbnails
+from .models import ContentBlob, Upload
+
+
+def content_name(digest, file_name=''):
+    """Storage name of content `digest`; keeps the extension so servers can infer its type."""
+    ext = os.path.splitext(file_name or '')[1].lower()
+    if not ext[1:].isalnum() or len(ext) > 16:
+        ext = ''
+    return f'cas/{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+
+def hash_file(file):
+    """`(hex sha256, size)` of a Django File, read chunk by chunk; rewinds it."""
+    hasher = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    for chunk in file.chunks():
+        hasher.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    return hasher.hexdigest(), size
+
+
+def acquire(digest, size, file_name, put, discard=None):
+    """Take a reference to the blob of content `digest`, storing the content only if it is new.
+
+    `put(name)` must store the bytes under `name` and return the name actually
+    used; it is not called when a copy already exists, in which case `discard()`
+    (if given) is called to drop the caller's staged bytes instead. Call inside
+    the transaction that saves the row holding the reference.
+    """
+    with transaction.atomic():
+        blob = ContentBlob.objects.select_for_update().filter(digest=digest).first()
+        if blob is None:
+            name = put(content_name(digest, file_name))
+            blob, created = ContentBlob.objects.get_or_create(digest=digest, defaults={'size': size, 'storage_name': name})
+            if created:
+                thumbnails.enqueue(blob, file_name)
+            elif blob.storage_name != name:
+                # a concurrent upload of the same content registered first
+                default_storage.delete(name)
+        elif discard is not None:
+            discard()
+        ContentBlob.objects.filter(id=blob.id).update(ref_count=F('ref_count') + 1)
+        return blob
+
+
+def ingest(digest, size, file_name, user, put, discard=None):
+    """Record an Upload of content `digest` (see `acquire`); the Upload holds the reference."""
+    with transaction.atomic():
+        blob = acquire(digest, size, file_name, put, discard)
+        return Upload.objects.create(
+            file_name=file_name, file_url=default_storage.url(blob.storage_name), uploaded_by=user,
+            size=blob.size, digest=blob.digest, blob=blob,
+        )
+
+
+def store(file, file_name, user):
+    """Hash and store a Django File (e.g. request.FILES['file']); returns its Upload."""
+    digest, size = hash_file(file)
+    return ingest(digest, size, file_name, user, put=lambda name: default_storage.save(name, file))
+
+
+def store_blob(file, file_name):
+    """Hash and store a Django File without an Upload row; the caller holds the returned reference.
+
+    Used for assignment submissions, which are private to the student and the
+    course's teacher and so must not show up in /api/uploads/.
+    """
+    digest, size = hash_file(file)
+    return acquire(digest, size, file_name, put=lambda name: default_storage.save(name, file))
+
+
+def release(blob_id):
+    """Drop one reference to a blob; deletes it, its stored object and its thumbnails at zero."""
+    with transaction.atomic():
+        blob = ContentBlob.objects.select_for_update().filter(id=blob_id).first()
+        if blob is None:
+            return
+        if blob.ref_count > 1:
+            ContentBlob.objects.filter(id=blob.id).update(ref_count=F('ref_count') - 1)
+            return
+        # remove the object while the row is still locked, so a concurrent
+        # upload of the same content waits and then stores a fresh copy
+        default_storage.delete(blob.storage_name)
+        for variant in (blob.variants or {}).values():
+            default_storage.delete(variant['name'])
+        blob.delete()
@@ -0,0 +1,91 @@
+"""
+Everything the course detail page shows, in one response.
+
+The page used to fetch the course, its lectures, lecture materials, study
+materials, assignments, tests, ratings and the viewer's enrollment with eight
+separate requests. `course_page` builds the same data with a fixed number of
+queries (lectures and their materials come from one prefetch), each section
+scoped exactly like its own list endpoint filtered by `?course=`.
+
+The response is validated with an ETag over its rendered body, so a repeat view
+of an unchanged course is answered with 304 Not Modified.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db.models import Avg, Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from . import scoping
+from .models import Assignment, CourseRating, Enrollment, Lecture, LectureMaterial, StudyMaterial, Test
+from .serializers import (
+    AssignmentSerializer, CourseRatingSerializer, CourseSerializer, EnrollmentSerializer,
+    LectureMaterialSerializer, LectureSerializer, StudyMaterialSerializer, TestSerializer,
+)
+
+
+def max_ratings():
+    return getattr(settings, 'COURSE_PAGE_MAX_RATINGS', 20)
+
+
+def _scoped(qs, course, user):
+    """Apply the viewsets' role scoping to `qs` as if `?course=<course.id>` were passed."""
+    if not user or not user.is_authenticated or getattr(user, 'role', None) == 'admin':
+        return qs
+    rule = scoping.get_rule(qs.model, getattr(user, 'role', None))
+    if rule.has_course:
+        return qs.filter(course=course)
+    return rule.apply(qs, user)
+
+
+def course_page(course, user, context=None):
+    """Serialized course page of `course` as seen by `user`."""
+    context = context or {}
+    authenticated = bool(user and user.is_authenticated)
+
+    materials = _scoped(LectureMaterial.objects.order_by('id'), course, user)
+    lectures = (
+        _scoped(Lecture.objects.filter(course=course), course, user)
+        .order_by('order_index', 'id')
+        .prefetch_related(Prefetch('materials', queryset=materials))
+    )
+    study_materials = _scoped(StudyMaterial.objects.filter(course=course), course, user).order_by('-created_at', 'id')
+    assignments = (
+        _scoped(Assignment.objects.filter(course=course), course, user)
+        .select_related('created_by').order_by('due_date', 'id')
+    )
+    tests = (
+        _scoped(Test.objects.filter(course=course), course, user)
+        .annotate(avg_marks_obtained=Avg('submissions__marks_obtained')).order_by('scheduled_date', 'id')
+    )
+
+    lecture_rows = []
+    for lecture in lectures:
+        row = LectureSerializer(lecture, context=context).data
+        row['materials'] = LectureMaterialSerializer(lecture.materials.all(), many=True, context=context).data
+        lecture_rows.append(row)
+
+    # ratings and enrollments are only served to signed-in users
+    ratings = []
+    enrollment = None
+    if authenticated:
+        ratings = _scoped(CourseRating.objects.filter(course=course), course, user).select_related('student')
+        ratings = CourseRatingSerializer(ratings[:max_ratings()], many=True, context=context).data
+        enrollment = Enrollment.objects.filter(course=course, student=user).first()
+        if enrollment is not None:
+            enrollment = EnrollmentSerializer(enrollment, context=context).data
+
+    return {
+        'course': CourseSerializer(course, context=context).data,
+        'lectures': lecture_rows,
+        'study_materials': StudyMaterialSerializer(study_materials, many=True, context=context).data,
+        'assignments': AssignmentSerializer(assignments, many=True, context=context).data,
+        'tests': TestSerializer(tests, many=True, context=context).data,
+        'ratings': ratings,
+        'enrollment': enrollment,
+    }
+
+
+def etag(payload):
+    """Strong ETag over the JSON rendering of `payload`."""
+    return '"%s"' % hashlib.sha1(JSONRenderer().render(payload)).hexdigest()
@@ -0,0 +1,21 @@
+"""
+Small database helpers shared by the bulk write paths.
+"""
+from django.db import connections, router
+
+
+def bulk_upsert(model, rows, unique_fields, update_fields, batch_size=None):
+    """Insert `rows`, updating `update_fields` where a unique key already exists.
+
+    Wraps `bulk_create(update_conflicts=True)`. MySQL's ON DUPLICATE KEY UPDATE
+    cannot name the conflict target, so `unique_fields` is only passed to
+    backends that support it; there the conflict is resolved by the table's
+    unique constraints, which must match `unique_fields`.
+    """
+    if not rows:
+        return []
+    connection = connections[router.db_for_write(model)]
+    kwargs = {'update_conflicts': True, 'update_fields': list(update_fields)}
+    if connection.features.supports_update_conflicts_with_target:
+        kwargs['unique_fields'] = list(unique_fields)
+    return model.objects.bulk_create(rows, batch_size=batch_size, **kwargs)
@@ -0,0 +1,314 @@
+"""
+Announcement delivery outbox.
+
+`AnnouncementViewSet.create` only enqueues an `AnnouncementDelivery` job; the
+`process_announcement_deliveries` worker claims due jobs, writes the in-app
+`Notification` rows in bulk, materializes one recipient row per address, sends
+email over a single reused connection and SMS through a bounded thread pool,
+and records the outcome of every recipient. Only recipients still `pending`
+are sent, so a retried job never double-sends.
+"""
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import get_connection, EmailMessage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import AnnouncementDelivery, AnnouncementDeliveryRecipient, Notification
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+DELIVERY_CHANNELS = ('in-app', 'email', 'sms')
+RECIPIENT_CHUNK_SIZE = 1000
+
+
+def audience_users(audience):
+    """Users targeted by an announcement audience ('students', 'teachers' or everyone)."""
+    audience = (audience or '').lower()
+    if audience == 'students':
+        return User.objects.filter(role='student')
+    if audience == 'teachers':
+        return User.objects.filter(role='teacher')
+    return User.objects.all()
+
+
+def enqueue_announcement(announcement):
+    """Create the delivery job for `announcement`, or return None if it has no deliverable channel."""
+    channels = [c for c in DELIVERY_CHANNELS if c in (announcement.channels or [])]
+    if not channels:
+        return None
+    return AnnouncementDelivery.objects.create(
+        announcement=announcement,
+        channels=channels,
+        available_at=announcement.scheduled_for or timezone.now(),
+    )
+
+
+def claim_next_job(now=None):
+    """Atomically mark the next due job as running and return it (None if nothing is due).
+
+    Rows are locked with SKIP LOCKED so several workers can run side by side;
+    jobs left `running` by a crashed worker are reclaimed after
+    ANNOUNCEMENT_DELIVERY_STALE_SECONDS. A live worker moves `started_at`
+    forward after every step and batch (`_touch`), so a long delivery is never
+    mistaken for a crashed one.
+    """
+    now = now or timezone.now()
+    stale_before = now - timedelta(seconds=getattr(settings, 'ANNOUNCEMENT_DELIVERY_STALE_SECONDS', 900))
+    with transaction.atomic():
+        job = (
+            AnnouncementDelivery.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(status='pending', available_at__lte=now) | Q(status='running', started_at__lt=stale_before))
+            .order_by('available_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = now
+        job.attempts += 1
+        job.save(update_fields=['status', 'started_at', 'attempts'])
+    return job
+
+
+def in_app_recipient_ids(audience):
+    """Ids of audience users who accept in-app announcement notifications.
+
+    Preferences are applied with a join on UserSettings; users without a
+    settings row get the model defaults (both enabled).
+    """
+    return (
+        audience_users(audience)
+        .filter(
+            Q(settings__isnull=True)
+            | Q(settings__inapp_notifications=True, settings__notify_announcements=True)
+        )
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+
+
+def create_in_app_notifications(announcement):
+    """Write one announcement Notification per opted-in audience user; return how many.
+
+    User ids are streamed from the database and inserted with chunked
+    bulk_create, so a large audience costs a few statements per
+    NOTIFICATION_BULK_SIZE users. Does nothing if the announcement was already
+    fanned out (job retry).
+    """
+    existing = Notification.objects.filter(related_object_type='announcement', related_object_id=announcement.id)
+    if existing.exists():
+        return 0
+    chunk_size = max(1, getattr(settings, 'NOTIFICATION_BULK_SIZE', RECIPIENT_CHUNK_SIZE))
+    title = announcement.title or 'Announcement'
+    message = announcement.body or ''
+    total = 0
+    rows = []
+    with transaction.atomic():
+        for user_id in in_app_recipient_ids(announcement.audience).iterator(chunk_size=chunk_size):
+            rows.append(Notification(
+                user_id=user_id,
+                notification_type='announcement',
+                title=title,
+                message=message,
+                related_object_type='announcement',
+                related_object_id=announcement.id,
+            ))
+            if len(rows) >= chunk_size:
+                Notification.objects.bulk_create(rows)
+                total += len(rows)
+                rows = []
+        if rows:
+            Notification.objects.bulk_create(rows)
+            total += len(rows)
+    return total
+
+
+def materialize_recipients(job):
+    """Store one recipient row per (channel, address) of the job's audience.
+
+    Addresses are streamed with `values_list` and inserted in chunks inside one
+    transaction; a job that already has recipients (retry after a crash) is
+    left as is.
+    """
+    if job.recipients.exists():
+        return job.total_recipients
+    users = audience_users(job.announcement.audience)
+    sources = {
+        'email': users.exclude(email__isnull=True).exclude(email='').values_list('id', 'email'),
+        'sms': users.exclude(phone__isnull=True).exclude(phone='').values_list('id', 'phone'),
+    }
+    total = 0
+    with transaction.atomic():
+        for channel in job.channels:
+            if channel not in sources:
+                continue
+            seen = set()
+            rows = []
+            for user_id, address in sources[channel].order_by('id').iterator(chunk_size=RECIPIENT_CHUNK_SIZE):
+                address = address.strip()
+                if not address or address in seen:
+                    continue
+                seen.add(address)
+                rows.append(AnnouncementDeliveryRecipient(delivery=job, user_id=user_id, channel=channel, address=address))
+                if len(rows) >= RECIPIENT_CHUNK_SIZE:
+                    AnnouncementDeliveryRecipient.objects.bulk_create(rows)
+                    total += len(rows)
+                    rows = []
+            if rows:
+                AnnouncementDeliveryRecipient.objects.bulk_create(rows)
+                total += len(rows)
+        job.total_recipients = total
+        job.save(update_fields=['total_recipients'])
+    return total
+
+
+def _touch(job):
+    """Mark a running job as alive so claim_next_job does not reclaim it."""
+    job.started_at = timezone.now()
+    AnnouncementDelivery.objects.filter(id=job.id).update(started_at=job.started_at)
+
+
+def _record(job, recipients):
+    """Persist the status of a processed batch and bump the job's counters."""
+    if not recipients:
+        return
+    AnnouncementDeliveryRecipient.objects.bulk_update(recipients, ['status', 'error', 'sent_at'])
+    sent = sum(1 for r in recipients if r.status == 'sent')
+    job.started_at = timezone.now()
+    AnnouncementDelivery.objects.filter(id=job.id).update(
+        sent_count=F('sent_count') + sent,
+        failed_count=F('failed_count') + (len(recipients) - sent),
+        started_at=job.started_at,
+    )
+
+
+def _pending(job, channel):
+    return job.recipients.filter(channel=channel, status='pending').order_by('id')
+
+
+def send_emails(job):
+    """Send the announcement to every pending email recipient over one connection.
+
+    One message per recipient keeps addresses private and lets each failure be
+    recorded on its own row; statuses are saved every ANNOUNCEMENT_EMAIL_BATCH_SIZE.
+    """
+    announcement = job.announcement
+    pending = list(_pending(job, 'email'))
+    if not pending:
+        return
+    from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or 'no-reply@example.com'
+    subject = announcement.title or 'Announcement'
+    body = announcement.body or ''
+    batch_size = max(1, getattr(settings, 'ANNOUNCEMENT_EMAIL_BATCH_SIZE', 100))
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        logger.error('Could not open email connection for announcement delivery %s: %s', job.id, e)
+        for r in pending:
+            r.status, r.error = 'failed', f'Could not connect to mail server: {e}'
+        _record(job, pending)
+        return
+    try:
+        for i in range(0, len(pending), batch_size):
+            batch = pending[i:i + batch_size]
+            for r in batch:
+                message = EmailMessage(subject=subject, body=body, from_email=from_email, to=[r.address], connection=connection)
+                try:
+                    if connection.send_messages([message]):
+                        r.status, r.sent_at = 'sent', timezone.now()
+                    else:
+                        r.status, r.error = 'failed', 'Message was not accepted by the mail backend'
+                except Exception as e:
+                    r.status, r.error = 'failed', str(e)
+            _record(job, batch)
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def _send_sms(account_sid, auth_token, from_number, to_number, body):
+    """POST one message to Twilio; return an error string or None on success."""
+    url = f'https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json'
+    try:
+        r = requests.post(url, data={'From': from_number, 'To': to_number, 'Body': body}, auth=(account_sid, auth_token), timeout=10)
+    except Exception as e:
+        return str(e)
+    if r.status_code >= 400:
+        return f'Twilio returned {r.status_code}: {r.text[:500]}'
+    return None
+
+
+def send_sms(job):
+    """Send the announcement to pending SMS recipients with at most ANNOUNCEMENT_SMS_WORKERS in flight."""
+    announcement = job.announcement
+    pending = list(_pending(job, 'sms'))
+    if not pending:
+        return
+    tw_sid = getattr(settings, 'TWILIO_ACCOUNT_SID', None)
+    tw_token = getattr(settings, 'TWILIO_AUTH_TOKEN', None)
+    tw_from = getattr(settings, 'TWILIO_FROM_NUMBER', None)
+    if not (tw_sid and tw_token and tw_from):
+        logger.warning('SMS channel requested but Twilio not configured in settings; skipping SMS sends.')
+        for r in pending:
+            r.status, r.error = 'failed', 'Twilio is not configured'
+        _record(job, pending)
+        return
+
+    body = announcement.body or announcement.title
+    workers = max(1, getattr(settings, 'ANNOUNCEMENT_SMS_WORKERS', 8))
+    batch_size = max(1, getattr(settings, 'ANNOUNCEMENT_EMAIL_BATCH_SIZE', 100))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i in range(0, len(pending), batch_size):
+            batch = pending[i:i + batch_size]
+            errors = pool.map(lambda r: _send_sms(tw_sid, tw_token, tw_from, r.address, body), batch)
+            for r, error in zip(batch, errors):
+                if error:
+                    r.status, r.error = 'failed', error
+                else:
+                    r.status, r.sent_at = 'sent', timezone.now()
+            _record(job, batch)
+
+
+def process_job(job):
+    """Deliver a claimed job. Failures put it back in the queue until ANNOUNCEMENT_DELIVERY_MAX_ATTEMPTS."""
+    try:
+        if 'in-app' in job.channels:
+            create_in_app_notifications(job.announcement)
+            _touch(job)
+        materialize_recipients(job)
+        _touch(job)
+        if 'email' in job.channels:
+            send_emails(job)
+        if 'sms' in job.channels:
+            send_sms(job)
+        job.status = 'completed'
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'finished_at'])
+    except Exception as e:
+        logger.exception('Announcement delivery %s failed: %s', job.id, e)
+        max_attempts = getattr(settings, 'ANNOUNCEMENT_DELIVERY_MAX_ATTEMPTS', 3)
+        job.last_error = traceback.format_exc()
+        if job.attempts >= max_attempts:
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+        else:
+            # retry with a linear backoff
+            job.status = 'pending'
+            job.available_at = timezone.now() + timedelta(minutes=job.attempts)
+        job.save(update_fields=['status', 'last_error', 'finished_at', 'available_at'])
+    return job
+
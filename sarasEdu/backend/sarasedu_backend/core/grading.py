@@ -0,0 +1,201 @@
+"""
+Auto-grading helpers for test submissions.
+
+Questions of a test are loaded once into an id-keyed map, answers are graded in
+memory and persisted in bulk, so grading cost no longer scales in round trips
+with the number of questions.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Value, DecimalField
+from django.db.models.functions import Coalesce
+
+from .analytics import invalidate_teacher_analytics
+from .dbutils import bulk_upsert
+from .models import Question, TestSubmission, TestAnswer
+
+
+# (minimum percentage, letter grade), highest first
+GRADE_BOUNDARIES = (
+    (90, 'A+'),
+    (85, 'A'),
+    (80, 'A-'),
+    (75, 'B+'),
+    (70, 'B'),
+    (65, 'B-'),
+    (60, 'C+'),
+    (55, 'C'),
+    (50, 'C-'),
+)
+
+
+def grade_for_percentage(percentage):
+    """Map a 0-100 percentage to the letter grade used across the platform."""
+    for minimum, grade in GRADE_BOUNDARIES:
+        if percentage >= minimum:
+            return grade
+    return 'F'
+
+
+def percentage_of(total_awarded, total_marks):
+    """Whole-number percentage of `total_marks`, or 0 when the total is unset."""
+    if total_marks and float(total_marks) > 0:
+        return round((float(total_awarded) / float(total_marks)) * 100)
+    return 0
+
+
+def load_questions(test):
+    """Return {question_id: Question} for every question of `test` in one query."""
+    return {q.id: q for q in Question.objects.filter(test=test).only('id', 'test_id', 'correct_answer', 'marks')}
+
+
+def normalize_answers(answers_payload, questions):
+    """Map the client payload to {question_id: answer_text}.
+
+    Entries for unknown questions or questions of another test are skipped; if a
+    question is answered twice the last answer wins.
+    """
+    answers = {}
+    for a in answers_payload or []:
+        qid = a.get('question') or a.get('question_id')
+        try:
+            qid = int(qid)
+        except (TypeError, ValueError):
+            continue
+        if qid not in questions:
+            continue
+        answers[qid] = a.get('student_answer') or a.get('answer') or ''
+    return answers
+
+
+def grade_answer(question, ans_text):
+    """Return (is_correct, marks_awarded) for a single answer."""
+    try:
+        correct = (question.correct_answer or '').strip().lower()
+        if correct and ans_text and correct == str(ans_text).strip().lower():
+            return True, float(question.marks or 0)
+    except Exception:
+        pass
+    return False, 0
+
+
+def grade_new_submission(submission, answers_payload):
+    """Grade and store all answers of a fresh submission, then set its marks and grade.
+
+    Issues one query for the questions, one bulk insert for the answers and one
+    update for the submission, all inside a single transaction.
+    """
+    test = submission.test
+    questions = load_questions(test)
+    answers = normalize_answers(answers_payload, questions)
+
+    total_awarded = 0
+    rows = []
+    for qid, ans_text in answers.items():
+        is_correct, marks_awarded = grade_answer(questions[qid], ans_text)
+        total_awarded += marks_awarded
+        rows.append(TestAnswer(
+            submission=submission,
+            question_id=qid,
+            student_answer=ans_text,
+            is_correct=is_correct,
+            marks_awarded=marks_awarded,
+        ))
+
+    with transaction.atomic():
+        if rows:
+            TestAnswer.objects.bulk_create(rows)
+        submission.marks_obtained = total_awarded
+        try:
+            submission.grade = grade_for_percentage(percentage_of(total_awarded, test.total_marks))
+        except Exception:
+            # ignore grading errors but keep submission
+            pass
+        submission.save()
+    return submission
+
+
+def upsert_answers(submission, answers_payload):
+    """Overwrite the answer text of a resubmitted test in one bulk upsert.
+
+    Like the previous per-answer update_or_create, only `student_answer` is
+    replaced; marks already awarded (or set by a teacher) are left untouched.
+    """
+    questions = load_questions(submission.test)
+    answers = normalize_answers(answers_payload, questions)
+    if not answers:
+        return 0
+    rows = [
+        TestAnswer(submission=submission, question_id=qid, student_answer=ans_text)
+        for qid, ans_text in answers.items()
+    ]
+    bulk_upsert(TestAnswer, rows, unique_fields=['submission', 'question'], update_fields=['student_answer'])
+    return len(rows)
+
+
+def answer_marks(answer):
+    """Marks an answer contributes to its submission's total.
+
+    Stored `marks_awarded` wins; otherwise the mark is inferred by comparing the
+    answer with the question's correct answer.
+    """
+    if answer.marks_awarded is not None:
+        return Decimal(str(answer.marks_awarded))
+    try:
+        correct = (answer.question.correct_answer or '').strip().lower()
+        ans = (answer.student_answer or '').strip().lower()
+        if correct and ans and correct == ans:
+            return Decimal(str(answer.question.marks or 0))
+    except Exception:
+        pass
+    return Decimal('0')
+
+
+def apply_score_delta(submission_id, delta):
+    """Add `delta` to a submission's marks and recompute its grade from the new total.
+
+    The increment is a single atomic `F()` update, so concurrent autosaves of
+    different answers of the same submission cannot lose each other's marks.
+    """
+    with transaction.atomic():
+        qs = TestSubmission.objects.filter(id=submission_id)
+        if delta:
+            qs.update(marks_obtained=Coalesce(F('marks_obtained'), Value(Decimal('0'))) + Value(delta, output_field=DecimalField()))
+        row = qs.values_list('marks_obtained', 'test__total_marks').first()
+        if row is None:
+            return
+        total_awarded, total_marks = row
+        qs.update(grade=grade_for_percentage(percentage_of(total_awarded or 0, total_marks)))
+        # .update() sends no signals: retire the cached teacher report here
+        invalidate_teacher_analytics(tests__submissions=submission_id)
+
+
+def rebuild_scores(submissions):
+    """Recompute marks and grade of `submissions` from all of their answers.
+
+    Full-rebuild path used by the `rebuild_test_scores` command to repair
+    totals; answers are read in one pass with their questions joined.
+    Returns the number of submissions whose stored values changed.
+    """
+    submissions = list(submissions.select_related('test').only('id', 'marks_obtained', 'grade', 'test__total_marks'))
+    totals = {s.id: Decimal('0') for s in submissions}
+    answers = (
+        TestAnswer.objects.filter(submission_id__in=list(totals))
+        .select_related('question')
+        .only('submission_id', 'marks_awarded', 'student_answer', 'question__correct_answer', 'question__marks')
+    )
+    for answer in answers.iterator():
+        totals[answer.submission_id] += answer_marks(answer)
+
+    changed = []
+    for submission in submissions:
+        total_awarded = totals[submission.id]
+        grade = grade_for_percentage(percentage_of(total_awarded, submission.test.total_marks))
+        if submission.marks_obtained != total_awarded or submission.grade != grade:
+            submission.marks_obtained = total_awarded
+            submission.grade = grade
+            changed.append(submission)
+    if changed:
+        TestSubmission.objects.bulk_update(changed, ['marks_obtained', 'grade'], batch_size=500)
+    return len(changed)
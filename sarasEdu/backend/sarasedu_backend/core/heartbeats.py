@@ -0,0 +1,204 @@
+"""
+Buffered lecture-progress heartbeats.
+
+The video player reports progress every few seconds for every viewer, which
+made one PUT per tick the busiest write path. Heartbeats are instead posted in
+batches to `/api/lecture-progress/heartbeat/` and coalesced per worker process
+in an in-memory buffer keyed by (student, lecture): the furthest position
+wins, watched seconds are summed and completion sticks. The buffer is written
+out with one read and one bulk upsert once it is LECTURE_HEARTBEAT_FLUSH_SECONDS
+old (default 5) or holds LECTURE_HEARTBEAT_MAX_BUFFER entries (default 5000).
+A background timer flushes whatever is left once the interval has passed, so
+an idle worker does not sit on buffered progress until its next request, and
+the buffer is flushed again when the process exits.
+
+Up to one flush interval of progress lives only in memory; losing it on a
+crash costs a few seconds of watch time, never completed lectures already
+flushed.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import progress
+from .analytics import invalidate_teacher_analytics
+from .dbutils import bulk_upsert
+from .models import LectureProgress
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+# (student_id, lecture_id) -> {'position': int, 'seconds': int, 'completed': bool}
+_buffer = {}
+_last_flush = time.monotonic()
+_timer = None
+
+
+def flush_interval():
+    return getattr(settings, 'LECTURE_HEARTBEAT_FLUSH_SECONDS', 5)
+
+
+def max_buffer():
+    return getattr(settings, 'LECTURE_HEARTBEAT_MAX_BUFFER', 5000)
+
+
+def record(student_id, events):
+    """Coalesce validated `events` ({lecture, position, seconds, completed}) into the buffer.
+
+    Flushes when the buffer is due, otherwise makes sure the timer will;
+    returns the number of rows written (0 if the events were only buffered or
+    the flush failed). A failed flush keeps the events buffered and is only
+    logged: the events are accepted either way, and failing the request would
+    make the client send them again.
+    """
+    with _lock:
+        for event in events:
+            key = (student_id, event['lecture'])
+            entry = _buffer.get(key)
+            if entry is None:
+                entry = _buffer[key] = {'position': 0, 'seconds': 0, 'completed': False}
+            entry['position'] = max(entry['position'], event['position'])
+            entry['seconds'] += event['seconds']
+            entry['completed'] = entry['completed'] or event['completed']
+        due = len(_buffer) >= max_buffer() or time.monotonic() - _last_flush >= flush_interval()
+        if not due:
+            _schedule()
+    if not due:
+        return 0
+    try:
+        return flush()
+    except Exception:
+        logger.exception('Failed to flush buffered lecture progress')
+        return 0
+
+
+def _schedule():
+    # called with _lock held
+    global _timer
+    if _timer is not None:
+        return
+    _timer = threading.Timer(flush_interval(), _run_timer)
+    _timer.daemon = True
+    _timer.start()
+
+
+def _run_timer():
+    try:
+        flush_from_timer()
+    finally:
+        # the timer thread has its own database connections
+        connections.close_all()
+
+
+def flush_from_timer():
+    """Flush the buffer from the background timer; errors are logged, the entries stay buffered."""
+    global _timer
+    with _lock:
+        _timer = None
+    try:
+        return flush()
+    except Exception:
+        logger.exception('Failed to flush buffered lecture progress')
+        return 0
+
+
+def pending():
+    """Snapshot of the buffered entries (for tests and debugging)."""
+    with _lock:
+        return {key: dict(entry) for key, entry in _buffer.items()}
+
+
+def _take():
+    global _last_flush
+    with _lock:
+        entries = dict(_buffer)
+        _buffer.clear()
+        _last_flush = time.monotonic()
+    return entries
+
+
+def _requeue(entries):
+    with _lock:
+        for key, entry in entries.items():
+            current = _buffer.get(key)
+            if current is None:
+                _buffer[key] = entry
+            else:
+                current['position'] = max(current['position'], entry['position'])
+                current['seconds'] += entry['seconds']
+                current['completed'] = current['completed'] or entry['completed']
+
+
+def flush():
+    """Write the buffered progress with one locked read and one bulk upsert.
+
+    Watch time is stored in whole minutes; leftover seconds stay buffered
+    until they add up to a minute. Returns the number of rows written.
+    """
+    entries = _take()
+    if not entries:
+        return 0
+    now = timezone.now()
+    carry = {}
+    completions = {}
+    try:
+        with transaction.atomic():
+            students = {student_id for student_id, _ in entries}
+            lectures = {lecture_id for _, lecture_id in entries}
+            existing = {
+                (p.student_id, p.lecture_id): p
+                for p in LectureProgress.objects.select_for_update()
+                .filter(student_id__in=students, lecture_id__in=lectures)
+                .only('id', 'student_id', 'lecture_id', 'status', 'watch_time_minutes', 'completed_at', 'last_position_seconds')
+            }
+            rows = []
+            for key, entry in entries.items():
+                minutes, seconds = divmod(entry['seconds'], 60)
+                if seconds:
+                    carry[key] = {'position': 0, 'seconds': seconds, 'completed': False}
+                current = existing.get(key)
+                row = LectureProgress(
+                    student_id=key[0],
+                    lecture_id=key[1],
+                    status=current.status if current else 'not_started',
+                    watch_time_minutes=(current.watch_time_minutes if current else 0) + minutes,
+                    completed_at=current.completed_at if current else None,
+                    last_position_seconds=max(current.last_position_seconds if current else 0, entry['position']),
+                )
+                if entry['completed'] and row.status != 'completed':
+                    row.status = 'completed'
+                    row.completed_at = now
+                    completions[key] = 1
+                elif row.status == 'not_started':
+                    row.status = 'in_progress'
+                rows.append(row)
+            bulk_upsert(
+                LectureProgress, rows, unique_fields=['student', 'lecture'],
+                update_fields=['status', 'watch_time_minutes', 'completed_at', 'last_position_seconds'],
+            )
+            # bulk writes send no signals: move the enrollments' progress and
+            # retire the cached teacher reports (watch time) here
+            progress.apply_completions(completions)
+            invalidate_teacher_analytics(lectures__id__in=lectures)
+    except Exception:
+        # keep the progress for the next flush rather than dropping it
+        _requeue(entries)
+        raise
+    if carry:
+        _requeue(carry)
+    return len(rows)
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        logger.exception('Failed to flush buffered lecture progress at exit')
+
+
+atexit.register(_flush_at_exit)
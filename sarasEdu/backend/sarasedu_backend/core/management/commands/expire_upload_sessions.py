@@ -0,0 +1,32 @@
+"""
+Management command that aborts abandoned chunked uploads.
+
+A chunked upload that receives no chunk for UPLOAD_SESSION_TTL_SECONDS
+(default one day) is marked aborted and its staged bytes are removed: the
+`.part` file under MEDIA_ROOT, or the S3 multipart upload (whose parts are
+billed until aborted).
+
+Usage:
+    python manage.py expire_upload_sessions              # Run from cron, e.g. hourly
+    python manage.py expire_upload_sessions --ttl 3600   # Override the idle time in seconds
+"""
+
+from django.core.management.base import BaseCommand
+
+from core import uploads
+
+
+class Command(BaseCommand):
+    help = 'Abort chunked uploads that have been idle longer than UPLOAD_SESSION_TTL_SECONDS'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ttl',
+            type=int,
+            help='Idle seconds after which an upload is aborted (default: UPLOAD_SESSION_TTL_SECONDS)',
+        )
+
+    def handle(self, *args, **options):
+        ttl = options['ttl']
+        expired = uploads.expire_stale(ttl=max(0, ttl) if ttl is not None else None)
+        self.stdout.write(self.style.SUCCESS(f'✓ Aborted {expired} idle upload session(s).'))
@@ -0,0 +1,67 @@
+"""
+Management command that runs the announcement delivery worker.
+
+Announcements with in-app/email/SMS channels are queued as AnnouncementDelivery jobs
+by the API; this command sends them. Several workers may run at once.
+
+Usage:
+    python manage.py process_announcement_deliveries            # Run until stopped
+    python manage.py process_announcement_deliveries --once     # Drain due jobs and exit (cron)
+    python manage.py process_announcement_deliveries --interval 10
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from core.delivery import claim_next_job, process_job
+
+
+class Command(BaseCommand):
+    help = 'Send queued announcement notifications, emails and SMS messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process the jobs that are due now and exit',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=5,
+            help='Seconds to wait when the queue is empty (default: 5)',
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            processed = self.drain()
+            self.stdout.write(self.style.SUCCESS(f'✓ Processed {processed} delivery job(s).'))
+            return
+
+        interval = max(1, options['interval'])
+        self.stdout.write(f'Waiting for announcement deliveries, polling every {interval}s (Ctrl+C to stop)...')
+        try:
+            while True:
+                try:
+                    self.drain()
+                except Exception as e:
+                    # keep the worker alive across transient DB errors
+                    self.stdout.write(self.style.ERROR(f'Delivery pass failed: {e}'))
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped.')
+
+    def drain(self):
+        """Process due jobs until the queue is empty; return how many ran."""
+        processed = 0
+        while True:
+            job = claim_next_job()
+            if job is None:
+                return processed
+            job = process_job(job)
+            job.refresh_from_db()
+            self.stdout.write(
+                f'  - Delivery {job.id} (announcement {job.announcement_id}): {job.status}, '
+                f'{job.sent_count} sent, {job.failed_count} failed of {job.total_recipients}'
+            )
+            processed += 1
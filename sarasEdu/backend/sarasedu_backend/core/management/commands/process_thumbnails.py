@@ -0,0 +1,77 @@
+"""
+Management command that runs the thumbnail worker.
+
+Image and PDF uploads are queued as ThumbnailJob rows when their content is
+first stored; this command renders the resized WebP/JPEG variants. Several
+workers may run at once.
+
+Usage:
+    python manage.py process_thumbnails                     # Run until stopped
+    python manage.py process_thumbnails --once              # Drain due jobs and exit (cron)
+    python manage.py process_thumbnails --enqueue-missing   # Also queue content stored before thumbnails existed
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from core import thumbnails
+from core.models import ContentBlob
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnails and previews for uploaded images and PDFs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process the jobs that are due now and exit',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=5,
+            help='Seconds to wait when the queue is empty (default: 5)',
+        )
+        parser.add_argument(
+            '--enqueue-missing',
+            action='store_true',
+            help='Queue stored content that has no thumbnail job yet before processing',
+        )
+
+    def handle(self, *args, **options):
+        if options['enqueue_missing']:
+            queued = 0
+            for blob in ContentBlob.objects.filter(thumbnail_job__isnull=True).iterator():
+                if thumbnails.enqueue(blob, blob.storage_name):
+                    queued += 1
+            self.stdout.write(f'Queued {queued} blob(s) for thumbnails.')
+
+        if options['once']:
+            processed = self.drain()
+            self.stdout.write(self.style.SUCCESS(f'✓ Processed {processed} thumbnail job(s).'))
+            return
+
+        interval = max(1, options['interval'])
+        self.stdout.write(f'Waiting for thumbnail jobs, polling every {interval}s (Ctrl+C to stop)...')
+        try:
+            while True:
+                try:
+                    self.drain()
+                except Exception as e:
+                    # keep the worker alive across transient DB errors
+                    self.stdout.write(self.style.ERROR(f'Thumbnail pass failed: {e}'))
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped.')
+
+    def drain(self):
+        """Process due jobs until the queue is empty; return how many ran."""
+        processed = 0
+        while True:
+            job = thumbnails.claim_next_job()
+            if job is None:
+                return processed
+            job = thumbnails.process_job(job)
+            self.stdout.write(f'  - Thumbnails for blob {job.blob_id}: {job.status}')
+            processed += 1
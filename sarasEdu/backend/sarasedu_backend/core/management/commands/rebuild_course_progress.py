@@ -0,0 +1,40 @@
+"""
+Management command to recompute lecture counts and enrollment progress.
+
+Lecture completion and (un)publishing keep Course.total_lectures,
+Enrollment.completed_lectures and progress_percentage current; this is the
+repair path after bulk edits that bypass signals. It runs three set-based
+UPDATE statements whatever the number of enrollments.
+
+Usage:
+    python manage.py rebuild_course_progress
+    python manage.py rebuild_course_progress --course-id 12
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from core.models import Course
+from core.progress import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute total_lectures, completed_lectures and progress_percentage from lecture progress'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course-id',
+            type=int,
+            help='Only rebuild this course',
+        )
+
+    def handle(self, *args, **options):
+        course_id = options.get('course_id')
+        if course_id and not Course.objects.filter(id=course_id).exists():
+            self.stdout.write(self.style.ERROR(f'Course with ID {course_id} does not exist'))
+            return
+
+        started = time.monotonic()
+        updated = rebuild([course_id] if course_id else None)
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Recomputed progress of {updated} enrollment(s) in {time.monotonic() - started:.2f}s.')
+        )
@@ -0,0 +1,47 @@
+"""
+Management command to recompute course rating aggregates from CourseRating rows.
+
+New ratings update rating_count, rating_sum, the star histogram and
+average_rating incrementally, so this is the repair path if they ever drift
+(e.g. after ratings are edited or removed directly in the database).
+
+Usage:
+    python manage.py rebuild_course_ratings
+    python manage.py rebuild_course_ratings --course-id 12
+"""
+
+from django.core.management.base import BaseCommand
+from core.models import Course
+from core.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute rating count, sum, histogram and average_rating of courses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course-id',
+            type=int,
+            help='Only rebuild this course',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of courses processed per batch (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        qs = Course.objects.all()
+        if options.get('course_id'):
+            qs = qs.filter(id=options['course_id'])
+
+        ids = list(qs.order_by('id').values_list('id', flat=True))
+        chunk_size = max(1, options['chunk_size'])
+        changed = 0
+        for i in range(0, len(ids), chunk_size):
+            changed += rebuild_ratings(Course.objects.filter(id__in=ids[i:i + chunk_size]))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Rebuilt ratings of {len(ids)} course(s); {changed} had stale aggregates.')
+        )
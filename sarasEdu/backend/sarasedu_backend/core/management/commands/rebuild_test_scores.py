@@ -0,0 +1,54 @@
+"""
+Management command to recompute test submission marks and grades from their answers.
+
+Answer create/update only applies the score delta of the changed answer, so
+this is the repair path if totals ever drift (e.g. after manual DB edits).
+
+Usage:
+    python manage.py rebuild_test_scores
+    python manage.py rebuild_test_scores --test-id 12
+    python manage.py rebuild_test_scores --submission-id 345
+"""
+
+from django.core.management.base import BaseCommand
+from core.grading import rebuild_scores
+from core.models import TestSubmission
+
+
+class Command(BaseCommand):
+    help = 'Recompute marks_obtained and grade of test submissions from their answers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--test-id',
+            type=int,
+            help='Only rebuild submissions of this test',
+        )
+        parser.add_argument(
+            '--submission-id',
+            type=int,
+            help='Only rebuild this submission',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of submissions processed per batch (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        qs = TestSubmission.objects.all()
+        if options.get('test_id'):
+            qs = qs.filter(test_id=options['test_id'])
+        if options.get('submission_id'):
+            qs = qs.filter(id=options['submission_id'])
+
+        ids = list(qs.order_by('id').values_list('id', flat=True))
+        chunk_size = max(1, options['chunk_size'])
+        changed = 0
+        for i in range(0, len(ids), chunk_size):
+            changed += rebuild_scores(TestSubmission.objects.filter(id__in=ids[i:i + chunk_size]))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Rebuilt {len(ids)} submission(s); {changed} had stale marks or grade.')
+        )
@@ -5,8 +5,11 @@ based on the current date/time compared to their due dates.
 Usage:
     python manage.py update_assignment_statuses
     python manage.py update_assignment_statuses --dry-run  # See what would be updated
+    python manage.py update_assignment_statuses --watch --interval 60  # Run every minute
 """
 
+import time
+
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from core.models import Assignment
@@ -21,9 +24,40 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be updated without making changes',
         )
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Keep running and repeat the update every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=60,
+            help='Seconds between passes in --watch mode (default: 60)',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
+
+        if not options['watch']:
+            self.update_statuses(dry_run=dry_run)
+            return
+
+        interval = max(1, options['interval'])
+        self.stdout.write(f'Watching assignment statuses every {interval}s (Ctrl+C to stop)...')
+        try:
+            while True:
+                try:
+                    self.update_statuses(dry_run=dry_run, quiet=True)
+                except Exception as e:
+                    # keep the loop alive across transient DB errors
+                    self.stdout.write(self.style.ERROR(f'Status update failed: {e}'))
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped.')
+
+    def update_statuses(self, dry_run=False, quiet=False):
+        """Run one pass. With `quiet`, only passes that change something are reported."""
         now = timezone.now()
 
         # Find all active assignments where due_date has passed
@@ -31,33 +65,29 @@ class Command(BaseCommand):
             status='active',
             due_date__lt=now
         )
-
-        count = overdue_assignments.count()
+        # Snapshot the rows first: after the update they no longer match the filter
+        rows = list(overdue_assignments.values_list('id', 'title', 'due_date'))
+        count = len(rows)
 
         if count == 0:
-            self.stdout.write(self.style.SUCCESS('✓ No assignments need status updates.'))
-            return
+            if not quiet:
+                self.stdout.write(self.style.SUCCESS('✓ No assignments need status updates.'))
+            return 0
 
         if dry_run:
             self.stdout.write(self.style.WARNING(f'DRY RUN: Would update {count} assignment(s) to "overdue":'))
-            for assignment in overdue_assignments:
-                time_overdue = now - assignment.due_date
-                days = time_overdue.days
-                hours = time_overdue.seconds // 3600
-                self.stdout.write(
-                    f'  - ID {assignment.id}: {assignment.title} '
-                    f'(due: {assignment.due_date}, overdue by {days}d {hours}h)'
-                )
+            updated = 0
         else:
-            # Update the assignments
-            updated = overdue_assignments.update(status='overdue')
-            
+            # Only touch rows still active so a concurrent edit isn't overwritten
+            updated = Assignment.objects.filter(id__in=[r[0] for r in rows], status='active').update(status='overdue')
             self.stdout.write(self.style.SUCCESS(f'✓ Successfully updated {updated} assignment(s) to "overdue":'))
-            for assignment in overdue_assignments:
-                time_overdue = now - assignment.due_date
-                days = time_overdue.days
-                hours = time_overdue.seconds // 3600
-                self.stdout.write(
-                    f'  - ID {assignment.id}: {assignment.title} '
-                    f'(due: {assignment.due_date}, overdue by {days}d {hours}h)'
-                )
+
+        for assignment_id, title, due_date in rows:
+            time_overdue = now - due_date
+            days = time_overdue.days
+            hours = time_overdue.seconds // 3600
+            self.stdout.write(
+                f'  - ID {assignment_id}: {title} '
+                f'(due: {due_date}, overdue by {days}d {hours}h)'
+            )
+        return updated
@@ -1,3 +1,5 @@
+import time
+
 from django.core.management.base import BaseCommand
 from django.db.models import Count
 from ...models import Course, Enrollment
@@ -12,47 +14,73 @@ class Command(BaseCommand):
             type=int,
             help='Update only a specific course by ID',
         )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be updated without making changes',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of courses checked and updated per batch (default: 1000)',
+        )
 
     def handle(self, *args, **options):
         course_id = options.get('course_id')
-        
+        dry_run = options['dry_run']
+        chunk_size = max(1, options['chunk_size'])
+        started = time.monotonic()
+
+        courses = Course.objects.only('id', 'title', 'total_enrollments').order_by('id')
+        enrollments = Enrollment.objects.all()
         if course_id:
-            # Update a specific course
-            try:
-                course = Course.objects.get(id=course_id)
-                enrollment_count = Enrollment.objects.filter(course=course).count()
-                course.total_enrollments = enrollment_count
-                course.save(update_fields=['total_enrollments'])
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Updated course "{course.title}" (ID: {course.id}) - '
-                        f'total_enrollments: {enrollment_count}'
-                    )
-                )
-            except Course.DoesNotExist:
+            courses = courses.filter(id=course_id)
+            enrollments = enrollments.filter(course_id=course_id)
+            if not courses.exists():
                 self.stdout.write(
                     self.style.ERROR(f'Course with ID {course_id} does not exist')
                 )
-        else:
-            # Update all courses
-            courses = Course.objects.all()
-            updated_count = 0
-            
-            for course in courses:
-                enrollment_count = Enrollment.objects.filter(course=course).count()
-                if course.total_enrollments != enrollment_count:
-                    course.total_enrollments = enrollment_count
-                    course.save(update_fields=['total_enrollments'])
-                    updated_count += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'Updated course "{course.title}" (ID: {course.id}) - '
-                            f'total_enrollments: {enrollment_count}'
-                        )
+                return
+
+        # One grouped aggregate for every course instead of a COUNT(*) per course
+        counts = dict(
+            enrollments.order_by().values('course_id').annotate(n=Count('id')).values_list('course_id', 'n')
+        )
+        total_courses = courses.count()
+
+        checked = 0
+        updated_count = 0
+        batch = []
+        for course in courses.iterator(chunk_size=chunk_size):
+            checked += 1
+            enrollment_count = counts.get(course.id, 0)
+            if course.total_enrollments != enrollment_count:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f'{"Would update" if dry_run else "Updated"} course "{course.title}" (ID: {course.id}) - '
+                        f'total_enrollments: {course.total_enrollments} -> {enrollment_count}'
                     )
-            
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'\nCompleted! Updated {updated_count} course(s) out of {courses.count()} total courses.'
                 )
+                course.total_enrollments = enrollment_count
+                batch.append(course)
+                updated_count += 1
+            if len(batch) >= chunk_size:
+                self._flush(batch, dry_run)
+                batch = []
+            if checked % chunk_size == 0:
+                self.stdout.write(f'  ... checked {checked}/{total_courses} courses')
+        self._flush(batch, dry_run)
+
+        elapsed = time.monotonic() - started
+        prefix = 'DRY RUN: would update' if dry_run else 'Completed! Updated'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n{prefix} {updated_count} course(s) out of {total_courses} total courses '
+                f'in {elapsed:.2f}s.'
             )
+        )
+
+    def _flush(self, courses, dry_run):
+        if courses and not dry_run:
+            Course.objects.bulk_update(courses, ['total_enrollments'])
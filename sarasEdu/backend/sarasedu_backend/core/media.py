@@ -0,0 +1,260 @@
+"""
+Protected serving of local media files (USE_S3=0).
+
+Files under MEDIA_ROOT are referenced by URL from model rows (Upload.file_url,
+AssignmentSubmission.submitted_file_url, LibraryItem.file_url, ...). A user may
+read a file if they can see at least one row that references it, using the
+same `core.scoping` rules as the viewsets (uploads only by their uploader);
+admins can read everything. Thumbnail variants (`cas/.../<digest>.small.webp`)
+follow the original file.
+
+Links, <img> and <video> elements cannot send the Authorization header, so the
+frontend exchanges media URLs for signed ones (POST /api/media/sign/): the
+access check runs once when signing, and the signature, bound to one path and
+valid for MEDIA_URL_EXPIRES_SECONDS, is the grant for every later request
+(including each Range request of a video).
+
+Once access is granted the bytes are sent by the cheapest available path:
+
+- MEDIA_ACCEL_REDIRECT_PREFIX (nginx): `X-Accel-Redirect: <prefix><path>`, nginx
+  serves the file from an `internal` location, including Range requests.
+- MEDIA_SENDFILE_HEADER (Apache mod_xsendfile, lighttpd): that header with the
+  absolute file path.
+- otherwise Django serves the file itself, honouring `Range` (a single byte
+  range), `If-Range`, `ETag`/`If-None-Match` and `Last-Modified`. The body is a
+  FileResponse, so WSGI servers with a sendfile-capable `wsgi.file_wrapper`
+  (gunicorn) pass ranges to os.sendfile rather than copying through Python.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import urlencode, urlparse
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from . import scoping
+from .models import (
+    AssignmentAttachment, AssignmentSubmission, ContentBlob, Course, Lecture, LectureMaterial,
+    LibraryItem, StudyMaterial, Upload, User,
+)
+
+# How a reference grants access to non-admins:
+SCOPED = 'scoped'  # whoever the model's viewset shows the row to (core.scoping)
+OWNER = 'owner'    # only the row's owner; uploads are listed to all students,
+                   # but the files behind them are not theirs to read
+ANY = 'any'        # any signed-in user
+
+# (model, URL field, access) of every column that can point at a media file.
+REFERENCES = (
+    (Upload, 'file_url', OWNER),
+    (AssignmentSubmission, 'submitted_file_url', SCOPED),
+    (AssignmentAttachment, 'file_url', SCOPED),
+    (LectureMaterial, 'file_url', SCOPED),
+    (StudyMaterial, 'file_url', SCOPED),
+    (Lecture, 'video_url', SCOPED),
+    (LibraryItem, 'file_url', SCOPED),
+    (LibraryItem, 'thumbnail_url', SCOPED),
+    (Course, 'thumbnail_url', SCOPED),
+    (User, 'avatar_url', ANY),
+)
+OWNER_FIELDS = {Upload: 'uploaded_by'}
+
+CAS_PATH = re.compile(r'^cas/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})[^/]*$')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+SIGN_SALT = 'core.media'
+
+
+def expires_in():
+    return getattr(settings, 'MEDIA_URL_EXPIRES_SECONDS', 3600)
+
+
+def path_from_url(url):
+    """Media path of a local media URL (`/media/x/y.pdf` or absolute), or None."""
+    url_path = urlparse(url or '').path
+    prefix = '/' + settings.MEDIA_URL.strip('/') + '/'
+    if not url_path.startswith(prefix) or len(url_path) == len(prefix):
+        return None
+    return url_path[len(prefix):]
+
+
+def resolve(path):
+    """Absolute filesystem path of a media path, or None if it escapes MEDIA_ROOT or is not a file."""
+    try:
+        full_path = safe_join(str(settings.MEDIA_ROOT), path)
+    except (SuspiciousFileOperation, ValueError):
+        return None
+    return full_path if os.path.isfile(full_path) else None
+
+
+def reference_urls(path):
+    """URLs under which rows may reference `path` (the original's URL for thumbnail variants)."""
+    match = CAS_PATH.match(path)
+    if match:
+        blob = ContentBlob.objects.filter(digest=match.group(1)).only('storage_name').first()
+        if blob is not None:
+            return [default_storage.url(blob.storage_name)]
+    return [default_storage.url(path)]
+
+
+def can_read(user, path):
+    """Whether `user` can see a row referencing `path`."""
+    urls = reference_urls(path)
+    role = getattr(user, 'role', None)
+    for model, field, access in REFERENCES:
+        qs = model.objects.filter(**{f'{field}__in': urls})
+        if role != 'admin':
+            if access == OWNER:
+                qs = qs.filter(**{OWNER_FIELDS[model]: user})
+            elif access == SCOPED:
+                qs = scoping.get_rule(model, role).apply(qs, user)
+        if qs.exists():
+            return True
+    return False
+
+
+def _signer(path):
+    # the salt binds the signature to one path
+    return signing.TimestampSigner(salt=f'{SIGN_SALT}:{path}')
+
+
+def sign(user, path):
+    """Signed URL of media `path` for `user` (who must be allowed to read it)."""
+    query = urlencode({'sig': _signer(path).sign(str(user.pk))})
+    return f'{default_storage.url(path)}?{query}'
+
+
+def check_signature(path, sig):
+    """Whether `sig` is an unexpired signature for `path`."""
+    try:
+        _signer(path).unsign(sig or '', max_age=expires_in())
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def etag_for(stat):
+    return quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+
+
+def parse_range(header, size):
+    """`(start, end)` (inclusive) of a single-range `Range` header.
+
+    Returns None when the header should be ignored (absent, malformed or
+    multiple ranges, which are answered with the whole file) and raises
+    ValueError when the range cannot be satisfied.
+    """
+    match = RANGE.match((header or '').strip())
+    if not match or size == 0 or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('empty suffix range')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        if last and int(last) < start:
+            return None  # syntactically invalid, ignore
+        raise ValueError('range not satisfiable')
+    return start, end
+
+
+def _if_range_matches(request, etag, mtime):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+class RangeFile:
+    """Read-only view of bytes `start`..`start + length` of an open file.
+
+    Exposes `fileno()`/`tell()` so a sendfile-capable `wsgi.file_wrapper` can
+    send the range with os.sendfile (bounded by Content-Length), and no `seek`
+    or `name`, so FileResponse leaves Content-Length to us.
+    """
+
+    def __init__(self, fh, start, length):
+        fh.seek(start)
+        self._fh = fh
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self._fh.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self._fh.fileno()
+
+    def tell(self):
+        return self._fh.tell()
+
+    def close(self):
+        self._fh.close()
+
+
+def serve(request, path, full_path):
+    """Response for an already authorised media file (see module docstring)."""
+    stat = os.stat(full_path)
+    etag = etag_for(stat)
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = _send(request, path, full_path, stat, etag, content_type)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    # keep signed URLs out of Referer headers sent by opened documents
+    response['Referrer-Policy'] = 'no-referrer'
+    patch_cache_control(response, private=True, max_age=getattr(settings, 'MEDIA_CACHE_SECONDS', 3600))
+    return response
+
+
+def _send(request, path, full_path, stat, etag, content_type):
+    accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', None)
+    if accel_prefix:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + path.lstrip('/')
+        return response
+    sendfile_header = getattr(settings, 'MEDIA_SENDFILE_HEADER', None)
+    if sendfile_header:
+        response = HttpResponse(content_type=content_type)
+        response[sendfile_header] = full_path
+        return response
+
+    size = stat.st_size
+    byte_range = None
+    if request.method == 'GET' and _if_range_matches(request, etag, stat.st_mtime):
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    fh = open(full_path, 'rb')
+    if byte_range is None:
+        return FileResponse(fh, content_type=content_type)
+    start, end = byte_range
+    response = FileResponse(RangeFile(fh, start, end - start + 1), status=206, content_type=content_type)
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
@@ -0,0 +1,78 @@
+# Denormalized rating count/sum/histogram on Course, backfilled from CourseRating
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Course = apps.get_model('core', 'Course')
+    CourseRating = apps.get_model('core', 'CourseRating')
+
+    def star(n):
+        q = Q()
+        if n > 1:
+            q &= Q(rating__gte=Decimal(n) - Decimal('0.5'))
+        if n < 5:
+            q &= Q(rating__lt=Decimal(n) + Decimal('0.5'))
+        return Count('id', filter=q)
+
+    rows = (
+        CourseRating.objects.order_by().values('course_id')
+        .annotate(count=Count('id'), total=Sum('rating'), **{f's{n}': star(n) for n in range(1, 6)})
+    )
+    for row in rows.iterator():
+        total = row['total'] or 0
+        Course.objects.filter(id=row['course_id']).update(
+            rating_count=row['count'],
+            rating_sum=total,
+            average_rating=round(Decimal(str(total)) / row['count'], 2),
+            **{f'rating_count_{n}': row[f's{n}'] for n in range(1, 6)},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='rating_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_sum',
+            field=models.DecimalField(decimal_places=1, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count_1',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count_2',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count_3',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count_4',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count_5',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Daily rollup tables for the admin analytics endpoint
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_course_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyContentStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('downloads', models.IntegerField(default=0)),
+                ('uploads', models.IntegerField(default=0)),
+                ('video_uploads', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyUserStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('role', models.CharField(max_length=20)),
+                ('new_users', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('date', 'role')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyActivityStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('activity_type', models.CharField(max_length=50)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('date', 'activity_type')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCourseStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('new_enrollments', models.IntegerField(default=0)),
+                ('submissions', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='core.course')),
+            ],
+            options={
+                'unique_together': {('date', 'course')},
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Enrollment.completed_lectures, with total_lectures/progress backfilled from LectureProgress
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Least, NullIf, Round
+
+
+def backfill_progress(apps, schema_editor):
+    Course = apps.get_model('core', 'Course')
+    Enrollment = apps.get_model('core', 'Enrollment')
+    Lecture = apps.get_model('core', 'Lecture')
+    LectureProgress = apps.get_model('core', 'LectureProgress')
+
+    published = (
+        Lecture.objects.filter(course=OuterRef('pk'), is_published=True).order_by()
+        .values('course').annotate(n=Count('id')).values('n')
+    )
+    Course.objects.update(total_lectures=Coalesce(Subquery(published, output_field=IntegerField()), 0))
+    completed = (
+        LectureProgress.objects.filter(
+            student=OuterRef('student'), lecture__course=OuterRef('course'),
+            lecture__is_published=True, status='completed',
+        ).order_by().values('student').annotate(n=Count('id')).values('n')
+    )
+    Enrollment.objects.update(completed_lectures=Coalesce(Subquery(completed, output_field=IntegerField()), 0))
+    total = Subquery(Course.objects.filter(id=OuterRef('course_id')).values('total_lectures')[:1])
+    Enrollment.objects.update(progress_percentage=Coalesce(
+        Round(Least(Value(100.0), F('completed_lectures') * Value(100.0) / NullIf(total, Value(0))), 2),
+        Value(0.0),
+        output_field=DecimalField(max_digits=5, decimal_places=2),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_lectures',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# AssignmentSubmission.blob: submissions hold their own reference to stored content
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def move_submission_references(apps, schema_editor):
+    """Hand the reference held by each submission's Upload row to the submission.
+
+    Submitted files used to be recorded as Upload rows too, which listed them in
+    /api/uploads/ for everyone. The reference count is unchanged: the Upload row
+    is deleted (no signal fires for historical models) and the submission takes
+    over its reference.
+    """
+    AssignmentSubmission = apps.get_model('core', 'AssignmentSubmission')
+    Upload = apps.get_model('core', 'Upload')
+    for submission in AssignmentSubmission.objects.filter(blob__isnull=True).exclude(submitted_file_url__isnull=True):
+        upload = (
+            Upload.objects
+            .filter(uploaded_by_id=submission.student_id, file_url=submission.submitted_file_url, blob__isnull=False)
+            .order_by('-uploaded_at')
+            .first()
+        )
+        if upload is None:
+            continue
+        submission.blob_id = upload.blob_id
+        submission.save(update_fields=['blob'])
+        upload.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignmentsubmission',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='submissions', to='core.contentblob'),
+        ),
+        migrations.RunPython(move_submission_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# AnalyticsCacheVersion: per-teacher analytics cache version kept in the database
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_submission_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsCacheVersion',
+            fields=[
+                ('teacher', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='analytics_cache_version', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
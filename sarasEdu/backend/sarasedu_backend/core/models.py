@@ -1,4 +1,7 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
 
@@ -72,8 +75,17 @@ class Course(models.Model):
     allow_discussions = models.BooleanField(default=True)
     require_approval = models.BooleanField(default=False)
     is_published = models.BooleanField(default=False)
+    # published lectures, kept in step by the Lecture signals (core.progress)
     total_lectures = models.IntegerField(default=0)
     average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    # rating aggregates maintained by core.ratings; average_rating = rating_sum / rating_count
+    rating_count = models.IntegerField(default=0)
+    rating_sum = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    rating_count_1 = models.IntegerField(default=0)
+    rating_count_2 = models.IntegerField(default=0)
+    rating_count_3 = models.IntegerField(default=0)
+    rating_count_4 = models.IntegerField(default=0)
+    rating_count_5 = models.IntegerField(default=0)
     total_enrollments = models.IntegerField(default=0)
     revenue = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     access_level = models.CharField(max_length=20, choices=ACCESS_LEVELS, default='basic')
@@ -82,6 +94,12 @@ class Course(models.Model):
     start_date = models.DateField(blank=True, null=True)
     end_date = models.DateField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # catalog listing: ?status=&is_published= ordered by -created_at
+            models.Index(fields=['status', 'is_published', 'created_at'], name='core_course_catalog_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -129,6 +147,8 @@ class Enrollment(models.Model):
     enrollment_date = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     progress_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    # completed published lectures; progress_percentage = completed_lectures / course.total_lectures (core.progress)
+    completed_lectures = models.IntegerField(default=0)
     last_accessed = models.DateTimeField(blank=True, null=True)
     completion_date = models.DateTimeField(blank=True, null=True)
     final_grade = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)
@@ -136,6 +156,9 @@ class Enrollment(models.Model):
 
     class Meta:
         unique_together = ('student', 'course')
+        indexes = [
+            models.Index(fields=['course', 'status'], name='core_enroll_course_status_idx'),
+        ]
 
 
 class LectureProgress(models.Model):
@@ -166,6 +189,23 @@ class Assignment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # update_assignment_statuses: status='active' AND due_date < now
+            models.Index(fields=['status', 'due_date'], name='core_assign_status_due_idx'),
+        ]
+
+    @property
+    def effective_status(self):
+        """Status as of now: an 'active' assignment past its due date reads as 'overdue'.
+
+        The stored status is flipped periodically by `update_assignment_statuses`,
+        so reads derive it from due_date instead of writing on every request.
+        """
+        if self.status == 'active' and self.due_date and self.due_date < timezone.now():
+            return 'overdue'
+        return self.status
+
 
 class AssignmentSubmission(models.Model):
     STATUS = (('pending', 'Pending'), ('submitted', 'Submitted'), ('graded', 'Graded'), ('late', 'Late'), ('resubmitted', 'Resubmitted'))
@@ -180,6 +220,9 @@ class AssignmentSubmission(models.Model):
     teacher_feedback = models.TextField(blank=True, null=True)
     graded_by = models.ForeignKey('core.User', on_delete=models.SET_NULL, null=True, blank=True, related_name='graded_submissions')
     graded_at = models.DateTimeField(blank=True, null=True)
+    # stored content of an uploaded submission file; the submission holds one
+    # reference (see core.blobs), released when it is replaced or deleted
+    blob = models.ForeignKey('core.ContentBlob', on_delete=models.SET_NULL, null=True, blank=True, related_name='submissions')
 
     class Meta:
         unique_together = ('assignment', 'student')
@@ -266,6 +309,9 @@ class AttendanceRecord(models.Model):
 
     class Meta:
         unique_together = ('student', 'course', 'date')
+        indexes = [
+            models.Index(fields=['course', 'date'], name='core_attend_course_date_idx'),
+        ]
 
 
 class LibraryItem(models.Model):
@@ -290,6 +336,11 @@ class LibraryItem(models.Model):
     access_level = models.CharField(max_length=20, default='all')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['upload_date'], name='core_library_upload_date_idx'),
+        ]
+
 
 class LibraryFavorite(models.Model):
     user = models.ForeignKey('core.User', on_delete=models.CASCADE)
@@ -360,11 +411,148 @@ class Announcement(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
 
+class AnnouncementDelivery(models.Model):
+    """Outbox job delivering an announcement in-app and over email/SMS, processed by a worker.
+
+    Created by AnnouncementViewSet.create and picked up by
+    `manage.py process_announcement_deliveries`; clients poll it for progress.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+
+    announcement = models.ForeignKey(Announcement, on_delete=models.CASCADE, related_name='deliveries')
+    channels = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # not picked up before this time (announcement.scheduled_for)
+    available_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.IntegerField(default=0)
+    total_recipients = models.IntegerField(default=0)
+    sent_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='core_anndelivery_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Delivery {self.id} of announcement {self.announcement_id} ({self.status})"
+
+
+class AnnouncementDeliveryRecipient(models.Model):
+    """Per-recipient, per-channel delivery status of an AnnouncementDelivery."""
+    CHANNEL_CHOICES = (('email', 'Email'), ('sms', 'SMS'))
+    STATUS_CHOICES = (('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed'))
+
+    delivery = models.ForeignKey(AnnouncementDelivery, on_delete=models.CASCADE, related_name='recipients')
+    user = models.ForeignKey('core.User', on_delete=models.SET_NULL, null=True, blank=True)
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    address = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    error = models.TextField(blank=True, null=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        unique_together = ('delivery', 'channel', 'address')
+        indexes = [
+            models.Index(fields=['delivery', 'status'], name='core_anndelrcpt_status_idx'),
+        ]
+
+
+class ContentBlob(models.Model):
+    """One stored copy of a file's content, shared by every Upload with the same SHA-256.
+
+    Stored under a content-addressed key and deleted when the last referencing
+    Upload goes (see core.blobs).
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    storage_name = models.CharField(max_length=500)
+    ref_count = models.IntegerField(default=0)
+    # resized renditions written by the thumbnail worker (see core.thumbnails):
+    # {'<size>.<format>': {'name': <storage name>, 'width': w, 'height': h}}
+    variants = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.digest[:12]} x{self.ref_count}"
+
+
+class ThumbnailJob(models.Model):
+    """Queued thumbnail/preview generation for one stored file, processed by a worker.
+
+    Created when an image or PDF is first stored (core.blobs.ingest) and picked
+    up by `manage.py process_thumbnails`.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed'),
+    )
+
+    blob = models.OneToOneField(ContentBlob, on_delete=models.CASCADE, related_name='thumbnail_job')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='core_thumbjob_status_idx'),
+        ]
+
+
 class Upload(models.Model):
     file_name = models.CharField(max_length=255)
     file_url = models.TextField()
     uploaded_by = models.ForeignKey('core.User', on_delete=models.SET_NULL, null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    size = models.BigIntegerField(blank=True, null=True)
+    # hex SHA-256 of the content; null for uploads made before content addressing
+    digest = models.CharField(max_length=64, blank=True, null=True, db_index=True)
+    blob = models.ForeignKey(ContentBlob, on_delete=models.SET_NULL, null=True, blank=True, related_name='uploads')
+
+
+class UploadSession(models.Model):
+    """A resumable chunked upload in progress (see core.uploads).
+
+    `received` is the last acknowledged byte offset; chunks are appended to
+    `storage_name` in the storage backend (an S3 multipart upload when
+    `s3_upload_id` is set) and the `Upload` row is created on finalize.
+    """
+    STATUS = (('uploading', 'Uploading'), ('complete', 'Complete'), ('aborted', 'Aborted'))
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    uploaded_by = models.ForeignKey('core.User', on_delete=models.CASCADE, related_name='upload_sessions')
+    file_name = models.CharField(max_length=255)
+    storage_name = models.CharField(max_length=500)
+    content_type = models.CharField(max_length=100, blank=True, null=True)
+    size = models.BigIntegerField()
+    chunk_size = models.IntegerField()
+    received = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS, default='uploading')
+    s3_upload_id = models.CharField(max_length=1024, blank=True, null=True)
+    # S3 multipart parts acknowledged so far: [{'PartNumber': n, 'ETag': '...'}]
+    parts = models.JSONField(default=list, blank=True)
+    upload = models.OneToOneField(Upload, on_delete=models.SET_NULL, null=True, blank=True, related_name='session')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.file_name} ({self.received}/{self.size})"
 
 
 class UserSettings(models.Model):
@@ -444,6 +632,9 @@ class ActivityLog(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='core_activity_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.activity_type})"
@@ -516,6 +707,10 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # NotificationViewSet: user [+ read] ordered by -created_at
+            models.Index(fields=['user', 'read', 'created_at'], name='core_notif_user_read_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.user.username}"
@@ -536,3 +731,68 @@ class CourseRating(models.Model):
     
     def __str__(self):
         return f"{self.student.username} rated {self.course.title}: {self.rating}"
+
+
+class RollupWatermark(models.Model):
+    """Highest source row id already folded into the daily rollups, per source.
+
+    Maintained by `manage.py update_daily_rollups` (see core.rollups).
+    """
+    source = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} @ {self.last_id}"
+
+
+class AnalyticsCacheVersion(models.Model):
+    """Version of a teacher's cached analytics report (see core.analytics).
+
+    Kept in the database so that every process, whatever its cache backend,
+    stops serving a report as soon as one of them records a write.
+    """
+    teacher = models.OneToOneField('core.User', on_delete=models.CASCADE, primary_key=True, related_name='analytics_cache_version')
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"analytics of {self.teacher_id} v{self.version}"
+
+
+class DailyUserStat(models.Model):
+    """Users registered per day and role."""
+    date = models.DateField()
+    role = models.CharField(max_length=20)
+    new_users = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('date', 'role')
+
+
+class DailyCourseStat(models.Model):
+    """New enrollments and assignment/test submissions per day and course."""
+    date = models.DateField()
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_stats')
+    new_enrollments = models.IntegerField(default=0)
+    submissions = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('date', 'course')
+
+
+class DailyContentStat(models.Model):
+    """Library downloads and file uploads per day."""
+    date = models.DateField(unique=True)
+    downloads = models.IntegerField(default=0)
+    uploads = models.IntegerField(default=0)
+    video_uploads = models.IntegerField(default=0)
+
+
+class DailyActivityStat(models.Model):
+    """ActivityLog entries per day and activity_type."""
+    date = models.DateField()
+    activity_type = models.CharField(max_length=50)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('date', 'activity_type')
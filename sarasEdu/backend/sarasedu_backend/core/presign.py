@@ -0,0 +1,200 @@
+"""
+Direct-to-bucket uploads with presigned URLs (USE_S3=1 only).
+
+Instead of streaming the file through a Django worker, the client asks
+`POST /api/uploads/presign/` for a presigned POST (or PUT) to
+AWS_STORAGE_BUCKET_NAME, sends the bytes straight to S3/MinIO and then calls
+`POST /api/uploads/presign/complete/` with the returned token. The completion
+callback HEADs the object, checks its size and type, and only then creates the
+`Upload` row, or only the `AssignmentSubmission` when the upload was requested
+for an assignment.
+
+URLs are signed for MINIO_PUBLIC_ENDPOINT when it is set, because the browser
+cannot reach the internal endpoint the storage backend uses. The token is a
+signed blob naming the key, uploader and declared size/type, so a client can
+only complete objects it was issued a URL for.
+"""
+import mimetypes
+import os
+import uuid
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.text import get_valid_filename
+
+from . import blobs, uploads
+from .models import Assignment, AssignmentSubmission, Enrollment, Upload
+
+
+TOKEN_SALT = 'core.presign'
+
+
+def expires_in():
+    return getattr(settings, 'PRESIGNED_UPLOAD_EXPIRES_SECONDS', 3600)
+
+
+def max_direct_upload_mb():
+    return getattr(settings, 'MAX_DIRECT_UPLOAD_MB', uploads.max_chunked_upload_mb())
+
+
+def _signing_client():
+    """boto3 client whose presigned URLs point at the publicly reachable endpoint."""
+    endpoint = getattr(settings, 'MINIO_PUBLIC_ENDPOINT', None) or getattr(settings, 'AWS_S3_ENDPOINT_URL', None)
+    return boto3.client(
+        's3',
+        endpoint_url=endpoint,
+        aws_access_key_id=getattr(settings, 'AWS_ACCESS_KEY_ID', None),
+        aws_secret_access_key=getattr(settings, 'AWS_SECRET_ACCESS_KEY', None),
+        region_name=getattr(settings, 'AWS_S3_REGION_NAME', None) or None,
+        config=Config(
+            signature_version=getattr(settings, 'AWS_S3_SIGNATURE_VERSION', None) or 's3v4',
+            # MinIO serves buckets by path, not by virtual host
+            s3={'addressing_style': 'path' if endpoint else 'auto'},
+        ),
+    )
+
+
+def issue(user, file_name, size, content_type=None, method='POST', assignment=None):
+    """Presigned upload of one object for `user`; returns the dict sent to the client.
+
+    Raises uploads.UploadError for invalid requests.
+    """
+    if not uploads.uses_s3():
+        raise uploads.UploadError('Direct uploads require USE_S3=1.', status_code=404)
+    method = (method or 'POST').upper()
+    if method not in ('POST', 'PUT'):
+        raise uploads.UploadError('method must be POST or PUT.')
+    safe_name = get_valid_filename(os.path.basename(file_name or '')) if file_name else ''
+    if not safe_name:
+        raise uploads.UploadError('file_name is required.')
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise uploads.UploadError('size must be an integer.')
+    max_mb = max_direct_upload_mb()
+    if size <= 0 or size > max_mb * 1024 * 1024:
+        raise uploads.UploadError(f'size must be between 1 byte and {max_mb} MB.')
+    # nothing to sniff yet: trust the declared type, else the extension; the
+    # object's stored type is pinned to it and checked again on completion
+    content_type = content_type or mimetypes.guess_type(safe_name)[0] or 'application/octet-stream'
+    types = uploads.allowed_types()
+    if types and content_type not in types:
+        raise uploads.UploadError(f'Invalid file type: {content_type}')
+
+    prefix = 'assignment_submissions' if assignment is not None else 'uploads'
+    name = f'{prefix}/{uuid.uuid4().hex}_{safe_name}'
+    key = uploads.s3_key(name)
+    bucket = default_storage.bucket_name
+    client = _signing_client()
+    if method == 'POST':
+        # the policy pins the exact size and type, so S3 itself rejects anything else
+        presigned = client.generate_presigned_post(
+            bucket, key,
+            Fields={'Content-Type': content_type},
+            Conditions=[{'Content-Type': content_type}, ['content-length-range', size, size]],
+            ExpiresIn=expires_in(),
+        )
+        data = {'method': 'POST', 'url': presigned['url'], 'fields': presigned['fields']}
+    else:
+        url = client.generate_presigned_url(
+            'put_object', Params={'Bucket': bucket, 'Key': key, 'ContentType': content_type},
+            ExpiresIn=expires_in(),
+        )
+        data = {'method': 'PUT', 'url': url, 'headers': {'Content-Type': content_type}}
+
+    data['token'] = signing.dumps({
+        'name': name, 'user': user.id, 'file_name': safe_name, 'size': size, 'type': content_type,
+        'assignment': assignment.id if assignment is not None else None,
+    }, salt=TOKEN_SALT)
+    data['expires_in'] = expires_in()
+    return data
+
+
+def complete(user, token, submission_text=''):
+    """Verify the uploaded object with a HEAD and record it.
+
+    Returns `(upload, submission, created)`: `submission` is None for plain
+    uploads and `upload` is None for assignment submissions. Completing the
+    same token twice returns the existing rows.
+    """
+    try:
+        claims = signing.loads(token or '', salt=TOKEN_SALT, max_age=expires_in() * 2)
+    except signing.BadSignature:
+        raise uploads.UploadError('Invalid or expired upload token.')
+    if claims['user'] != user.id:
+        raise uploads.UploadError('Invalid or expired upload token.')
+
+    name = claims['name']
+    try:
+        head = uploads.s3_client().head_object(Bucket=default_storage.bucket_name, Key=uploads.s3_key(name))
+    except ClientError:
+        raise uploads.UploadError('Uploaded object not found.', status_code=409)
+    if head.get('ContentLength') != claims['size'] or head.get('ContentType') != claims['type']:
+        default_storage.delete(name)
+        raise uploads.UploadError('Uploaded object does not match the requested size and type.')
+
+    url = default_storage.url(name)
+    if claims['assignment'] is not None:
+        return (None,) + _record_submission(user, claims['assignment'], name, url, submission_text)
+    with transaction.atomic():
+        # the key embeds a fresh uuid, and the stored URL may carry a signed query string
+        upload = Upload.objects.filter(uploaded_by=user, file_url__contains=name).first()
+        created = upload is None
+        if created:
+            # the bytes never reach a worker, so there is no digest to dedupe on
+            upload = Upload.objects.create(
+                file_name=claims['file_name'], file_url=url, uploaded_by=user, size=head['ContentLength'],
+            )
+    return upload, None, created
+
+
+def _record_submission(user, assignment_id, name, url, submission_text):
+    """Point the student's submission at the uploaded object; returns `(submission, created)`.
+
+    Submitted files get no Upload row: uploads are listed to every student.
+    The submission's previous stored content, if any, loses its reference.
+    """
+    replaced_blob_id = None
+    with transaction.atomic():
+        submission = (
+            AssignmentSubmission.objects.select_for_update()
+            .filter(assignment_id=assignment_id, student=user).first()
+        )
+        created = submission is None
+        if created:
+            submission = AssignmentSubmission(assignment_id=assignment_id, student=user)
+        elif name in (submission.submitted_file_url or ''):
+            # same token completed again
+            return submission, False
+        else:
+            replaced_blob_id = submission.blob_id
+        submission.submitted_file_url = url
+        submission.blob = None
+        submission.status = 'submitted'
+        if submission_text:
+            submission.submission_text = submission_text
+        submission.save()
+    if replaced_blob_id:
+        blobs.release(replaced_blob_id)
+    return submission, created
+
+
+def assignment_for(user, assignment_id):
+    """The assignment a student may submit to, or raise uploads.UploadError."""
+    if getattr(user, 'role', None) != 'student':
+        raise uploads.UploadError('Only students may create submissions.', status_code=403)
+    try:
+        assignment_id = int(assignment_id)
+    except (TypeError, ValueError):
+        raise uploads.UploadError('assignment must be an integer id.')
+    assignment = Assignment.objects.filter(id=assignment_id).first()
+    if assignment is None:
+        raise uploads.UploadError('assignment not found.', status_code=404)
+    if not Enrollment.objects.filter(student=user, course_id=assignment.course_id).exists():
+        raise uploads.UploadError('You are not enrolled in this course.', status_code=403)
+    return assignment
@@ -0,0 +1,94 @@
+"""
+Course completion progress derived from LectureProgress.
+
+`Course.total_lectures` counts published lectures and `Enrollment.completed_lectures`
+the published lectures a student has completed; `progress_percentage` is
+their ratio. Completing (or un-completing) a lecture bumps one enrollment
+with `F()` and re-derives its percentage, so nothing re-counts progress rows
+on the hot path. Publishing, unpublishing or deleting a lecture changes the
+denominator and recomputes the course's enrollments in set-based UPDATEs, as
+does `rebuild_course_progress` for everything.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Least, NullIf, Round
+
+from .analytics import invalidate_teacher_analytics
+from .models import Course, Enrollment, Lecture, LectureProgress
+
+
+def _percentage(total):
+    """min(100, completed_lectures * 100 / total) rounded to 2 places; 0 when total is 0."""
+    return Coalesce(
+        Round(Least(Value(100.0), F('completed_lectures') * Value(100.0) / NullIf(total, Value(0))), 2),
+        Value(0.0),
+        output_field=DecimalField(max_digits=5, decimal_places=2),
+    )
+
+
+def apply_completions(deltas):
+    """Apply `{(student_id, lecture_id): +1/-1}` completion changes to the enrollments.
+
+    Lectures that are not published do not count. One UPDATE pair per
+    affected enrollment (the percentage is a separate statement, as in
+    core.ratings, so MySQL does not see the already-bumped counter twice).
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    published = dict(
+        Lecture.objects.filter(id__in={lecture_id for _, lecture_id in deltas}, is_published=True)
+        .values_list('id', 'course_id')
+    )
+    per_enrollment = Counter()
+    for (student_id, lecture_id), delta in deltas.items():
+        if lecture_id in published:
+            per_enrollment[(student_id, published[lecture_id])] += delta
+    totals = dict(
+        Course.objects.filter(id__in={course_id for _, course_id in per_enrollment})
+        .values_list('id', 'total_lectures')
+    )
+    with transaction.atomic():
+        for (student_id, course_id), delta in per_enrollment.items():
+            if not delta:
+                continue
+            qs = Enrollment.objects.filter(student_id=student_id, course_id=course_id)
+            qs.update(completed_lectures=F('completed_lectures') + delta)
+            qs.update(progress_percentage=_percentage(Value(totals.get(course_id, 0))))
+        invalidate_teacher_analytics(id__in=totals.keys())
+
+
+def _published_count():
+    return Subquery(
+        Lecture.objects.filter(course=OuterRef('pk'), is_published=True).order_by()
+        .values('course').annotate(n=Count('id')).values('n'),
+        output_field=IntegerField(),
+    )
+
+
+def rebuild(course_ids=None):
+    """Recompute total_lectures, completed_lectures and progress_percentage set-based.
+
+    Three UPDATE statements regardless of the number of courses or
+    enrollments; `course_ids=None` rebuilds every course.
+    """
+    courses = Course.objects.all()
+    enrollments = Enrollment.objects.all()
+    if course_ids is not None:
+        courses = courses.filter(id__in=course_ids)
+        enrollments = enrollments.filter(course_id__in=course_ids)
+
+    completed = Subquery(
+        LectureProgress.objects.filter(
+            student=OuterRef('student'), lecture__course=OuterRef('course'),
+            lecture__is_published=True, status='completed',
+        ).order_by().values('student').annotate(n=Count('id')).values('n'),
+        output_field=IntegerField(),
+    )
+    total = Subquery(Course.objects.filter(id=OuterRef('course_id')).values('total_lectures')[:1])
+    with transaction.atomic():
+        courses.update(total_lectures=Coalesce(_published_count(), 0))
+        enrollments.update(completed_lectures=Coalesce(completed, 0))
+        return enrollments.update(progress_percentage=_percentage(total))
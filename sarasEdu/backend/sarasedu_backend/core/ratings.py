@@ -0,0 +1,104 @@
+"""
+Denormalized course rating aggregates.
+
+`Course` stores the number of ratings, their sum and a 1-5 star histogram;
+adding a rating bumps them with `F()` expressions and re-derives
+`average_rating` from sum / count, so neither the write nor catalog reads ever
+scan `core_courserating`. `rebuild_course_ratings` recomputes everything from
+the ratings table.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Round
+
+from .models import Course, CourseRating
+
+
+STARS = (1, 2, 3, 4, 5)
+
+
+def star_bucket(rating):
+    """Histogram bucket of a 0.0-5.0 rating: rounded half up, clamped to 1-5 stars."""
+    return min(5, max(1, int(Decimal(str(rating)) + Decimal('0.5'))))
+
+
+def star_field(star):
+    return f'rating_count_{star}'
+
+
+def _star_filter(star):
+    """ORM filter on `rating` matching star_bucket() == star."""
+    q = Q()
+    if star > 1:
+        q &= Q(rating__gte=Decimal(star) - Decimal('0.5'))
+    if star < 5:
+        q &= Q(rating__lt=Decimal(star) + Decimal('0.5'))
+    return q
+
+
+def _average_expression():
+    # cast so SQLite does not fall back to integer division on whole sums
+    return Case(
+        When(rating_count__gt=0, then=Round(Cast('rating_sum', FloatField()) / F('rating_count'), 2)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def apply_rating(course_id, rating):
+    """Fold one new rating into its course's counters in O(1).
+
+    The counter update and the average are separate statements: MySQL would
+    otherwise evaluate the average against the already-incremented columns.
+    """
+    rating = Decimal(str(rating))
+    with transaction.atomic():
+        qs = Course.objects.filter(id=course_id)
+        qs.update(**{
+            'rating_count': F('rating_count') + 1,
+            'rating_sum': F('rating_sum') + rating,
+            star_field(star_bucket(rating)): F(star_field(star_bucket(rating))) + 1,
+        })
+        qs.update(average_rating=_average_expression())
+
+
+def rating_histogram(course):
+    """{'1': n, ..., '5': n} from the stored counters."""
+    return {str(star): getattr(course, star_field(star)) for star in STARS}
+
+
+def rebuild_ratings(courses):
+    """Recompute the rating counters of `courses` with one grouped aggregate.
+
+    Returns the number of courses whose stored values changed.
+    """
+    aggregates = {
+        'count': Count('id'),
+        'total': Sum('rating'),
+        **{f's{star}': Count('id', filter=_star_filter(star)) for star in STARS},
+    }
+    rows = {
+        row['course_id']: row
+        for row in CourseRating.objects.filter(course__in=courses).order_by()
+        .values('course_id').annotate(**aggregates)
+    }
+    fields = ['rating_count', 'rating_sum', 'average_rating'] + [star_field(star) for star in STARS]
+    changed = []
+    for course in courses.only('id', *fields):
+        row = rows.get(course.id, {})
+        values = {
+            'rating_count': row.get('count', 0),
+            'rating_sum': Decimal(str(row.get('total') or 0)),
+            **{star_field(star): row.get(f's{star}', 0) for star in STARS},
+        }
+        count = values['rating_count']
+        values['average_rating'] = round(values['rating_sum'] / count, 2) if count else Decimal('0')
+        if any(getattr(course, name) != value for name, value in values.items()):
+            for name, value in values.items():
+                setattr(course, name, value)
+            changed.append(course)
+    if changed:
+        Course.objects.bulk_update(changed, fields, batch_size=500)
+    return len(changed)
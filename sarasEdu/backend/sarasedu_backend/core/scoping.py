@@ -0,0 +1,136 @@
+"""
+Role-based queryset scoping for the REST viewsets.
+
+`BaseModelViewSet.get_queryset` restricts what a teacher or student can see by
+filtering on an owner-like field (instructor, created_by, student, ...). Which
+field applies only depends on the model and the user's role, so the rules are
+compiled once at startup (see `CoreConfig.ready`) into a table keyed by
+`(model, role)`. The request path is then a dict lookup plus one `.filter()`.
+"""
+from django.apps import apps
+
+
+class ScopeRule:
+    """Compiled scoping rule for one (model, role) pair.
+
+    - `lookup`: ORM lookup that must equal the requesting user, or None when the
+      role sees the whole queryset.
+    - `has_course`: whether the model has a `course` field, in which case a
+      `?course=<id>` query param takes precedence over the owner filter.
+    """
+    __slots__ = ('lookup', 'has_course')
+
+    def __init__(self, lookup=None, has_course=False):
+        self.lookup = lookup
+        self.has_course = has_course
+
+    def apply(self, qs, user):
+        if self.lookup is None:
+            return qs
+        return qs.filter(**{self.lookup: user})
+
+    def __repr__(self):
+        return f'ScopeRule(lookup={self.lookup!r}, has_course={self.has_course!r})'
+
+
+# (model class, role) -> ScopeRule
+_RULES = {}
+
+
+def _owner_lookup(model, role, field_names):
+    """Resolve the owner lookup for a model/role, or None for no filtering.
+
+    The order of the checks matters: model-specific rules come first, then the
+    generic owner fields, mirroring how the viewsets have always scoped data.
+    """
+    model_name = model.__name__.lower()
+
+    if model_name == 'enrollment':
+        if role == 'teacher':
+            return 'course__instructor'
+        if role == 'student':
+            return 'student'
+
+    if model_name == 'lectureprogress':
+        if role == 'teacher':
+            return 'lecture__course__instructor'
+        if role == 'student':
+            return 'student'
+
+    # students may view lectures of any course (usually narrowed by ?course=)
+    if model_name == 'lecture' and role == 'teacher':
+        return 'course__instructor'
+
+    if model_name in ('assignmentsubmission', 'testsubmission'):
+        if role == 'student':
+            return 'student'
+        if role == 'teacher':
+            if 'assignment' in field_names:
+                return 'assignment__course__instructor'
+            if 'test' in field_names:
+                return 'test__course__instructor'
+
+    # library items and other uploads: teachers see their own, students see all
+    if 'uploaded_by' in field_names:
+        if role == 'teacher':
+            return 'uploaded_by'
+        if role == 'student':
+            return None
+
+    if model_name == 'event' and role == 'teacher':
+        if 'instructor' in field_names:
+            return 'instructor'
+        if 'created_by' in field_names:
+            return 'created_by'
+
+    if model_name == 'course' and role == 'teacher' and 'instructor' in field_names:
+        return 'instructor'
+
+    # tests / assignments / announcements etc.: items the teacher owns
+    if role == 'teacher':
+        for name in ('created_by', 'instructor', 'uploaded_by'):
+            if name in field_names:
+                return name
+
+    if role == 'student' and 'student' in field_names:
+        return 'student'
+
+    # profiles, favorites, settings: rows belonging to the requesting user
+    if 'user' in field_names:
+        return 'user'
+
+    return None
+
+
+def build_rule(model, role):
+    """Compute the ScopeRule for a model and (non-admin) role."""
+    field_names = {f.name for f in model._meta.get_fields()}
+    return ScopeRule(
+        lookup=_owner_lookup(model, role, field_names),
+        has_course='course' in field_names,
+    )
+
+
+def scoped_roles():
+    """Roles that are subject to scoping (admins always see everything)."""
+    User = apps.get_model('core', 'User')
+    return [value for value, _label in User.ROLE_CHOICES if value != 'admin']
+
+
+def compile_rules(models=None):
+    """Populate the rule table for every core model and scoped role."""
+    if models is None:
+        models = apps.get_app_config('core').get_models()
+    roles = scoped_roles()
+    for model in models:
+        for role in roles:
+            _RULES[(model, role)] = build_rule(model, role)
+    return _RULES
+
+
+def get_rule(model, role):
+    """Return the compiled rule, building it on first use for unknown pairs."""
+    rule = _RULES.get((model, role))
+    if rule is None:
+        rule = _RULES[(model, role)] = build_rule(model, role)
+    return rule
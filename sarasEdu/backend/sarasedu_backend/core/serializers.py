@@ -5,11 +5,13 @@ from .models import (
     LiveClass,
     Enrollment, LectureProgress, Assignment, AssignmentSubmission, AssignmentAttachment,
     Test, Question, TestSubmission, TestAnswer, AttendanceRecord,
-    LibraryItem, LibraryFavorite, LibraryDownload, Event, Announcement, Upload,
+    LibraryItem, LibraryFavorite, LibraryDownload, Event, Announcement, AnnouncementDelivery, AnnouncementDeliveryRecipient, Upload,
     StudentProfile, TeacherProfile, AdminProfile, UserSettings, ActivityLog, SystemAlert, Notification, CourseRating
 )
 from django.contrib.auth.password_validation import validate_password
 from django.db.models import Avg
+from .ratings import rating_histogram
+from . import thumbnails
 
 User = get_user_model()
 
@@ -72,10 +74,18 @@ class AdminProfileSerializer(serializers.ModelSerializer):
 
 class CourseSerializer(serializers.ModelSerializer):
     instructor = UserSerializer(read_only=True)
+    rating_histogram = serializers.SerializerMethodField()
 
     class Meta:
         model = Course
         fields = '__all__'
+        read_only_fields = (
+            'total_lectures', 'average_rating', 'rating_count', 'rating_sum',
+            'rating_count_1', 'rating_count_2', 'rating_count_3', 'rating_count_4', 'rating_count_5',
+        )
+
+    def get_rating_histogram(self, obj):
+        return rating_histogram(obj)
 
 
 class LectureSerializer(serializers.ModelSerializer):
@@ -100,6 +110,7 @@ class EnrollmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Enrollment
         fields = '__all__'
+        read_only_fields = ('completed_lectures',)
 
 
 class LectureProgressSerializer(serializers.ModelSerializer):
@@ -115,12 +126,20 @@ class AssignmentSerializer(serializers.ModelSerializer):
         model = Assignment
         fields = '__all__'
 
+    def to_representation(self, instance):
+        ret = super().to_representation(instance)
+        # report 'overdue' as soon as due_date passes, even before the periodic
+        # status update has flipped the stored value
+        ret['status'] = instance.effective_status
+        return ret
+
 
 class AssignmentSubmissionSerializer(serializers.ModelSerializer):
     student = UserSerializer(read_only=True)
     class Meta:
         model = AssignmentSubmission
         fields = '__all__'
+        read_only_fields = ('blob',)
 
 
 class AssignmentAttachmentSerializer(serializers.ModelSerializer):
@@ -137,35 +156,34 @@ class TestSerializer(serializers.ModelSerializer):
         model = Test
         fields = '__all__'
 
+    def _average_marks(self, obj):
+        # TestViewSet annotates `avg_marks_obtained` with one grouped query over
+        # core_testsubmission; fall back to a per-test aggregate otherwise
+        # (e.g. freshly created instances).
+        if hasattr(obj, 'avg_marks_obtained'):
+            return obj.avg_marks_obtained
+        agg = TestSubmission.objects.filter(test=obj).aggregate(avg=Avg('marks_obtained'))
+        return agg.get('avg')
+
     def get_average_marks(self, obj):
         try:
-            agg = TestSubmission.objects.filter(test=obj).aggregate(avg=Avg('marks_obtained'))
-            return agg.get('avg') or 0.0
+            return self._average_marks(obj) or 0.0
         except Exception:
             return 0.0
 
     def get_average_percentage(self, obj):
         try:
-            # If total_marks is available, compute average percentage across submissions
+            avg = self._average_marks(obj)
+            # If total_marks is available, express the average as a percentage
             total = obj.total_marks
             if not total or float(total) == 0:
                 # fallback to average raw marks when total not set
-                return self.get_average_marks(obj)
-            # compute each submission's percentage then average
-            subs = TestSubmission.objects.filter(test=obj).exclude(marks_obtained__isnull=True)
-            if not subs.exists():
+                return avg or 0.0
+            if avg is None:
                 return 0.0
-            # sum percentages and divide
-            total_pct = 0.0
-            count = 0
-            for s in subs:
-                try:
-                    pct = (float(s.marks_obtained) / float(total)) * 100
-                except Exception:
-                    pct = 0.0
-                total_pct += pct
-                count += 1
-            return round(total_pct / count, 2) if count else 0.0
+            # mean of per-submission percentages == mean marks / total, as
+            # total_marks is the same for every submission of a test
+            return round((float(avg) / float(total)) * 100, 2)
         except Exception:
             return 0.0
 
@@ -194,6 +212,15 @@ class AttendanceRecordSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class LibraryItemListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # look up the thumbnails of the whole page in one query
+        items = data.all() if hasattr(data, 'all') else data
+        urls = [u for item in items for u in (item.thumbnail_url, item.file_url)]
+        self.context['library_variants'] = thumbnails.variants_by_digest(urls)
+        return super().to_representation(items)
+
+
 class LibraryItemSerializer(serializers.ModelSerializer):
     uploaded_by = UserSerializer(read_only=True)
     # Accept `course_id` on write and include `course_id` on read so clients
@@ -201,9 +228,24 @@ class LibraryItemSerializer(serializers.ModelSerializer):
     course_id = serializers.IntegerField(required=False, allow_null=True)
     tags = serializers.ListField(child=serializers.CharField(), required=False, allow_null=True)
 
+    variants = serializers.SerializerMethodField()
+
     class Meta:
         model = LibraryItem
         fields = '__all__'
+        list_serializer_class = LibraryItemListSerializer
+
+    def get_variants(self, obj):
+        # prefer a dedicated cover image, else previews of the item itself
+        urls = (obj.thumbnail_url, obj.file_url)
+        known = self.context.get('library_variants')
+        if known is None:
+            known = thumbnails.variants_by_digest(urls)
+        for url in urls:
+            variants = known.get(thumbnails.digest_from_url(url))
+            if variants:
+                return thumbnails.variant_urls(variants)
+        return {}
 
     def _normalize_tags(self, value):
         # Accept list or comma-separated string
@@ -249,7 +291,8 @@ class LibraryItemSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         ret = super().to_representation(instance)
         try:
-            ret['course_id'] = instance.course.id if getattr(instance, 'course', None) else None
+            # read the FK column directly so listing items doesn't fetch each course
+            ret['course_id'] = instance.course_id
         except Exception:
             ret['course_id'] = None
         # ensure tags is always a list for frontend convenience
@@ -290,14 +333,32 @@ class AnnouncementSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class AnnouncementDeliverySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AnnouncementDelivery
+        fields = '__all__'
+
+
+class AnnouncementDeliveryRecipientSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AnnouncementDeliveryRecipient
+        fields = ['id', 'user', 'channel', 'address', 'status', 'error', 'sent_at']
+
+
 class UploadSerializer(serializers.ModelSerializer):
     # Provide a `url` alias for compatibility with clients that expect `url`
     # while the model stores `file_url`.
     url = serializers.CharField(source='file_url', read_only=True)
+    # resized renditions of image/PDF uploads, once the thumbnail worker has run
+    variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Upload
         fields = '__all__'
 
+    def get_variants(self, obj):
+        return thumbnails.variant_urls(obj.blob.variants) if obj.blob_id else {}
+
 
 class PasswordResetRequestSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -1,9 +1,15 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models import F
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
-from .models import StudentProfile, TeacherProfile, AdminProfile, UserSettings, Enrollment, Assignment
+from .models import (
+    StudentProfile, TeacherProfile, AdminProfile, UserSettings, Course, Enrollment, Assignment,
+    AssignmentSubmission, TestSubmission, Lecture, LectureProgress, Upload,
+)
+from .analytics import invalidate_teacher_analytics
+from . import blobs, progress
 
 User = get_user_model()
 
@@ -40,15 +46,35 @@ def create_user_settings(sender, instance, created, **kwargs):
                 pass
 
 
+def _bump_total_enrollments(course_id, delta):
+    """Atomically add `delta` to a course's total_enrollments (no COUNT(*) over its enrollments)."""
+    if course_id is None:
+        return
+    Course.objects.filter(id=course_id).update(total_enrollments=F('total_enrollments') + delta)
+
+
+@receiver(post_init, sender=Enrollment)
+def remember_enrollment_course(sender, instance, **kwargs):
+    """Remember the loaded course so a save can tell whether membership changed."""
+    instance._loaded_course_id = instance.course_id
+
+
 @receiver(post_save, sender=Enrollment)
 def update_course_enrollments_on_create(sender, instance, created, **kwargs):
-    """Update total_enrollments count when an enrollment is created or updated."""
+    """Keep total_enrollments in step with enrollment membership.
+
+    Only a new enrollment (or one moved to another course) changes the count;
+    progress/status saves skip the update entirely. `update_total_enrollments`
+    reconciles the counters if they ever drift.
+    """
     try:
-        course = instance.course
-        enrollment_count = Enrollment.objects.filter(course=course).count()
-        if course.total_enrollments != enrollment_count:
-            course.total_enrollments = enrollment_count
-            course.save(update_fields=['total_enrollments'])
+        previous_course_id = getattr(instance, '_loaded_course_id', None)
+        if created:
+            _bump_total_enrollments(instance.course_id, 1)
+        elif previous_course_id is not None and previous_course_id != instance.course_id:
+            _bump_total_enrollments(previous_course_id, -1)
+            _bump_total_enrollments(instance.course_id, 1)
+        instance._loaded_course_id = instance.course_id
     except Exception:
         try:
             print(f'Failed to update total_enrollments for course {instance.course_id}')
@@ -58,13 +84,9 @@ def update_course_enrollments_on_create(sender, instance, created, **kwargs):
 
 @receiver(post_delete, sender=Enrollment)
 def update_course_enrollments_on_delete(sender, instance, **kwargs):
-    """Update total_enrollments count when an enrollment is deleted."""
+    """Decrement total_enrollments when an enrollment is deleted."""
     try:
-        course = instance.course
-        enrollment_count = Enrollment.objects.filter(course=course).count()
-        if course.total_enrollments != enrollment_count:
-            course.total_enrollments = enrollment_count
-            course.save(update_fields=['total_enrollments'])
+        _bump_total_enrollments(instance.course_id, -1)
     except Exception:
         try:
             print(f'Failed to update total_enrollments for course {instance.course_id}')
@@ -87,3 +109,125 @@ def update_assignment_status_on_save(sender, instance, **kwargs):
             print(f'Failed to update status for assignment {instance.id}')
         except Exception:
             pass
+
+
+def _course_lookup(instance):
+    """Filter matching the course an enrollment/submission belongs to."""
+    if isinstance(instance, Enrollment):
+        return {'id': instance.course_id}
+    if isinstance(instance, AssignmentSubmission):
+        return {'assignments': instance.assignment_id}
+    return {'tests': instance.test_id}
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+@receiver(post_save, sender=AssignmentSubmission)
+@receiver(post_delete, sender=AssignmentSubmission)
+@receiver(post_save, sender=TestSubmission)
+@receiver(post_delete, sender=TestSubmission)
+def invalidate_teacher_analytics_cache(sender, instance, **kwargs):
+    """Drop the cached analytics of the instructor whose course data changed."""
+    try:
+        invalidate_teacher_analytics(**_course_lookup(instance))
+    except Exception:
+        try:
+            print(f'Failed to invalidate teacher analytics for {sender.__name__} {instance.pk}')
+        except Exception:
+            pass
+
+
+@receiver(post_init, sender=Lecture)
+def remember_lecture_publication(sender, instance, **kwargs):
+    instance._loaded_publication = (instance.course_id, instance.is_published)
+
+
+@receiver(post_save, sender=Lecture)
+def update_course_lectures_on_save(sender, instance, created, **kwargs):
+    """Recount a course's published lectures (and its enrollments' progress) when that set changes."""
+    try:
+        previous = None if created else getattr(instance, '_loaded_publication', None)
+        current = (instance.course_id, instance.is_published)
+        if previous != current:
+            affected = {course_id for course_id, published in filter(None, (previous, current)) if published}
+            if affected:
+                progress.rebuild(affected)
+        instance._loaded_publication = current
+    except Exception:
+        try:
+            print(f'Failed to update total_lectures for course {instance.course_id}')
+        except Exception:
+            pass
+
+
+@receiver(post_delete, sender=Lecture)
+def update_course_lectures_on_delete(sender, instance, **kwargs):
+    try:
+        if instance.is_published:
+            progress.rebuild([instance.course_id])
+    except Exception:
+        try:
+            print(f'Failed to update total_lectures for course {instance.course_id}')
+        except Exception:
+            pass
+
+
+@receiver(post_init, sender=LectureProgress)
+def remember_progress_status(sender, instance, **kwargs):
+    instance._loaded_completed = instance.status == 'completed' if instance.pk else False
+
+
+@receiver(post_save, sender=LectureProgress)
+def update_enrollment_progress_on_save(sender, instance, created, **kwargs):
+    """Move the enrollment's completed count by one when a lecture becomes (un)completed."""
+    try:
+        completed = instance.status == 'completed'
+        was_completed = getattr(instance, '_loaded_completed', False)
+        if completed != was_completed:
+            progress.apply_completions({(instance.student_id, instance.lecture_id): 1 if completed else -1})
+        instance._loaded_completed = completed
+    except Exception:
+        try:
+            print(f'Failed to update enrollment progress for lecture progress {instance.id}')
+        except Exception:
+            pass
+
+
+@receiver(post_delete, sender=LectureProgress)
+def update_enrollment_progress_on_delete(sender, instance, **kwargs):
+    try:
+        if instance.status == 'completed':
+            progress.apply_completions({(instance.student_id, instance.lecture_id): -1})
+    except Exception:
+        try:
+            print(f'Failed to update enrollment progress for lecture progress {instance.id}')
+        except Exception:
+            pass
+
+
+@receiver(post_delete, sender=Upload)
+def release_upload_content(sender, instance, **kwargs):
+    # the stored object is shared by every upload of the same content
+    if not instance.blob_id:
+        return
+    try:
+        blobs.release(instance.blob_id)
+    except Exception:
+        try:
+            print(f'Failed to release stored content of upload {instance.id}')
+        except Exception:
+            pass
+
+
+@receiver(post_delete, sender=AssignmentSubmission)
+def release_submission_content(sender, instance, **kwargs):
+    # submissions hold their own reference to the submitted file's content
+    if not instance.blob_id:
+        return
+    try:
+        blobs.release(instance.blob_id)
+    except Exception:
+        try:
+            print(f'Failed to release stored content of submission {instance.id}')
+        except Exception:
+            pass
@@ -0,0 +1,186 @@
+"""
+Thumbnail and preview generation for stored uploads.
+
+When an image or PDF is stored for the first time (core.blobs.ingest) a
+`ThumbnailJob` is queued; the `process_thumbnails` worker claims jobs, renders
+the file (the first frame of an image, the first page of a PDF when pdf2image
+and poppler are installed) and writes one WebP and one JPEG per size in
+THUMBNAIL_SIZES next to the original, e.g. `cas/ab/cd/<digest>.small.webp`.
+Variants belong to the stored content, so duplicate uploads share them.
+
+`UploadSerializer` and `LibraryItemSerializer` expose the variant URLs, so
+grids can load a small rendition instead of the full-size file.
+"""
+import io
+import logging
+import mimetypes
+import os
+import re
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import ContentBlob, ThumbnailJob
+
+logger = logging.getLogger(__name__)
+
+FORMATS = (('webp', 'WEBP'), ('jpg', 'JPEG'))
+DIGEST_IN_URL = re.compile(r'/cas/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})')
+
+
+def sizes():
+    """{label: max edge in px} of the variants to generate."""
+    return getattr(settings, 'THUMBNAIL_SIZES', {'small': 160, 'medium': 480, 'large': 1024})
+
+
+def wants_thumbnails(file_name):
+    content_type = mimetypes.guess_type(file_name or '')[0] or ''
+    return content_type.startswith('image/') or content_type == 'application/pdf'
+
+
+def enqueue(blob, file_name):
+    """Queue thumbnail generation for a newly stored blob if it is an image or PDF."""
+    if not wants_thumbnails(file_name):
+        return None
+    job, _ = ThumbnailJob.objects.get_or_create(blob=blob)
+    return job
+
+
+def claim_next_job(now=None):
+    """Atomically mark the next due job as running and return it (None if nothing is due).
+
+    Same queue discipline as the announcement delivery worker: SKIP LOCKED so
+    several workers can run, and jobs left `running` by a crashed worker are
+    reclaimed after THUMBNAIL_JOB_STALE_SECONDS.
+    """
+    now = now or timezone.now()
+    stale_before = now - timedelta(seconds=getattr(settings, 'THUMBNAIL_JOB_STALE_SECONDS', 600))
+    with transaction.atomic():
+        job = (
+            ThumbnailJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(status='pending', available_at__lte=now) | Q(status='running', started_at__lt=stale_before))
+            .order_by('available_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = now
+        job.attempts += 1
+        job.save(update_fields=['status', 'started_at', 'attempts'])
+    return job
+
+
+def _open_pdf_first_page(fh):
+    try:
+        from pdf2image import convert_from_bytes
+    except ImportError:
+        return None
+    pages = convert_from_bytes(fh.read(), first_page=1, last_page=1, dpi=72)
+    return pages[0] if pages else None
+
+
+def render(blob):
+    """First frame/page of the stored file as a PIL image, or None if it cannot be rendered."""
+    ext = os.path.splitext(blob.storage_name)[1].lower()
+    with default_storage.open(blob.storage_name, 'rb') as fh:
+        if ext == '.pdf':
+            image = _open_pdf_first_page(fh)
+        else:
+            try:
+                image = Image.open(fh)
+            except UnidentifiedImageError:
+                # not something Pillow can decode (e.g. SVG); retrying won't help
+                return None
+            # decode only what the largest variant needs (JPEG draft mode)
+            image.draft('RGB', (max(sizes().values()),) * 2)
+            image.load()
+    if image is None:
+        return None
+    return ImageOps.exif_transpose(image)
+
+
+def _encode(image, fmt):
+    if fmt == 'JPEG' and image.mode != 'RGB':
+        # flatten transparency onto white
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.split()[-1])
+        image = background
+    elif fmt == 'WEBP' and image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    buf = io.BytesIO()
+    if fmt == 'JPEG':
+        image.save(buf, fmt, quality=82, optimize=True, progressive=True)
+    else:
+        image.save(buf, fmt, quality=80, method=4)
+    return buf.getvalue()
+
+
+def generate(blob):
+    """Write every variant of `blob` and record them; returns the variants dict ({} if not renderable)."""
+    image = render(blob)
+    if image is None:
+        return {}
+    stem = os.path.splitext(blob.storage_name)[0]
+    variants = {}
+    # largest first, each derived from the previous one: cheaper than
+    # resampling the full image every time
+    for label, edge in sorted(sizes().items(), key=lambda item: -item[1]):
+        image = image.copy()
+        image.thumbnail((edge, edge), Image.LANCZOS)
+        for ext, fmt in FORMATS:
+            name = f'{stem}.{label}.{ext}'
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            name = default_storage.save(name, ContentFile(_encode(image, fmt)))
+            variants[f'{label}.{ext}'] = {'name': name, 'width': image.width, 'height': image.height}
+    ContentBlob.objects.filter(id=blob.id).update(variants=variants)
+    return variants
+
+
+def process_job(job):
+    """Generate a claimed job's variants. Failures are retried until THUMBNAIL_JOB_MAX_ATTEMPTS."""
+    try:
+        variants = generate(job.blob)
+        job.status = 'completed' if variants else 'skipped'
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'finished_at'])
+    except Exception as e:
+        logger.exception('Thumbnail job %s failed: %s', job.id, e)
+        job.last_error = traceback.format_exc()
+        if job.attempts >= getattr(settings, 'THUMBNAIL_JOB_MAX_ATTEMPTS', 3):
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+        else:
+            job.status = 'pending'
+            job.available_at = timezone.now() + timedelta(minutes=job.attempts)
+        job.save(update_fields=['status', 'last_error', 'finished_at', 'available_at'])
+    return job
+
+
+def variant_urls(variants):
+    """{'small.webp': url, ...} for a blob's `variants` field."""
+    return {label: default_storage.url(v['name']) for label, v in (variants or {}).items()}
+
+
+def digest_from_url(url):
+    """SHA-256 of a content-addressed file URL (None for other URLs)."""
+    match = DIGEST_IN_URL.search(url or '')
+    return match.group(1) if match else None
+
+
+def variants_by_digest(urls):
+    """{digest: variants} for the content-addressed files among `urls`, in one query."""
+    digests = {d for d in (digest_from_url(u) for u in urls) if d}
+    if not digests:
+        return {}
+    return dict(ContentBlob.objects.filter(digest__in=digests).exclude(variants={}).values_list('digest', 'variants'))
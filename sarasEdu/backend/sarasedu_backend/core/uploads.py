@@ -0,0 +1,395 @@
+"""
+Upload validation and resumable chunked uploads.
+
+Large files (lecture videos, ZIPs) are sent as a chunked upload instead of
+one multipart request:
+
+    POST   /api/uploads/chunked/                  {file_name, size} -> session
+    PUT    /api/uploads/chunked/<id>/?offset=N    raw bytes of one chunk
+    GET    /api/uploads/chunked/<id>/             current offset, to resume
+    POST   /api/uploads/chunked/<id>/finalize/    -> Upload {id, url}
+    DELETE /api/uploads/chunked/<id>/             abort
+
+Each chunk is streamed straight into the storage backend: appended to a
+`.part` file under MEDIA_ROOT with FileSystemStorage, or sent as one part of
+an S3 multipart upload with the S3 backend, so no worker ever holds or copies
+the whole file. The SHA-256 is computed over the chunks as they pass; on
+finalize the staged file is moved (or server-side copied) to its
+content-addressed name, or dropped if that content is already stored (see
+core.blobs). A worker that did not see every chunk re-reads the staged file
+to hash it. Chunks must arrive in order at the acknowledged offset and be
+exactly `chunk_size` bytes except the last one; a chunk at any other offset is
+answered with 409 and the offset to resume from. The file type is checked once,
+on the first chunk.
+
+Sessions that stop receiving chunks are aborted by the `expire_upload_sessions`
+command once they have been idle for UPLOAD_SESSION_TTL_SECONDS (default one
+day), which deletes their `.part` file or aborts their S3 multipart upload.
+"""
+import hashlib
+import logging
+import mimetypes
+import os
+import tempfile
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from . import blobs
+from .models import UploadSession
+
+logger = logging.getLogger(__name__)
+
+# S3 rejects multipart parts smaller than this (except the last one)
+S3_MIN_PART_BYTES = 5 * 1024 * 1024
+SNIFF_BYTES = 2048
+READ_BLOCK_BYTES = 64 * 1024
+
+_hashers_lock = threading.Lock()
+# session id -> (bytes hashed so far, sha256 of those bytes), for this process
+_hashers = {}
+
+
+class UploadError(Exception):
+    """A rejected chunked-upload request; the view answers with `status_code`."""
+
+    def __init__(self, detail, status_code=400, offset=None):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+        self.offset = offset
+
+
+def max_upload_mb():
+    return getattr(settings, 'MAX_UPLOAD_MB', 20)
+
+
+def max_chunked_upload_mb():
+    return getattr(settings, 'MAX_CHUNKED_UPLOAD_MB', 4096)
+
+
+def session_ttl():
+    return getattr(settings, 'UPLOAD_SESSION_TTL_SECONDS', 24 * 3600)
+
+
+def allowed_types():
+    return getattr(settings, 'ALLOWED_UPLOAD_MIME_TYPES', ['application/pdf', 'image/png', 'image/jpeg', 'video/mp4', 'application/zip'])
+
+
+def detect_content_type(sample, file_name, declared=None):
+    """Return `(content_type, detected_mime)` for a file from its first bytes.
+
+    Prefers content-based detection when python-magic is available. When magic
+    is missing or only says application/octet-stream, falls back to the
+    filename extension, then to the client-declared type, so common archive
+    uploads like ZIPs aren't rejected spuriously.
+    """
+    detected_mime = None
+    try:
+        import magic
+        detected_mime = magic.from_buffer(sample, mime=True)
+    except Exception:
+        detected_mime = None
+    if not detected_mime or detected_mime == 'application/octet-stream':
+        ext_ct, _ = mimetypes.guess_type(file_name)
+        return ext_ct or declared or 'application/octet-stream', detected_mime
+    return detected_mime, detected_mime
+
+
+def uses_s3():
+    """Whether default_storage is the S3/MinIO backend (USE_S3=1)."""
+    return not isinstance(default_storage, FileSystemStorage) and hasattr(default_storage, 'bucket_name')
+
+
+def s3_client():
+    """boto3 client of the storage backend (talks to the internal endpoint)."""
+    return default_storage.connection.meta.client
+
+
+def s3_key(name):
+    """Object key of the storage name `name` (prefixed with AWS_LOCATION, if any)."""
+    return default_storage._normalize_name(name)
+
+
+def _part_path(session):
+    return default_storage.path(session.storage_name)
+
+
+def chunk_size():
+    size = getattr(settings, 'UPLOAD_CHUNK_BYTES', 8 * 1024 * 1024)
+    return max(size, S3_MIN_PART_BYTES) if uses_s3() else size
+
+
+def start(user, file_name, size, declared_type=None):
+    """Open a chunked upload of `size` bytes for `user`, staged under chunked/<session id>.part."""
+    file_name = os.path.basename(file_name or '')
+    if not file_name:
+        raise UploadError('file_name is required.')
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError('size must be an integer.')
+    max_mb = max_chunked_upload_mb()
+    if size <= 0 or size > max_mb * 1024 * 1024:
+        raise UploadError(f'size must be between 1 byte and {max_mb} MB.')
+
+    session = UploadSession(
+        uploaded_by=user, file_name=file_name, size=size, chunk_size=chunk_size(),
+        content_type=declared_type or None,
+    )
+    session.storage_name = f'chunked/{session.id}.part'
+    if uses_s3():
+        session.s3_upload_id = s3_client().create_multipart_upload(
+            Bucket=default_storage.bucket_name, Key=s3_key(session.storage_name),
+        )['UploadId']
+    else:
+        path = _part_path(session)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'wb').close()
+    session.save()
+    return session
+
+
+def _read(stream, limit):
+    """Yield blocks from `stream` until EOF, failing once more than `limit` bytes arrive."""
+    total = 0
+    while True:
+        block = stream.read(READ_BLOCK_BYTES)
+        if not block:
+            return
+        total += len(block)
+        if total > limit:
+            raise UploadError(f'Chunk larger than {limit} bytes.', status_code=413)
+        yield block
+
+
+def _hashing(blocks, hasher):
+    for block in blocks:
+        hasher.update(block)
+        yield block
+
+
+def _hasher_at(session_id, offset):
+    """A copy of this process's running hash of the first `offset` bytes, or None."""
+    if offset == 0:
+        return hashlib.sha256()
+    with _hashers_lock:
+        hashed, hasher = _hashers.get(session_id, (None, None))
+    return hasher.copy() if hashed == offset else None
+
+
+def _content_digest(session):
+    """SHA-256 of the staged file: the running hash if this process saw every chunk."""
+    with _hashers_lock:
+        hashed, hasher = _hashers.pop(session.id, (None, None))
+    if hashed == session.size:
+        return hasher.hexdigest()
+    hasher = hashlib.sha256()
+    with default_storage.open(session.storage_name, 'rb') as fh:
+        for block in fh.chunks():
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def _check_type(session, first_block):
+    content_type, detected_mime = detect_content_type(first_block[:SNIFF_BYTES], session.file_name, session.content_type)
+    types = allowed_types()
+    if types and content_type not in types:
+        detail = f'Invalid file type: {session.content_type}'
+        if detected_mime:
+            detail += f' (detected: {detected_mime})'
+        raise UploadError(detail)
+    session.content_type = content_type
+
+
+def _write_local(session, offset, blocks):
+    written = 0
+    with open(_part_path(session), 'r+b') as fh:
+        fh.seek(offset)
+        for block in blocks:
+            if offset == 0 and written == 0:
+                _check_type(session, block)
+            fh.write(block)
+            written += len(block)
+        fh.truncate()
+    return written
+
+
+def _write_s3(session, offset, blocks):
+    # boto3 needs a sized, seekable body: spool the chunk (<= chunk_size bytes)
+    with tempfile.SpooledTemporaryFile(max_size=session.chunk_size) as buf:
+        for block in blocks:
+            if offset == 0 and buf.tell() == 0:
+                _check_type(session, block)
+            buf.write(block)
+        written = buf.tell()
+        buf.seek(0)
+        part_number = offset // session.chunk_size + 1
+        etag = s3_client().upload_part(
+            Bucket=default_storage.bucket_name, Key=s3_key(session.storage_name),
+            UploadId=session.s3_upload_id, PartNumber=part_number, Body=buf, ContentLength=written,
+        )['ETag']
+    session.parts = [p for p in session.parts if p['PartNumber'] != part_number] + [{'PartNumber': part_number, 'ETag': etag}]
+    return written
+
+
+def write_chunk(session_id, user, offset, stream):
+    """Append the chunk read from `stream` at byte `offset`; returns the updated session.
+
+    The session row is locked for the duration, so concurrent retries of the
+    same chunk cannot interleave.
+    """
+    try:
+        offset = int(offset)
+    except (TypeError, ValueError):
+        raise UploadError('offset must be an integer.')
+    with transaction.atomic():
+        session = _locked(session_id, user)
+        if offset != session.received:
+            raise UploadError('Chunk is not at the acknowledged offset.', status_code=409, offset=session.received)
+        expected = min(session.chunk_size, session.size - offset)
+        if expected <= 0:
+            raise UploadError('Upload already holds all bytes; finalize it.', status_code=409, offset=session.received)
+        write = _write_s3 if session.s3_upload_id else _write_local
+        hasher = _hasher_at(session.id, offset)
+        blocks = _read(stream, expected)
+        if hasher is not None:
+            blocks = _hashing(blocks, hasher)
+        written = write(session, offset, blocks)
+        if written != expected:
+            raise UploadError(
+                f'Chunk at offset {offset} must be {expected} bytes, got {written}.', offset=session.received,
+            )
+        session.received = offset + written
+        session.save(update_fields=['received', 'content_type', 'parts', 'updated_at'])
+    with _hashers_lock:
+        if hasher is not None:
+            _hashers[session.id] = (session.received, hasher)
+        else:
+            _hashers.pop(session.id, None)
+    return session
+
+
+def finish(session_id, user):
+    """Complete the upload once every byte has arrived and create its `Upload` row.
+
+    The staged file becomes the content-addressed copy, unless the same content
+    is already stored, in which case it is deleted and only the Upload is added.
+    """
+    with transaction.atomic():
+        session = _locked(session_id, user)
+        if session.received != session.size:
+            raise UploadError(
+                f'Upload incomplete: {session.received} of {session.size} bytes received.',
+                status_code=409, offset=session.received,
+            )
+        if session.s3_upload_id:
+            s3_client().complete_multipart_upload(
+                Bucket=default_storage.bucket_name, Key=s3_key(session.storage_name),
+                UploadId=session.s3_upload_id,
+                MultipartUpload={'Parts': sorted(session.parts, key=lambda p: p['PartNumber'])},
+            )
+        staged = session.storage_name
+
+        def put(name):
+            if session.s3_upload_id:
+                # server-side copy: the bytes never pass through this worker
+                bucket = default_storage.bucket_name
+                s3_client().copy({'Bucket': bucket, 'Key': s3_key(staged)}, bucket, s3_key(name))
+                default_storage.delete(staged)
+            else:
+                target = default_storage.path(name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(_part_path(session), target)
+            return name
+
+        session.upload = blobs.ingest(
+            _content_digest(session), session.size, session.file_name, user,
+            put=put, discard=lambda: default_storage.delete(staged),
+        )
+        session.status = 'complete'
+        session.save(update_fields=['upload', 'status', 'updated_at'])
+    return session
+
+
+def abort(session_id, user):
+    """Drop an unfinished upload and whatever of it was stored."""
+    with transaction.atomic():
+        _discard(_locked(session_id, user))
+
+
+def expire_stale(ttl=None, now=None):
+    """Abort uploads that received nothing for `ttl` seconds (UPLOAD_SESSION_TTL_SECONDS); returns how many.
+
+    Each session is locked with SKIP LOCKED, so one that is receiving a chunk
+    right now is left for the next run.
+    """
+    now = now or timezone.now()
+    idle_before = now - timedelta(seconds=session_ttl() if ttl is None else ttl)
+    ids = list(
+        UploadSession.objects.filter(status='uploading', updated_at__lt=idle_before).values_list('id', flat=True)
+    )
+    expired = 0
+    for session_id in ids:
+        with transaction.atomic():
+            session = (
+                UploadSession.objects.select_for_update(skip_locked=True)
+                .filter(id=session_id, status='uploading', updated_at__lt=idle_before)
+                .first()
+            )
+            if session is None:
+                continue
+            _discard(session)
+            expired += 1
+    return expired
+
+
+def _discard(session):
+    try:
+        if session.s3_upload_id:
+            s3_client().abort_multipart_upload(
+                Bucket=default_storage.bucket_name, Key=s3_key(session.storage_name), UploadId=session.s3_upload_id,
+            )
+        else:
+            default_storage.delete(session.storage_name)
+    except Exception as e:
+        logger.warning('Failed to discard chunked upload %s: %s', session.id, e)
+    with _hashers_lock:
+        _hashers.pop(session.id, None)
+    session.status = 'aborted'
+    session.save(update_fields=['status', 'updated_at'])
+
+
+def describe(session):
+    """JSON-ready state of a session; `offset` is where the client resumes."""
+    data = {
+        'id': str(session.id),
+        'file_name': session.file_name,
+        'size': session.size,
+        'chunk_size': session.chunk_size,
+        'offset': session.received,
+        'status': session.status,
+    }
+    if session.upload_id:
+        data['upload'] = {'id': session.upload_id, 'url': session.upload.file_url}
+    return data
+
+
+def get(session_id, user):
+    session = UploadSession.objects.filter(id=session_id, uploaded_by=user).first()
+    if session is None:
+        raise UploadError('Upload session not found.', status_code=404)
+    return session
+
+
+def _locked(session_id, user):
+    session = UploadSession.objects.select_for_update().filter(id=session_id, uploaded_by=user).first()
+    if session is None:
+        raise UploadError('Upload session not found.', status_code=404)
+    if session.status != 'uploading':
+        raise UploadError(f'Upload session is {session.status}.', status_code=409)
+    return session
@@ -4,7 +4,7 @@ from .views import (
     RegisterView, me, CustomTokenObtainPairView, AIChatView, AIImageView, AITranscribeView,
     PasswordResetRequestView, PasswordResetConfirmView, ChangePasswordView,
     CourseLecturesView, UserDetailView, UserListView, LibraryListCreateView, LibraryDetailView, LibraryDownloadView, AssignmentSubmitView,
-    DriveProxyView,
+    DriveProxyView, MediaSignView, StudentAnalyticsView, TeacherAnalyticsView, AdminAnalyticsView,
 )
 from rest_framework_simplejwt.views import TokenRefreshView
 from . import viewsets
@@ -30,6 +30,7 @@ router.register(r'library-downloads', viewsets.LibraryDownloadViewSet)
 router.register(r'events', viewsets.EventViewSet)
 router.register(r'live-classes', viewsets.LiveClassViewSet)
 router.register(r'announcements', viewsets.AnnouncementViewSet)
+router.register(r'announcement-deliveries', viewsets.AnnouncementDeliveryViewSet, basename='announcement-deliveries')
 router.register(r'uploads', viewsets.UploadViewSet)
 router.register(r'student-profiles', viewsets.StudentProfileViewSet)
 router.register(r'teacher-profiles', viewsets.TeacherProfileViewSet)
@@ -53,11 +54,15 @@ urlpatterns = [
     path('ai/transcribe', AITranscribeView.as_view(), name='ai_transcribe'),
     path('courses/<int:id>/lectures', CourseLecturesView.as_view(), name='course_lectures'),
     path('video-proxy/', DriveProxyView.as_view(), name='video_proxy'),
+    path('media/sign/', MediaSignView.as_view(), name='media_sign'),
     path('users', UserListView.as_view(), name='user_list'),
     path('users/<int:id>', UserDetailView.as_view(), name='user_detail'),
     path('library', LibraryListCreateView.as_view(), name='library_alias'),
     path('library/<int:id>', LibraryDetailView.as_view(), name='library_detail'),
     path('library/<int:id>/download', LibraryDownloadView.as_view(), name='library_download'),
     path('assignments/<int:id>/submissions', AssignmentSubmitView.as_view(), name='assignment_submit'),
+    path('analytics/student/<int:id>/', StudentAnalyticsView.as_view(), name='analytics_student'),
+    path('analytics/teacher/<int:id>/', TeacherAnalyticsView.as_view(), name='analytics_teacher'),
+    path('analytics/admin/', AdminAnalyticsView.as_view(), name='analytics_admin'),
     path('', include(router.urls)),
 ]
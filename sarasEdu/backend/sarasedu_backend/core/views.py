@@ -16,6 +16,7 @@ from .serializers import RegisterSerializer, UserSerializer, AssignmentSubmissio
 from .models import Course, Assignment, AssignmentSubmission
 from .throttles import AIChatRateThrottle
 from .permissions import IsTeacherOrAdmin
+from . import media
 import os
 import socket
 import requests
@@ -26,7 +27,7 @@ import time
 from django.http import StreamingHttpResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from django.http import HttpResponseForbidden
+from django.http import Http404, HttpResponseForbidden
 from django.db import transaction
 from django.db.models import F
 from huggingface_hub import InferenceClient
@@ -462,18 +463,24 @@ class AssignmentSubmitView(APIView):
             return Response({'detail': 'Only students may submit assignments.'}, status=status.HTTP_403_FORBIDDEN)
 
         file = request.FILES.get('file')
-        submitted_file_url = None
-        if file:
-            path = default_storage.save(file.name, file)
-            submitted_file_url = default_storage.url(path)
-
-        submission = AssignmentSubmission.objects.create(
-            assignment=assignment,
-            student=user,
-            submitted_file_url=submitted_file_url,
-            submission_text=request.data.get('submission_text', ''),
-            status='submitted'
-        )
+        with transaction.atomic():
+            submitted_file_url = None
+            blob = None
+            if file:
+                # the submission holds the content reference; no Upload row,
+                # since uploads are listed to every student
+                from .blobs import store_blob
+                blob = store_blob(file, file.name)
+                submitted_file_url = default_storage.url(blob.storage_name)
+
+            submission = AssignmentSubmission.objects.create(
+                assignment=assignment,
+                student=user,
+                submitted_file_url=submitted_file_url,
+                blob=blob,
+                submission_text=request.data.get('submission_text', ''),
+                status='submitted'
+            )
         serializer = AssignmentSubmissionSerializer(submission)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -545,6 +552,58 @@ class DriveProxyView(APIView):
         return resp
 
 
+class ProtectedMediaView(APIView):
+    """Serve a file from MEDIA_ROOT to users allowed to see a row that references it.
+
+    GET/HEAD /media/<path>  (mounted only when USE_S3 is off)
+
+    Accepts a signed URL (`?sig=`, see MediaSignView) or the usual Authorization
+    header. Handing off to the front proxy or serving byte ranges is done by
+    core.media; files the user may not read are reported as missing.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, path, *args, **kwargs):
+        sig = request.query_params.get('sig')
+        if sig is not None:
+            if not media.check_signature(path, sig):
+                return Response({'detail': 'Invalid or expired media signature.'}, status=status.HTTP_403_FORBIDDEN)
+        elif not request.user.is_authenticated:
+            return Response({'detail': 'Authentication credentials were not provided.'}, status=status.HTTP_401_UNAUTHORIZED)
+        elif not media.can_read(request.user, path):
+            raise Http404
+        full_path = media.resolve(path)
+        if full_path is None:
+            raise Http404
+        return media.serve(request._request, path, full_path)
+
+
+class MediaSignView(APIView):
+    """Exchange local media URLs for short-lived signed URLs.
+
+    POST /api/media/sign/  {"urls": ["/media/...", ...]}
+    Returns {"urls": {<url>: <signed url or null>}, "expires_in": seconds}.
+    URLs the user may not read map to null; non-media URLs are returned as-is.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_urls = 100
+
+    def post(self, request, *args, **kwargs):
+        urls = request.data.get('urls')
+        if not isinstance(urls, list) or not all(isinstance(u, str) for u in urls) or len(urls) > self.max_urls:
+            return Response({'detail': f'urls must be a list of at most {self.max_urls} strings.'}, status=status.HTTP_400_BAD_REQUEST)
+        signed = {}
+        for url in urls:
+            path = media.path_from_url(url)
+            if path is None:
+                signed[url] = url
+            elif media.can_read(request.user, path):
+                signed[url] = media.sign(request.user, path)
+            else:
+                signed[url] = None
+        return Response({'urls': signed, 'expires_in': media.expires_in()})
+
+
 class LibraryDownloadView(APIView):
     """Record a download for a library item and increment its total_downloads counter.
 
@@ -789,3 +848,65 @@ class AITranscribeView(APIView):
         return Response({'detail': 'Transcription timed out'}, status=status.HTTP_504_GATEWAY_TIMEOUT)
 
 
+
+
+class StudentAnalyticsView(APIView):
+    """Dashboard analytics of one student: GET /api/analytics/student/<id>/?timeRange=monthly
+
+    Students may only read their own analytics, teachers those of students
+    enrolled in one of their courses, admins everyone's.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, id, *args, **kwargs):
+        from .analytics import student_analytics
+        from .models import Enrollment
+        try:
+            student = User.objects.get(id=id, role='student')
+        except User.DoesNotExist:
+            return Response({'detail': 'Student not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        user = request.user
+        role = getattr(user, 'role', None)
+        if role == 'student' and user.id != student.id:
+            return Response({'detail': 'You can only view your own analytics.'}, status=status.HTTP_403_FORBIDDEN)
+        if role == 'teacher' and not Enrollment.objects.filter(student=student, course__instructor=user).exists():
+            return Response({'detail': 'This student is not enrolled in your courses.'}, status=status.HTTP_403_FORBIDDEN)
+
+        return Response(student_analytics(student, request.query_params.get('timeRange', 'monthly')))
+
+
+class TeacherAnalyticsView(APIView):
+    """Dashboard analytics of one teacher's courses: GET /api/analytics/teacher/<id>/?timeRange=monthly
+
+    Teachers may only read their own analytics, admins everyone's. Reports are
+    cached briefly per teacher and timeRange (see core.analytics).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, id, *args, **kwargs):
+        from .analytics import teacher_analytics
+        try:
+            teacher = User.objects.get(id=id, role='teacher')
+        except User.DoesNotExist:
+            return Response({'detail': 'Teacher not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        user = request.user
+        if getattr(user, 'role', None) != 'admin' and user.id != teacher.id:
+            return Response({'detail': 'You can only view your own analytics.'}, status=status.HTTP_403_FORBIDDEN)
+
+        return Response(teacher_analytics(teacher, request.query_params.get('timeRange', 'monthly')))
+
+
+class AdminAnalyticsView(APIView):
+    """Platform-wide analytics for admins: GET /api/analytics/admin/?timeRange=monthly
+
+    Served from the daily rollups maintained by `manage.py update_daily_rollups`.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        from .analytics import admin_analytics
+        if getattr(request.user, 'role', None) != 'admin':
+            return Response({'detail': 'Only admins can view platform analytics.'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(admin_analytics(request.query_params.get('timeRange', 'monthly')))
@@ -1,24 +1,26 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from django.core.files.storage import default_storage
-from django.db import IntegrityError, DatabaseError, connection
+from django.db import IntegrityError, DatabaseError, connection, transaction
+from django.db.models import Avg
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail, get_connection, EmailMessage
-import requests
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
 import os
 import uuid
+from decimal import Decimal, InvalidOperation
 import traceback
-import logging
 from django.utils.text import get_valid_filename
+from . import attendance, blobs, course_page, delivery, grading, heartbeats, presign, ratings, scoping, uploads
 from .models import (
     Course, Lecture, LectureMaterial, StudyMaterial,
     LiveClass,
     Enrollment, LectureProgress, Assignment, AssignmentSubmission, AssignmentAttachment,
     Test, Question, TestSubmission, TestAnswer, AttendanceRecord,
-    LibraryItem, LibraryFavorite, LibraryDownload, Event, Announcement, Upload,
+    LibraryItem, LibraryFavorite, LibraryDownload, Event, Announcement, AnnouncementDelivery, Upload,
     StudentProfile, TeacherProfile, AdminProfile, UserSettings, ActivityLog, SystemAlert, Notification, CourseRating
 )
 
@@ -29,11 +31,26 @@ from .serializers import (
     EnrollmentSerializer, LectureProgressSerializer, AssignmentSerializer, AssignmentSubmissionSerializer, AssignmentAttachmentSerializer,
     TestSerializer, QuestionSerializer, TestSubmissionSerializer, TestAnswerSerializer, AttendanceRecordSerializer,
     LibraryItemSerializer, LibraryFavoriteSerializer, LibraryDownloadSerializer, EventSerializer, AnnouncementSerializer, UploadSerializer,
+    AnnouncementDeliverySerializer, AnnouncementDeliveryRecipientSerializer,
     StudentProfileSerializer, TeacherProfileSerializer, AdminProfileSerializer, UserSettingsSerializer,
-    ActivityLogSerializer, SystemAlertSerializer, NotificationSerializer, CourseRatingSerializer
+    ActivityLogSerializer, SystemAlertSerializer, NotificationSerializer, CourseRatingSerializer,
+    UserSerializer,
 )
 
 
+def nested_user_only(model, *relations):
+    """Column list for `.only()` when `model` is listed with nested UserSerializer(s).
+
+    Loads every concrete column of `model` and, for each related user in
+    `relations`, just the columns UserSerializer emits (skipping password,
+    permission flags, etc.). Pair with `select_related(*relations)`.
+    """
+    fields = [f.name for f in model._meta.concrete_fields]
+    for rel in relations:
+        fields.extend(f'{rel}__{name}' for name in UserSerializer.Meta.fields)
+    return fields
+
+
 class BaseModelViewSet(viewsets.ModelViewSet):
     # Default: read-only for anonymous, authenticated users can read.
     # For write operations, viewsets can set `write_permission_classes` to control who may create/update/delete.
@@ -53,7 +70,8 @@ class BaseModelViewSet(viewsets.ModelViewSet):
         - Teacher: sees only objects they created / uploaded / own (fields: instructor, created_by, uploaded_by)
         - Student: sees only objects directly related to them (student field, or user-specific models).
 
-        This attempts to infer the owner field from the model fields and apply sensible defaults.
+        The owner field for each (model, role) pair is precompiled at startup by
+        `core.scoping`, so this is a single rule lookup plus one filter.
         """
         qs = getattr(self, 'queryset', None)
         if qs is None:
@@ -62,110 +80,31 @@ class BaseModelViewSet(viewsets.ModelViewSet):
         # unauthenticated: return public queryset (as defined)
         if not user or not user.is_authenticated:
             return qs
+        role = getattr(user, 'role', None)
         # admins see all
-        if getattr(user, 'role', None) == 'admin':
+        if role == 'admin':
             return qs
 
         model = getattr(qs, 'model', None)
         if model is None:
             return qs
 
-        field_names = {f.name for f in model._meta.get_fields()}
+        rule = scoping.get_rule(model, role)
 
         # If a course query param is provided and the model has a course FK, filter by it.
-        try:
-            course_param = self.request.query_params.get('course')
-        except Exception:
-            course_param = None
-        if course_param and 'course' in field_names:
+        if rule.has_course:
             try:
-                return qs.filter(course_id=course_param)
+                course_param = self.request.query_params.get('course')
             except Exception:
-                # fall back to unfiltered
-                pass
-
-        # Helpers for common models (explicit rules)
-        model_name = model.__name__.lower()
-
-        # Enrollment: teachers should see enrollments for their courses
-        if model_name == 'enrollment' and getattr(user, 'role', None) == 'teacher':
-            return qs.filter(course__instructor=user)
-        if model_name == 'enrollment' and getattr(user, 'role', None) == 'student':
-            return qs.filter(student=user)
-
-        # LectureProgress: teachers see progress for lectures in their courses; students see own progress
-        if model_name == 'lectureprogress':
-            if getattr(user, 'role', None) == 'teacher':
-                return qs.filter(lecture__course__instructor=user)
-            if getattr(user, 'role', None) == 'student':
-                return qs.filter(student=user)
-
-        # Lectures: if teacher, limit to their courses; students may view lectures by course param
-        if model_name == 'lecture':
-            if getattr(user, 'role', None) == 'teacher':
-                return qs.filter(course__instructor=user)
-            # students fall through to course param filter handled above or default qs
-
-        # AssignmentSubmission / TestSubmission: students see own, teachers see submissions for assignments/tests they created
-        if model_name in ('assignmentsubmission', 'testsubmission'):
-            if getattr(user, 'role', None) == 'student':
-                return qs.filter(student=user)
-            if getattr(user, 'role', None) == 'teacher':
-                # submissions relate to assignment/test -> course -> instructor
-                if 'assignment' in field_names:
-                    return qs.filter(assignment__course__instructor=user)
-                if 'test' in field_names:
-                    return qs.filter(test__course__instructor=user)
-
-        # Library items: uploaded_by
-        if 'uploaded_by' in field_names and getattr(user, 'role', None) == 'teacher':
-            return qs.filter(uploaded_by=user)
-        if 'uploaded_by' in field_names and getattr(user, 'role', None) == 'student':
-            # students can see library items; keep default (all) or filter by access level if needed
-            return qs
-
-        # Events: teachers should see events they created / where they are instructor
-        if model_name == 'event' and getattr(user, 'role', None) == 'teacher':
-            if 'instructor' in field_names:
-                return qs.filter(instructor=user)
-            if 'created_by' in field_names:
-                return qs.filter(created_by=user)
-
-        # Courses: teachers should see only their courses
-        if model_name == 'course' and getattr(user, 'role', None) == 'teacher':
-            if 'instructor' in field_names:
-                return qs.filter(instructor=user)
-
-        # Tests / Assignments / StudyMaterial / Announcements: filter by created_by or course instructor
-        if getattr(user, 'role', None) == 'teacher':
-            if 'created_by' in field_names:
-                # include items the teacher created
-                try:
-                    return qs.filter(created_by=user)
-                except Exception:
-                    pass
-            if 'instructor' in field_names:
+                course_param = None
+            if course_param:
                 try:
-                    return qs.filter(instructor=user)
+                    return qs.filter(course_id=course_param)
                 except Exception:
+                    # fall back to the role rule
                     pass
-            # study materials often use uploaded_by
-            if 'uploaded_by' in field_names:
-                try:
-                    return qs.filter(uploaded_by=user)
-                except Exception:
-                    pass
-
-        # Students: common rule - if model has 'student' FK, show only their rows
-        if getattr(user, 'role', None) == 'student' and 'student' in field_names:
-            return qs.filter(student=user)
 
-        # If model has a generic 'user' FK (profiles, favorites), scope to the requesting user
-        if 'user' in field_names:
-            return qs.filter(user=user)
-
-        # Fall back to default queryset (e.g., public list) for roles not matching above
-        return qs
+        return rule.apply(qs, user)
 
     def perform_create(self, serializer):
         """Set common ownership fields on create when present on the model.
@@ -202,7 +141,7 @@ class BaseModelViewSet(viewsets.ModelViewSet):
 
 
 class CourseViewSet(BaseModelViewSet):
-    queryset = Course.objects.all()
+    queryset = Course.objects.select_related('instructor').only(*nested_user_only(Course, 'instructor'))
     serializer_class = CourseSerializer
     filter_backends = (filters.SearchFilter, filters.OrderingFilter)
     search_fields = ('title', 'subtitle', 'description', 'tags')
@@ -231,6 +170,7 @@ class CourseViewSet(BaseModelViewSet):
             serializer.save(instructor=user)
         else:
             serializer.save()
+
     def get_queryset(self):
         qs = super().get_queryset()
         rp = getattr(self.request, 'query_params', {})
@@ -246,7 +186,34 @@ class CourseViewSet(BaseModelViewSet):
                 qs = qs.filter(created_by_id=created_by)
             except Exception:
                 pass
+        # catalog filters (served by the status/is_published/created_at index)
+        status_param = rp.get('status')
+        published = rp.get('is_published')
+        if status_param:
+            qs = qs.filter(status=status_param)
+        if published is not None:
+            qs = qs.filter(is_published=published.lower() in ['true', '1', 'yes'])
         return qs
+
+    @action(detail=True, methods=['get'])
+    def full(self, request, pk=None):
+        """GET /api/courses/<id>/full/ -- the whole course page in one response.
+
+        Course, lectures (with their materials), study materials, assignments,
+        tests, ratings and the requesting user's enrollment. Sends an ETag and
+        answers a matching If-None-Match with 304.
+        """
+        course = self.get_object()
+        payload = course_page.course_page(course, request.user, self.get_serializer_context())
+        etag = course_page.etag(payload)
+        response = get_conditional_response(request._request, etag=etag)
+        if response is None:
+            response = Response(payload)
+        response['ETag'] = etag
+        # per-user content: browsers may keep it but must revalidate each view
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
     def perform_update(self, serializer):
         # Prevent non-admins from changing the instructor field
         user = self.request.user
@@ -279,14 +246,63 @@ class EnrollmentViewSet(BaseModelViewSet):
     queryset = Enrollment.objects.all()
     serializer_class = EnrollmentSerializer
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        # ?course=<id>&status=active is served by the (course, status) index
+        status_param = self.request.query_params.get('status')
+        if status_param:
+            qs = qs.filter(status=status_param)
+        return qs
+
 
 class LectureProgressViewSet(BaseModelViewSet):
     queryset = LectureProgress.objects.all()
     serializer_class = LectureProgressSerializer
 
+    @action(detail=False, methods=['post'])
+    def heartbeat(self, request):
+        """
+        Batched playback progress of the requesting user.
+
+        POST /api/lecture-progress/heartbeat/ {"events": [{"lecture": 3,
+        "position_seconds": 95, "watched_seconds": 10, "completed": false}, ...]}
+
+        Events are coalesced in memory and written in bulk every few seconds
+        (see core.heartbeats), so the response is 202 and the rows may lag
+        slightly behind.
+        """
+        events = request.data.get('events')
+        if not isinstance(events, list) or not events:
+            return Response({'detail': 'events must be a non-empty list.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(events) > 500:
+            return Response({'detail': 'At most 500 events per request.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        parsed, rejected = [], 0
+        for event in events:
+            try:
+                parsed.append({
+                    'lecture': int(event['lecture']),
+                    'position': max(0, int(event.get('position_seconds') or 0)),
+                    # one event never accounts for more than an hour of viewing
+                    'seconds': min(3600, max(0, int(event.get('watched_seconds') or 0))),
+                    'completed': bool(event.get('completed', False)),
+                })
+            except (KeyError, TypeError, ValueError, AttributeError):
+                rejected += 1
+
+        known = set(Lecture.objects.filter(id__in={e['lecture'] for e in parsed}).values_list('id', flat=True))
+        accepted = [e for e in parsed if e['lecture'] in known]
+        rejected += len(parsed) - len(accepted)
+
+        flushed = heartbeats.record(request.user.id, accepted) if accepted else 0
+        return Response(
+            {'accepted': len(accepted), 'rejected': rejected, 'flushed': flushed},
+            status=status.HTTP_202_ACCEPTED
+        )
+
 
 class AssignmentViewSet(BaseModelViewSet):
-    queryset = Assignment.objects.all()
+    queryset = Assignment.objects.select_related('created_by').only(*nested_user_only(Assignment, 'created_by'))
     serializer_class = AssignmentSerializer
     from .permissions import IsTeacherOrAdmin
     write_permission_classes = [IsTeacherOrAdmin]
@@ -301,17 +317,11 @@ class AssignmentViewSet(BaseModelViewSet):
 
     def get_queryset(self):
         """
-        Auto-update DB statuses so overdue assignments flip from 'active' to 'overdue'
-        before we return any assignment results. This keeps the database in sync
-        without requiring a separate scheduler. The update is idempotent and cheap.
+        Read-only: stored statuses are flipped to 'overdue' by the
+        `update_assignment_statuses` command (use `--watch` to run it on a fixed
+        cadence), and AssignmentSerializer reports the effective status from
+        due_date so responses are never stale in between runs.
         """
-        try:
-            # Update any active assignments whose due_date has already passed
-            Assignment.objects.filter(status='active', due_date__lt=timezone.now()).update(status='overdue')
-        except Exception:
-            # Never fail the request if the maintenance update encounters an issue
-            pass
-
         qs = super().get_queryset()
         # Optional filters for convenience
         rp = getattr(self.request, 'query_params', {})
@@ -331,7 +341,7 @@ class AssignmentViewSet(BaseModelViewSet):
 
 
 class AssignmentSubmissionViewSet(BaseModelViewSet):
-    queryset = AssignmentSubmission.objects.all()
+    queryset = AssignmentSubmission.objects.select_related('student').only(*nested_user_only(AssignmentSubmission, 'student'))
     serializer_class = AssignmentSubmissionSerializer
     # Students may create submissions; editing/grading restricted by other rules
     from rest_framework import permissions as _permissions
@@ -369,6 +379,7 @@ class AssignmentSubmissionViewSet(BaseModelViewSet):
             return Response({'detail': 'Only students may create submissions.'}, status=status.HTTP_403_FORBIDDEN)
         # Wrap the submission flow to catch unexpected errors and provide
         # clearer responses during development/debugging.
+        submitted_blob = None
         try:
             # handle optional file upload or submitted_file_url
             file = request.FILES.get('file')
@@ -393,13 +404,16 @@ class AssignmentSubmissionViewSet(BaseModelViewSet):
 
                 # reuse default_storage to save the file (works for local or S3)
                 try:
-                    # Sanitize and namespace the filename to avoid collisions and
-                    # problems with client-provided names. Use a UUID prefix.
+                    # Sanitize the client-provided filename (kept as the
+                    # stored object's extension).
                     original = os.path.basename(getattr(file, 'name', 'upload'))
                     safe_name = get_valid_filename(original) or 'upload'
-                    rel_path = f'assignment_submissions/{uuid.uuid4().hex}_{safe_name}'
-                    path = default_storage.save(rel_path, file)
-                    submitted_file_url = default_storage.url(path)
+                    # stored content-addressed: resubmitting the same file (or
+                    # one another student already sent) adds no second copy.
+                    # The submission holds the reference, no Upload row is made
+                    # (those are listed to every student).
+                    submitted_blob = blobs.store_blob(file, safe_name)
+                    submitted_file_url = default_storage.url(submitted_blob.storage_name)
                 except Exception as e:
                     # Attempt a local fallback to MEDIA_ROOT if default_storage fails
                     print('default_storage.save failed, attempting MEDIA_ROOT fallback:', e)
@@ -436,12 +450,18 @@ class AssignmentSubmissionViewSet(BaseModelViewSet):
             # If a submission already exists for this student+assignment, update it
             existing = AssignmentSubmission.objects.filter(assignment=assignment, student=user).first()
             if existing:
+                replaced_blob_id = None
                 if submitted_file_url:
+                    replaced_blob_id = existing.blob_id
                     existing.submitted_file_url = submitted_file_url
+                    existing.blob = submitted_blob
                 if submission_text:
                     existing.submission_text = submission_text
                 existing.status = 'submitted'
                 existing.save()
+                submitted_blob = None
+                if replaced_blob_id:
+                    blobs.release(replaced_blob_id)
                 serializer = self.get_serializer(existing)
                 return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -450,20 +470,33 @@ class AssignmentSubmissionViewSet(BaseModelViewSet):
                 assignment=assignment,
                 student=user,
                 submitted_file_url=submitted_file_url,
+                blob=submitted_blob,
                 submission_text=submission_text,
                 status='submitted'
             )
+            submitted_blob = None
             serializer = self.get_serializer(submission)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except IntegrityError as ie:
             # handle DB uniqueness or integrity issues explicitly
             print('IntegrityError saving submission:', ie)
+            self._release_unused(submitted_blob)
             return Response({'detail': 'Database integrity error saving submission.', 'error': str(ie)}, status=status.HTTP_409_CONFLICT)
         except Exception as e:
             # unexpected error: log and return 500 with brief message
             print('Unexpected error in AssignmentSubmission.create:', e)
+            self._release_unused(submitted_blob)
             return Response({'detail': 'Unexpected server error saving submission.', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def _release_unused(self, blob):
+        # the reference taken for a stored file that no submission ended up holding
+        if blob is None:
+            return
+        try:
+            blobs.release(blob.id)
+        except Exception as e:
+            print('Failed to release stored submission content:', e)
+
     def update(self, request, *args, **kwargs):
         # restrict grading fields to teachers/admins
         user = request.user
@@ -548,6 +581,11 @@ class TestViewSet(BaseModelViewSet):
     from .permissions import IsTeacherOrAdmin
     write_permission_classes = [IsTeacherOrAdmin]
 
+    def get_queryset(self):
+        # Average marks for every listed test come from a single grouped
+        # aggregate over core_testsubmission; TestSerializer reads the annotation.
+        return super().get_queryset().annotate(avg_marks_obtained=Avg('submissions__marks_obtained'))
+
     def perform_create(self, serializer):
         # set created_by to requesting user when teacher/admin creates a test
         user = self.request.user
@@ -629,95 +667,26 @@ class TestSubmissionViewSet(BaseModelViewSet):
             answers_payload = request.data.get('answers') or []
 
             if existing:
-                existing.status = 'submitted'
-                existing.submit_time = submit_time
-                existing.save()
-                # Optionally accept new answers and overwrite existing answers
-                if answers_payload:
-                    for a in answers_payload:
-                        qid = a.get('question') or a.get('question_id')
-                        ans_text = a.get('student_answer') or a.get('answer') or ''
-                        try:
-                            q = Question.objects.get(id=qid)
-                        except Question.DoesNotExist:
-                            continue
-                        ta, created = TestAnswer.objects.update_or_create(
-                            submission=existing, question=q,
-                            defaults={'student_answer': ans_text}
-                        )
+                with transaction.atomic():
+                    existing.status = 'submitted'
+                    existing.submit_time = submit_time
+                    existing.save()
+                    # Optionally accept new answers and overwrite existing answers
+                    if answers_payload:
+                        grading.upsert_answers(existing, answers_payload)
                 serializer = self.get_serializer(existing)
                 return Response(serializer.data, status=status.HTTP_200_OK)
 
-            # Create a new submission record
-            submission = TestSubmission.objects.create(
-                test=test,
-                student=user,
-                submit_time=submit_time,
-                status='submitted'
-            )
-
-            # Auto-grade if answers provided
-            total_awarded = 0
-            for a in answers_payload:
-                qid = a.get('question') or a.get('question_id')
-                ans_text = a.get('student_answer') or a.get('answer') or ''
-                try:
-                    q = Question.objects.get(id=qid)
-                except Question.DoesNotExist:
-                    continue
-                is_correct = False
-                marks_awarded = None
-                try:
-                    correct = (q.correct_answer or '').strip().lower()
-                    if correct and ans_text and correct == str(ans_text).strip().lower():
-                        is_correct = True
-                        marks_awarded = float(q.marks or 0)
-                        total_awarded += marks_awarded
-                    else:
-                        marks_awarded = 0
-                except Exception:
-                    marks_awarded = 0
-
-                TestAnswer.objects.create(
-                    submission=submission,
-                    question=q,
-                    student_answer=ans_text,
-                    is_correct=is_correct,
-                    marks_awarded=marks_awarded
+            # Create the submission, then auto-grade all answers against the
+            # test's questions (loaded once) and store them in one bulk insert
+            with transaction.atomic():
+                submission = TestSubmission.objects.create(
+                    test=test,
+                    student=user,
+                    submit_time=submit_time,
+                    status='submitted'
                 )
-
-            # Update submission marks and grade if test.total_marks available
-            try:
-                submission.marks_obtained = total_awarded
-                percentage = 0
-                if test.total_marks and float(test.total_marks) > 0:
-                    percentage = round((total_awarded / float(test.total_marks)) * 100)
-                # Simple grade mapping
-                if percentage >= 90:
-                    grade = 'A+'
-                elif percentage >= 85:
-                    grade = 'A'
-                elif percentage >= 80:
-                    grade = 'A-'
-                elif percentage >= 75:
-                    grade = 'B+'
-                elif percentage >= 70:
-                    grade = 'B'
-                elif percentage >= 65:
-                    grade = 'B-'
-                elif percentage >= 60:
-                    grade = 'C+'
-                elif percentage >= 55:
-                    grade = 'C'
-                elif percentage >= 50:
-                    grade = 'C-'
-                else:
-                    grade = 'F'
-                submission.grade = grade
-                submission.save()
-            except Exception:
-                # ignore grading errors but keep submission
-                submission.save()
+                grading.grade_new_submission(submission, answers_payload)
 
             serializer = self.get_serializer(submission)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -750,62 +719,20 @@ class TestAnswerViewSet(BaseModelViewSet):
     queryset = TestAnswer.objects.all()
     serializer_class = TestAnswerSerializer
     
-    def _recalculate_submission(self, submission_id):
-        try:
-            submission = TestSubmission.objects.get(id=submission_id)
-        except TestSubmission.DoesNotExist:
-            return
-
-        answers = submission.answers.all()
-        total_awarded = 0.0
-        for a in answers:
-            # prefer stored marks_awarded; if missing, attempt to infer from question.correct_answer
-            if a.marks_awarded is not None:
-                try:
-                    total_awarded += float(a.marks_awarded)
-                except Exception:
-                    pass
-            else:
-                try:
-                    correct = (a.question.correct_answer or '').strip().lower()
-                    ans = (a.student_answer or '').strip().lower()
-                    if correct and ans and correct == ans:
-                        total_awarded += float(a.question.marks or 0)
-                except Exception:
-                    pass
-
-        submission.marks_obtained = total_awarded
-        # compute percentage and grade if possible
-        try:
-            percentage = 0
-            if submission.test and submission.test.total_marks and float(submission.test.total_marks) > 0:
-                percentage = round((total_awarded / float(submission.test.total_marks)) * 100)
-            # Simple grade mapping
-            if percentage >= 90:
-                grade = 'A+'
-            elif percentage >= 85:
-                grade = 'A'
-            elif percentage >= 80:
-                grade = 'A-'
-            elif percentage >= 75:
-                grade = 'B+'
-            elif percentage >= 70:
-                grade = 'B'
-            elif percentage >= 65:
-                grade = 'B-'
-            elif percentage >= 60:
-                grade = 'C+'
-            elif percentage >= 55:
-                grade = 'C'
-            elif percentage >= 50:
-                grade = 'C-'
-            else:
-                grade = 'F'
-            submission.grade = grade
-        except Exception:
-            pass
+    def _apply_answer_change(self, old_submission_id, old_marks, answer):
+        """Incrementally update submission totals after one answer changed.
 
-        submission.save()
+        Only the delta of the changed answer is applied (see
+        `grading.apply_score_delta`); use `manage.py rebuild_test_scores` to
+        recompute totals from scratch if they ever drift.
+        """
+        new_marks = grading.answer_marks(answer)
+        if old_submission_id and old_submission_id != answer.submission_id:
+            # answer moved to another submission: take its marks off the old one
+            grading.apply_score_delta(old_submission_id, -old_marks)
+            old_marks = 0
+        if answer.submission_id:
+            grading.apply_score_delta(answer.submission_id, new_marks - old_marks)
 
     def create(self, request, *args, **kwargs):
         # Normalize common client-side field aliases to ensure student_answer is persisted
@@ -854,17 +781,13 @@ class TestAnswerViewSet(BaseModelViewSet):
         # Use serializer flow to create answer(s)
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
+        # the answer and its marks on the submission total are saved together:
+        # a failed delta must not leave the total out of step with the answers
+        with transaction.atomic():
+            self.perform_create(serializer)
+            self._apply_answer_change(None, 0, serializer.instance)
         headers = self.get_success_headers(serializer.data)
 
-        # Recalculate submission aggregates
-        submission_id = serializer.data.get('submission') or data.get('submission')
-        try:
-            if submission_id:
-                self._recalculate_submission(submission_id)
-        except Exception:
-            pass
-
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     def update(self, request, *args, **kwargs):
@@ -902,27 +825,132 @@ class TestAnswerViewSet(BaseModelViewSet):
             if course_instructor != user and getattr(instance.submission.test, 'created_by', None) != user and getattr(user, 'role', None) != 'admin':
                 return Response({'detail': 'Teacher not authorized for this submission.'}, status=status.HTTP_403_FORBIDDEN)
 
-        serializer = self.get_serializer(instance, data=data, partial=partial)
-        serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
+        with transaction.atomic():
+            # lock the answer so concurrent autosaves of it apply their deltas one
+            # after the other, each against the marks the previous one left
+            instance = TestAnswer.objects.select_for_update().get(pk=instance.pk)
+            # remember what this answer contributed before the update
+            old_submission_id = instance.submission_id
+            old_marks = grading.answer_marks(instance)
 
-        submission_id = serializer.data.get('submission') or data.get('submission') or (instance.submission.id if instance.submission else None)
-        try:
-            if submission_id:
-                self._recalculate_submission(submission_id)
-        except Exception:
-            pass
+            serializer = self.get_serializer(instance, data=data, partial=partial)
+            serializer.is_valid(raise_exception=True)
+            self.perform_update(serializer)
+            self._apply_answer_change(old_submission_id, old_marks, serializer.instance)
 
         return Response(serializer.data)
 
 
+class AttendanceStatsPagination(PageNumberPagination):
+    # large courses: let clients fetch bigger pages of per-student rows
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
 class AttendanceRecordViewSet(BaseModelViewSet):
     queryset = AttendanceRecord.objects.all()
     serializer_class = AttendanceRecordSerializer
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Mark a whole class at once.
+
+        POST /api/attendance/bulk/ {"course": 1, "date": "2024-05-01",
+        "records": [{"student": 7, "status": "present", "notes": ""}, ...]}
+
+        Only the course instructor or an admin may mark. Returns a result per
+        record ("created", "updated" or "error" with a message).
+        """
+        from django.utils.dateparse import parse_date
+
+        user = request.user
+        if getattr(user, 'role', None) not in ('teacher', 'admin'):
+            return Response({'detail': 'Only teachers and admins can mark attendance.'}, status=status.HTTP_403_FORBIDDEN)
+
+        course_id = request.data.get('course')
+        records = request.data.get('records')
+        try:
+            date = parse_date(str(request.data.get('date') or ''))
+        except ValueError:
+            date = None
+        if not course_id:
+            return Response({'detail': 'course field is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        if date is None:
+            return Response({'detail': 'date must be a YYYY-MM-DD date.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(records, list) or not records:
+            return Response({'detail': 'records must be a non-empty list.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(records) > attendance.max_bulk_rows():
+            return Response(
+                {'detail': f'At most {attendance.max_bulk_rows()} records per request.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            course = Course.objects.only('id', 'instructor_id').get(id=course_id)
+        except (Course.DoesNotExist, ValueError, TypeError):
+            return Response({'detail': 'Course not found.'}, status=status.HTTP_404_NOT_FOUND)
+        if user.role != 'admin' and course.instructor_id != user.id:
+            return Response({'detail': 'You can only mark attendance for your own courses.'}, status=status.HTTP_403_FORBIDDEN)
+
+        results = attendance.mark_bulk(course, date, records, user)
+        return Response({
+            'course': course.id,
+            'date': date.isoformat(),
+            'created': sum(1 for r in results if r['result'] == 'created'),
+            'updated': sum(1 for r in results if r['result'] == 'updated'),
+            'errors': sum(1 for r in results if r['result'] == 'error'),
+            'results': results,
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def stats(self, request):
+        """
+        Attendance counts and rates grouped per student or per course.
+
+        GET /api/attendance/stats/?group=student|course&course=&student=&from=YYYY-MM-DD&to=YYYY-MM-DD
+
+        Rows are paginated; `summary` covers every matching record. Teachers
+        see their own courses, students their own attendance.
+        """
+        from django.utils.dateparse import parse_date
+
+        params = request.query_params
+        group = params.get('group', 'student')
+        if group not in attendance.STATS_GROUPS:
+            return Response({'detail': 'group must be "student" or "course".'}, status=status.HTTP_400_BAD_REQUEST)
+
+        records = AttendanceRecord.objects.all()
+        role = getattr(request.user, 'role', None)
+        if role == 'teacher':
+            records = records.filter(course__instructor=request.user)
+        elif role != 'admin':
+            records = records.filter(student=request.user)
+
+        for param, lookup in (('course', 'course_id'), ('student', 'student_id')):
+            if params.get(param):
+                if not params[param].isdigit():
+                    return Response({'detail': f'{param} must be an id.'}, status=status.HTTP_400_BAD_REQUEST)
+                records = records.filter(**{lookup: params[param]})
+        for param, lookup in (('from', 'date__gte'), ('to', 'date__lte')):
+            if params.get(param):
+                try:
+                    value = parse_date(params[param])
+                except ValueError:
+                    value = None
+                if value is None:
+                    return Response({'detail': f'{param} must be a YYYY-MM-DD date.'}, status=status.HTTP_400_BAD_REQUEST)
+                records = records.filter(**{lookup: value})
+
+        paginator = AttendanceStatsPagination()
+        page = paginator.paginate_queryset(attendance.stats_rows(records, group), request, view=self)
+        response = paginator.get_paginated_response([attendance.with_rates(row) for row in page])
+        response.data['summary'] = attendance.stats_summary(records)
+        return response
+
 
 class LibraryItemViewSet(BaseModelViewSet):
-    queryset = LibraryItem.objects.all()
+    queryset = LibraryItem.objects.select_related('uploaded_by').only(*nested_user_only(LibraryItem, 'uploaded_by'))
     serializer_class = LibraryItemSerializer
     filter_backends = (filters.SearchFilter, filters.OrderingFilter)
     search_fields = ('title', 'category', 'subject')
@@ -949,7 +977,7 @@ class EventViewSet(BaseModelViewSet):
 
 
 class LiveClassViewSet(BaseModelViewSet):
-    queryset = LiveClass.objects.all()
+    queryset = LiveClass.objects.select_related('instructor').only(*nested_user_only(LiveClass, 'instructor'))
     serializer_class = LiveClassSerializer
     from .permissions import IsTeacherOrAdmin
     write_permission_classes = [IsTeacherOrAdmin]
@@ -1085,109 +1113,23 @@ class AnnouncementViewSet(BaseModelViewSet):
         try:
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
-            # perform_create will set created_by if available
-            try:
-                self.perform_create(serializer)
-            except Exception:
-                # If perform_create fails, still attempt serializer.save()
-                serializer.save()
+            # In-app/email/SMS notifications go out through the delivery worker (process_announcement_deliveries);
+            # the announcement and its delivery job are committed together, so an announcement is never
+            # saved without the job that sends it. The response carries the job id so clients can poll its progress.
+            with transaction.atomic():
+                # perform_create will set created_by if available
+                try:
+                    with transaction.atomic():
+                        self.perform_create(serializer)
+                except Exception:
+                    # If perform_create fails, still attempt serializer.save()
+                    serializer.save()
+                job = delivery.enqueue_announcement(serializer.instance)
             headers = self.get_success_headers(serializer.data)
+            data = dict(serializer.data)
+            data['delivery_job_id'] = job.id if job else None
 
-            # After creating the announcement, attempt to send notifications for selected channels.
-            try:
-                # Reload instance to get full model (including JSON fields)
-                ann_id = serializer.data.get('id') or serializer.data.get('pk')
-                if ann_id:
-                    try:
-                        ann_obj = Announcement.objects.get(id=ann_id)
-                    except Exception:
-                        ann_obj = None
-                else:
-                    ann_obj = None
-
-                if ann_obj:
-                    channels = (ann_obj.channels or [])
-                    audience = (ann_obj.audience or '').lower() if ann_obj.audience else 'all'
-
-                    # Determine recipients
-                    users_qs = None
-                    if audience == 'students':
-                        users_qs = User.objects.filter(role='student').exclude(email__isnull=True).exclude(email='')
-                    elif audience == 'teachers':
-                        users_qs = User.objects.filter(role='teacher').exclude(email__isnull=True).exclude(email='')
-                    else:
-                        users_qs = User.objects.exclude(email__isnull=True).exclude(email='')
-
-                    # Send emails if requested and email backend configured
-                    if 'email' in channels and users_qs.exists():
-                        logger = logging.getLogger(__name__)
-                        try:
-                            recipient_list = list(filter(None, set(users_qs.values_list('email', flat=True))))
-                            if recipient_list:
-                                from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or 'no-reply@example.com'
-                                subject = ann_obj.title or 'Announcement'
-                                message = ann_obj.body or ''
-                                # Send in batches to avoid SMTP limits for large recipient lists
-                                batch_size = getattr(settings, 'ANNOUNCEMENT_EMAIL_BATCH_SIZE', 100)
-                                smtp_host = getattr(settings, 'EMAIL_HOST', None)
-                                smtp_port = getattr(settings, 'EMAIL_PORT', None)
-                                for i in range(0, len(recipient_list), batch_size):
-                                    batch = recipient_list[i:i+batch_size]
-                                    try:
-                                        send_mail(subject, message, from_email, batch, fail_silently=False)
-                                    except Exception as e_batch:
-                                        tb = traceback.format_exc()
-                                        logger.error('Failed to send announcement email batch (%d-%d) via SMTP %s:%s: %s', i, i+len(batch), smtp_host, smtp_port, e_batch)
-                                        logger.debug(tb)
-                                        # Fallback: attempt to print to console backend so devs can see output
-                                        try:
-                                            conn = get_connection('django.core.mail.backends.console.EmailBackend')
-                                            emails = []
-                                            for rcpt in batch:
-                                                emails.append(EmailMessage(subject=subject, body=message, from_email=from_email, to=[rcpt], connection=conn))
-                                            conn.send_messages(emails)
-                                            logger.info('Fallback: printed announcement email batch (%d-%d) to console backend', i, i+len(batch))
-                                        except Exception as e_fallback:
-                                            tb2 = traceback.format_exc()
-                                            logger.exception('Fallback console backend also failed for batch (%d-%d): %s', i, i+len(batch), e_fallback)
-                                            logger.debug(tb2)
-                        except Exception as e:
-                            tb_outer = traceback.format_exc()
-                            logging.getLogger(__name__).exception('Failed to prepare/send announcement emails: %s', e)
-                            logging.getLogger(__name__).debug(tb_outer)
-
-                    # Send SMS if requested and Twilio config exists
-                    if 'sms' in channels:
-                        tw_sid = getattr(settings, 'TWILIO_ACCOUNT_SID', None)
-                        tw_token = getattr(settings, 'TWILIO_AUTH_TOKEN', None)
-                        tw_from = getattr(settings, 'TWILIO_FROM_NUMBER', None)
-                        if tw_sid and tw_token and tw_from:
-                            # Collect phone numbers from users (both students and teachers depending on audience)
-                            phone_qs = None
-                            if audience == 'students':
-                                phone_qs = User.objects.filter(role='student').exclude(phone__isnull=True).exclude(phone='')
-                            elif audience == 'teachers':
-                                phone_qs = User.objects.filter(role='teacher').exclude(phone__isnull=True).exclude(phone='')
-                            else:
-                                phone_qs = User.objects.exclude(phone__isnull=True).exclude(phone='')
-
-                            for phone in phone_qs.values_list('phone', flat=True):
-                                try:
-                                    payload = {'From': tw_from, 'To': phone, 'Body': ann_obj.body or ann_obj.title}
-                                    url = f'https://api.twilio.com/2010-04-01/Accounts/{tw_sid}/Messages.json'
-                                    r = requests.post(url, data=payload, auth=(tw_sid, tw_token), timeout=10)
-                                    if r.status_code >= 400:
-                                        print('Twilio SMS send failed for', phone, 'status', r.status_code, r.text)
-                                except Exception as e:
-                                    print('Error sending SMS to', phone, e)
-                        else:
-                            print('SMS channel requested but Twilio not configured in settings; skipping SMS sends.')
-
-            except Exception as notify_exc:
-                # Do not fail announcement creation if notifications fail; just log
-                print('Error while sending announcement notifications:', notify_exc)
-
-            return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+            return Response(data, status=status.HTTP_201_CREATED, headers=headers)
         except Exception as e:
             import traceback as _tb
             tb = _tb.format_exc()
@@ -1198,8 +1140,45 @@ class AnnouncementViewSet(BaseModelViewSet):
             return Response({'detail': 'Unexpected server error creating Announcement.', 'error': str(e), 'trace': tb}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class AnnouncementDeliveryViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Progress of queued announcement email/SMS deliveries.
+
+    - Teachers see the jobs of their own announcements, admins see all
+    - Filter by announcement via ?announcement=<id>
+    - recipients/ lists per-recipient status, optionally filtered by ?status=
+    """
+    serializer_class = AnnouncementDeliverySerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        qs = AnnouncementDelivery.objects.all()
+        if getattr(user, 'role', None) != 'admin':
+            qs = qs.filter(announcement__created_by=user)
+        announcement_id = self.request.query_params.get('announcement')
+        if announcement_id:
+            try:
+                qs = qs.filter(announcement_id=int(announcement_id))
+            except (TypeError, ValueError):
+                return qs.none()
+        return qs
+
+    @action(detail=True, methods=['get'])
+    def recipients(self, request, pk=None):
+        job = self.get_object()
+        qs = job.recipients.order_by('id')
+        status_param = request.query_params.get('status')
+        if status_param:
+            qs = qs.filter(status=status_param)
+        page = self.paginate_queryset(qs)
+        if page is not None:
+            return self.get_paginated_response(AnnouncementDeliveryRecipientSerializer(page, many=True).data)
+        return Response(AnnouncementDeliveryRecipientSerializer(qs, many=True).data)
+
+
 class UploadViewSet(BaseModelViewSet):
-    queryset = Upload.objects.all()
+    queryset = Upload.objects.select_related('blob')
     serializer_class = UploadSerializer
 
     def create(self, request, *args, **kwargs):
@@ -1207,33 +1186,16 @@ class UploadViewSet(BaseModelViewSet):
         if not file:
             return Response({'detail': 'No file provided.'}, status=status.HTTP_400_BAD_REQUEST)
         # validate file size and type
-        max_mb = getattr(settings, 'MAX_UPLOAD_MB', 20)
-        allowed_types = getattr(settings, 'ALLOWED_UPLOAD_MIME_TYPES', ['application/pdf', 'image/png', 'image/jpeg', 'video/mp4', 'application/zip'])
+        max_mb = uploads.max_upload_mb()
+        allowed_types = uploads.allowed_types()
         if file.size > max_mb * 1024 * 1024:
             return Response({'detail': f'File too large. Max {max_mb} MB.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Prefer content-based detection when python-magic is available.
-        detected_mime = None
-        try:
-            import magic
-            # read a small sample from the uploaded file without consuming it
-            sample = file.read(2048)
-            file.seek(0)
-            detected_mime = magic.from_buffer(sample, mime=True)
-        except Exception:
-            detected_mime = None
-
-        # If magic couldn't detect a specific MIME (or returned generic
-        # application/octet-stream), fall back to the provided content_type
-        # or infer from the filename extension so common archive uploads
-        # like ZIPs aren't rejected spuriously.
-        import mimetypes
+        # read a small sample from the uploaded file without consuming it
+        sample = file.read(uploads.SNIFF_BYTES)
+        file.seek(0)
         fallback_ct = getattr(file, 'content_type', None)
-        if not detected_mime or detected_mime == 'application/octet-stream':
-            ext_ct, _ = mimetypes.guess_type(file.name)
-            content_type = ext_ct or fallback_ct or 'application/octet-stream'
-        else:
-            content_type = detected_mime
+        content_type, detected_mime = uploads.detect_content_type(sample, file.name, fallback_ct)
 
         if allowed_types and content_type not in allowed_types:
             detail = f'Invalid file type: {fallback_ct}'
@@ -1254,25 +1216,107 @@ class UploadViewSet(BaseModelViewSet):
                         # ignore directory create errors; storage.save will surface them
                         pass
 
-            # Save file using configured storage backend (S3, local FS, etc.)
-            path = default_storage.save(file.name, file)
-            url = default_storage.url(path)
-            upload = Upload.objects.create(file_name=file.name, file_url=url, uploaded_by=request.user if request.user.is_authenticated else None)
-            return Response({'id': upload.id, 'url': url}, status=status.HTTP_201_CREATED)
+            # Save file using configured storage backend (S3, local FS, etc.),
+            # once per distinct content
+            upload = blobs.store(file, file.name, request.user if request.user.is_authenticated else None)
+            return Response({'id': upload.id, 'url': upload.file_url}, status=status.HTTP_201_CREATED)
         except Exception as e:
             # Return an informative error to the client for easier debugging
             import traceback
             tb = traceback.format_exc()
             return Response({'detail': 'Failed to save uploaded file', 'error': str(e), 'trace': tb}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @staticmethod
+    def _upload_error(error):
+        data = {'detail': error.detail}
+        if error.offset is not None:
+            data['offset'] = error.offset
+        return Response(data, status=error.status_code)
+
+    @action(detail=False, methods=['post'], url_path='chunked', permission_classes=[permissions.IsAuthenticated])
+    def chunked_start(self, request):
+        """POST /api/uploads/chunked/ {file_name, size, content_type?} -- open a resumable upload."""
+        try:
+            session = uploads.start(
+                request.user, request.data.get('file_name'), request.data.get('size'), request.data.get('content_type'),
+            )
+        except uploads.UploadError as e:
+            return self._upload_error(e)
+        return Response(uploads.describe(session), status=status.HTTP_201_CREATED)
+
+    @action(
+        detail=False, methods=['get', 'put', 'delete'], url_path=r'chunked/(?P<session_id>[0-9a-f-]+)',
+        permission_classes=[permissions.IsAuthenticated],
+    )
+    def chunked(self, request, session_id=None):
+        """GET the resume offset, PUT one chunk at `?offset=`, or DELETE to abort."""
+        try:
+            if request.method == 'GET':
+                return Response(uploads.describe(uploads.get(session_id, request.user)))
+            if request.method == 'DELETE':
+                uploads.abort(session_id, request.user)
+                return Response(status=status.HTTP_204_NO_CONTENT)
+            offset = request.query_params.get('offset', request.META.get('HTTP_UPLOAD_OFFSET'))
+            # read the raw body as a stream: request.body would buffer the chunk
+            # in memory and trip DATA_UPLOAD_MAX_MEMORY_SIZE
+            session = uploads.write_chunk(session_id, request.user, offset, request._request)
+        except uploads.UploadError as e:
+            return self._upload_error(e)
+        return Response(uploads.describe(session))
+
+    @action(
+        detail=False, methods=['post'], url_path=r'chunked/(?P<session_id>[0-9a-f-]+)/finalize',
+        permission_classes=[permissions.IsAuthenticated],
+    )
+    def chunked_finalize(self, request, session_id=None):
+        """POST /api/uploads/chunked/<id>/finalize/ -- create the Upload once all bytes arrived."""
+        try:
+            session = uploads.finish(session_id, request.user)
+        except uploads.UploadError as e:
+            return self._upload_error(e)
+        return Response({'id': session.upload.id, 'url': session.upload.file_url}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='presign', permission_classes=[permissions.IsAuthenticated])
+    def presign_upload(self, request):
+        """POST /api/uploads/presign/ {file_name, size, content_type?, method?, assignment?}
+
+        Presigned POST/PUT straight to the bucket (USE_S3=1). Pass `assignment`
+        to submit the file to an assignment on completion.
+        """
+        try:
+            assignment = None
+            if request.data.get('assignment'):
+                assignment = presign.assignment_for(request.user, request.data.get('assignment'))
+            data = presign.issue(
+                request.user, request.data.get('file_name'), request.data.get('size'),
+                request.data.get('content_type'), request.data.get('method'), assignment,
+            )
+        except uploads.UploadError as e:
+            return self._upload_error(e)
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='presign/complete', permission_classes=[permissions.IsAuthenticated])
+    def presign_complete(self, request):
+        """POST /api/uploads/presign/complete/ {token, submission_text?} -- record a direct upload."""
+        try:
+            upload, submission, created = presign.complete(
+                request.user, request.data.get('token'), request.data.get('submission_text') or '',
+            )
+        except uploads.UploadError as e:
+            return self._upload_error(e)
+        code = status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        if submission is not None:
+            return Response(AssignmentSubmissionSerializer(submission, context=self.get_serializer_context()).data, status=code)
+        return Response({'id': upload.id, 'url': upload.file_url}, status=code)
+
 
 class StudentProfileViewSet(BaseModelViewSet):
-    queryset = StudentProfile.objects.all()
+    queryset = StudentProfile.objects.select_related('user').only(*nested_user_only(StudentProfile, 'user'))
     serializer_class = StudentProfileSerializer
 
 
 class TeacherProfileViewSet(BaseModelViewSet):
-    queryset = TeacherProfile.objects.all()
+    queryset = TeacherProfile.objects.select_related('user').only(*nested_user_only(TeacherProfile, 'user'))
     serializer_class = TeacherProfileSerializer
 
 
@@ -1321,7 +1365,7 @@ class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
         # Only admins can view activity logs
         if self.request.user and self.request.user.role == 'admin':
             try:
-                return ActivityLog.objects.all().order_by('-created_at')[:50]  # Last 50 activities
+                return ActivityLog.objects.select_related('user', 'course').order_by('-created_at')[:50]  # Last 50 activities
             except Exception:
                 # Return empty queryset if database is unavailable
                 return ActivityLog.objects.none()
@@ -1367,13 +1411,15 @@ class NotificationViewSet(viewsets.ModelViewSet):
         
         try:
             # Start with notifications for current user, ordered by creation date (newest first)
-            queryset = Notification.objects.filter(user=user).order_by('-created_at')
+            queryset = Notification.objects.filter(user=user).select_related('user').order_by('-created_at')
             
             # Filter by read status if provided
             read_param = self.request.query_params.get('read', None)
             if read_param is not None:
                 is_read = read_param.lower() in ['true', '1', 'yes']
-                queryset = queryset.filter(read=is_read)
+                # `read=False` compiles to `NOT read`, which SQLite cannot match against
+                # core_notif_user_read_idx; IN compares the column and uses the index
+                queryset = queryset.filter(read__in=[is_read])
             
             return queryset
         except Exception:
@@ -1433,7 +1479,7 @@ class CourseRatingViewSet(BaseModelViewSet):
     ViewSet for course ratings. Students can rate courses they are enrolled in.
     Ratings cannot be updated or deleted once submitted.
     """
-    queryset = CourseRating.objects.all()
+    queryset = CourseRating.objects.select_related('student')
     serializer_class = CourseRatingSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -1483,19 +1529,27 @@ class CourseRatingViewSet(BaseModelViewSet):
                     status=status.HTTP_403_FORBIDDEN
                 )
         
-        # Create rating
-        rating = CourseRating.objects.create(
-            course=course,
-            student=user,
-            rating=rating_value,
-            review=review
-        )
-        
-        # Update course average rating
-        from django.db.models import Avg
-        avg_rating = CourseRating.objects.filter(course=course).aggregate(avg=Avg('rating'))['avg']
-        course.average_rating = round(avg_rating, 2) if avg_rating else 0
-        course.save(update_fields=['average_rating'])
+        try:
+            rating_value = Decimal(str(rating_value))
+        except (InvalidOperation, ValueError):
+            return Response({'detail': 'rating must be a number.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not rating_value.is_finite():
+            return Response({'detail': 'rating must be a number.'}, status=status.HTTP_400_BAD_REQUEST)
+        if rating_value < 0 or rating_value > 5:
+            return Response({'detail': 'Rating must be between 0 and 5'}, status=status.HTTP_400_BAD_REQUEST)
+        # store and aggregate the same value the column keeps (one decimal place);
+        # only after the range check, as quantizing a huge value raises InvalidOperation
+        rating_value = rating_value.quantize(Decimal('0.1'))
+
+        # Create rating and fold it into the course's stored aggregates (no AVG scan)
+        with transaction.atomic():
+            rating = CourseRating.objects.create(
+                course=course,
+                student=user,
+                rating=rating_value,
+                review=review
+            )
+            ratings.apply_rating(course.id, rating_value)
         
         serializer = self.get_serializer(rating)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
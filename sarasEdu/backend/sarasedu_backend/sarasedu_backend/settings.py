@@ -164,6 +164,12 @@ if USE_S3:
     AWS_S3_VERIFY = os.environ.get('MINIO_SECURE', '0') == '1'
 else:
     DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
+    # Media is served by core.media after an access check. Behind nginx set
+    # MEDIA_ACCEL_REDIRECT_PREFIX to an `internal` location aliasing MEDIA_ROOT
+    # (e.g. /protected-media/); behind Apache/lighttpd set MEDIA_SENDFILE_HEADER
+    # (e.g. X-Sendfile). Otherwise Django serves the bytes (with Range support).
+    MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX') or None
+    MEDIA_SENDFILE_HEADER = os.environ.get('MEDIA_SENDFILE_HEADER') or None
 
     # Email settings: default to console backend in development, allow SMTP via env in prod
     EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
@@ -1,7 +1,15 @@
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+from core.views import ProtectedMediaView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('core.urls')),
 ]
+
+if not getattr(settings, 'USE_S3', False):
+    # local media is served through an access check (see core.media)
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), ProtectedMediaView.as_view(), name='protected_media'),
+    ]
@@ -0,0 +1,77 @@
+"""
+EXPLAIN helpers for asserting that queries are served by an index.
+
+`main_select(queries, table)` picks the list query an endpoint ran against a
+table from a CaptureQueriesContext, and `IndexUsageMixin.assertUsesIndex`
+runs the database's EXPLAIN on it and fails on a full table scan.
+"""
+import json
+import re
+
+from django.db import connection
+
+
+def main_select(captured_queries, table):
+    """SQL of the last SELECT reading FROM `table` (the page query of a list endpoint)."""
+    pattern = re.compile(r'\bFROM\s+[`"]?%s[`"]?(\s|$)' % re.escape(table), re.IGNORECASE)
+    selects = [
+        q['sql'] for q in captured_queries
+        if q['sql'].lstrip().upper().startswith('SELECT') and pattern.search(q['sql'])
+    ]
+    if not selects:
+        raise AssertionError(f'No SELECT from {table} was captured')
+    return selects[-1]
+
+
+def explain(sql):
+    """Return the backend's plan for `sql` as a list of strings."""
+    vendor = connection.vendor
+    with connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+        if vendor == 'mysql':
+            cursor.execute('EXPLAIN FORMAT=JSON ' + sql)
+            return [cursor.fetchone()[0]]
+        cursor.execute('EXPLAIN ' + sql)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def full_scans(plan, table):
+    """Plan lines showing a full scan of `table` (empty when an index is used)."""
+    vendor = connection.vendor
+    if vendor == 'sqlite':
+        # "SCAN t" is a full scan; "SCAN t USING INDEX i" walks an index in order
+        return [line for line in plan if re.match(r'SCAN %s(\s|$)' % re.escape(table), line) and 'INDEX' not in line]
+    if vendor == 'mysql':
+        scans = []
+
+        def walk(node):
+            if isinstance(node, dict):
+                if node.get('table_name') == table and node.get('access_type') == 'ALL':
+                    scans.append(json.dumps(node))
+                for value in node.values():
+                    walk(value)
+            elif isinstance(node, list):
+                for value in node:
+                    walk(value)
+
+        walk(json.loads(plan[0]))
+        return scans
+    return [line for line in plan if f'Seq Scan on {table}' in line]
+
+
+class IndexUsageMixin:
+    """TestCase mixin asserting on query plans.
+
+    `assertUsesIndex(sql, table)` fails if EXPLAIN shows a full scan of
+    `table`; with `index`, that index must also appear in the plan.
+    """
+
+    def assertUsesIndex(self, sql, table, index=None):
+        plan = explain(sql)
+        details = '\n'.join(plan) + f'\nfor query:\n{sql}'
+        if full_scans(plan, table):
+            self.fail(f'Full scan of {table}:\n{details}')
+        if index and index not in '\n'.join(plan):
+            self.fail(f'{index} not used:\n{details}')
@@ -0,0 +1,169 @@
+"""
+Tests for the server-side dashboard analytics endpoints.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core import grading, heartbeats
+from core.models import (
+    AnalyticsCacheVersion, Course, Enrollment, Lecture, LectureProgress, Assignment, AssignmentSubmission, Test, TestSubmission,
+)
+
+User = get_user_model()
+
+
+class AnalyticsFixtureMixin:
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        self.other_teacher = User.objects.create_user(username='teacher2', password='pass12345', role='teacher')
+        self.admin = User.objects.create_user(username='admin', password='pass12345', role='admin')
+        self.student = User.objects.create_user(username='student', password='pass12345', role='student')
+        self.peer = User.objects.create_user(username='peer', password='pass12345', role='student')
+        self.course = Course.objects.create(title='Algebra', instructor=self.teacher)
+        self.other_course = Course.objects.create(title='Biology', instructor=self.other_teacher)
+        for student in (self.student, self.peer):
+            Enrollment.objects.create(student=student, course=self.course, progress_percentage=40)
+        self.test = Test.objects.create(
+            course=self.course, title='Midterm', test_type='test', scheduled_date=timezone.now(),
+            duration_minutes=30, total_marks=50, created_by=self.teacher,
+        )
+        self.assignment = Assignment.objects.create(
+            course=self.course, title='Homework', due_date=timezone.now() + timedelta(days=3), total_marks=20, created_by=self.teacher,
+        )
+        TestSubmission.objects.create(test=self.test, student=self.student, status='graded', marks_obtained=40)
+        TestSubmission.objects.create(test=self.test, student=self.peer, status='graded', marks_obtained=45)
+        AssignmentSubmission.objects.create(assignment=self.assignment, student=self.student, marks_obtained=10)
+        lecture = Lecture.objects.create(course=self.course, title='L1', order_index=1)
+        LectureProgress.objects.create(
+            student=self.student, lecture=lecture, status='completed', watch_time_minutes=90, completed_at=timezone.now(),
+        )
+        self.client = APIClient()
+
+
+class StudentAnalyticsTestCase(AnalyticsFixtureMixin, TestCase):
+    def _get(self, user, student_id=None, time_range='monthly'):
+        self.client.force_authenticate(user)
+        return self.client.get(f'/api/analytics/student/{student_id or self.student.id}/?timeRange={time_range}')
+
+    def test_report(self):
+        response = self._get(self.student)
+        self.assertEqual(response.status_code, 200)
+        overview = response.data['overview']
+        self.assertEqual(overview['overallScore'], 25)  # (40 + 10) / 2
+        self.assertEqual(overview['rank'], 2)  # peer averages 45
+        self.assertEqual((overview['totalCourses'], overview['totalStudents'], overview['studyHours']), (1, 2, 2))
+        course = response.data['coursePerformance'][0]
+        self.assertEqual((course['course'], course['score'], course['progress'], course['tests'], course['assignments']), ('Algebra', 25, 40, 1, 1))
+        self.assertEqual(len(response.data['studyActivity']), 30)
+        self.assertEqual(response.data['studyActivity'][-1]['hours'], 1.5)
+        self.assertEqual({r['type'] for r in response.data['recentScores']}, {'Test', 'Assignment'})
+
+    def test_time_range_window(self):
+        TestSubmission.objects.filter(student=self.student).update(start_time=timezone.now() - timedelta(days=20))
+        response = self._get(self.student, time_range='weekly')
+        self.assertEqual(response.data['overview']['overallScore'], 10)
+        self.assertEqual(len(response.data['studyActivity']), 7)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as small:
+            self._get(self.student)
+        for i in range(5):
+            course = Course.objects.create(title=f'C{i}', instructor=self.teacher)
+            Enrollment.objects.create(student=self.student, course=course)
+            test = Test.objects.create(
+                course=course, title=f'T{i}', test_type='quiz', scheduled_date=timezone.now(),
+                duration_minutes=10, total_marks=10, created_by=self.teacher,
+            )
+            TestSubmission.objects.create(test=test, student=self.student, marks_obtained=i)
+        with CaptureQueriesContext(connection) as large:
+            response = self._get(self.student)
+        self.assertEqual(len(response.data['coursePerformance']), 6)
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+
+    def test_access_rules(self):
+        self.assertEqual(self._get(self.peer).status_code, 403)
+        self.assertEqual(self._get(self.other_teacher).status_code, 403)
+        self.assertEqual(self._get(self.teacher).status_code, 200)
+        self.assertEqual(self._get(self.admin).status_code, 200)
+        self.assertEqual(self._get(self.admin, student_id=self.teacher.id).status_code, 404)
+
+
+class TeacherAnalyticsTestCase(AnalyticsFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def _get(self, user, teacher_id=None, time_range='monthly'):
+        self.client.force_authenticate(user)
+        return self.client.get(f'/api/analytics/teacher/{teacher_id or self.teacher.id}/?timeRange={time_range}')
+
+    def test_report(self):
+        response = self._get(self.teacher)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['overview'], {'totalStudents': 2, 'avgProgress': 40, 'avgScore': 32, 'studyTime': 5400})
+        self.assertEqual(response.data['engagement']['activeLearners'], 1)
+        metrics = {m['metric']: m['value'] for m in response.data['engagementMetrics']}
+        self.assertEqual(metrics, {
+            'Student Participation': 50, 'Assignment Completion': 100, 'Test Performance': 85, 'Course Completion': 0,
+        })
+        self.assertEqual(len(response.data['coursePerformance']), 1)  # only the teacher's own course
+        course = response.data['coursePerformance'][0]
+        self.assertEqual((course['course'], course['students'], course['avgScore'], course['submissionRate']), ('Algebra', 2, 32, 50))
+
+    def test_cached_until_submission_or_enrollment_write(self):
+        self._get(self.teacher)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._get(self.teacher)
+        self.assertFalse([q for q in ctx.captured_queries if 'core_enrollment' in q['sql']])
+        self.assertEqual(response.data['overview']['totalStudents'], 2)
+
+        newcomer = User.objects.create_user(username='newcomer', password='pass12345', role='student')
+        Enrollment.objects.create(student=newcomer, course=self.course)
+        self.assertEqual(self._get(self.teacher).data['overview']['totalStudents'], 3)
+
+        AssignmentSubmission.objects.create(assignment=self.assignment, student=self.peer, marks_obtained=20)
+        self.assertEqual(self._get(self.teacher).data['coursePerformance'][0]['submissionRate'], 67)
+
+    def test_other_teachers_writes_keep_cache(self):
+        self._get(self.teacher)
+        Enrollment.objects.create(student=self.student, course=self.other_course)
+        with CaptureQueriesContext(connection) as ctx:
+            self._get(self.teacher)
+        self.assertFalse([q for q in ctx.captured_queries if 'core_enrollment' in q['sql']])
+
+    def test_stored_version_retires_cached_report(self):
+        self._get(self.teacher)
+        newcomer = User.objects.create_user(username='newcomer', password='pass12345', role='student')
+        # bulk_create sends no signals: the report stays cached...
+        Enrollment.objects.bulk_create([Enrollment(student=newcomer, course=self.course)])
+        self.assertEqual(self._get(self.teacher).data['overview']['totalStudents'], 2)
+        # ...until the stored version moves, as when another process records a write
+        AnalyticsCacheVersion.objects.update_or_create(teacher=self.teacher, defaults={'version': 99})
+        self.assertEqual(self._get(self.teacher).data['overview']['totalStudents'], 3)
+
+    @override_settings(LECTURE_HEARTBEAT_FLUSH_SECONDS=3600)
+    def test_bulk_writes_retire_cached_report(self):
+        self._get(self.teacher)
+        submission = TestSubmission.objects.get(student=self.peer)
+        # autosave deltas are applied with .update(), which sends no signals
+        grading.apply_score_delta(submission.id, Decimal('-45'))
+        self.assertEqual(self._get(self.teacher).data['overview']['avgScore'], 17)  # (40 + 0 + 10) / 3
+
+        lecture = Lecture.objects.get(course=self.course)
+        heartbeats.record(self.peer.id, [{'lecture': lecture.id, 'position': 60, 'seconds': 600, 'completed': False}])
+        heartbeats.flush()
+        self.assertEqual(self._get(self.teacher).data['overview']['studyTime'], 6000)
+
+    def test_access_rules(self):
+        self.assertEqual(self._get(self.student).status_code, 403)
+        self.assertEqual(self._get(self.other_teacher).status_code, 403)
+        self.assertEqual(self._get(self.admin).status_code, 200)
+        self.assertEqual(self._get(self.admin, teacher_id=self.student.id).status_code, 404)
@@ -0,0 +1,177 @@
+"""
+Tests for the announcement delivery outbox and worker.
+"""
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core import delivery
+from core.models import Announcement, AnnouncementDelivery, AnnouncementDeliveryRecipient, Notification, UserSettings
+
+User = get_user_model()
+
+
+class AnnouncementDeliveryTestCase(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher', email='t@example.com')
+        for i in range(5):
+            User.objects.create_user(
+                username=f'student{i}', password='pass12345', role='student',
+                email=f's{i}@example.com', phone=f'+1555000{i}',
+            )
+        # duplicate address and a user without contact details
+        User.objects.create_user(username='dup', password='pass12345', role='student', email='s0@example.com')
+        User.objects.create_user(username='nomail', password='pass12345', role='student')
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def _create(self, **extra):
+        payload = {'title': 'Exam', 'body': 'Exam on Monday', 'audience': 'students', 'channels': ['in-app', 'email']}
+        payload.update(extra)
+        return self.client.post('/api/announcements/', payload, format='json')
+
+    def test_create_enqueues_without_sending(self):
+        response = self._create()
+        self.assertEqual(response.status_code, 201)
+        job_id = response.data['delivery_job_id']
+        self.assertIsNotNone(job_id)
+        self.assertEqual(len(mail.outbox), 0)
+        job = AnnouncementDelivery.objects.get(id=job_id)
+        self.assertEqual(job.status, 'pending')
+        self.assertEqual(job.channels, ['in-app', 'email'])
+        self.assertFalse(Notification.objects.exists())
+
+    def test_announcement_without_channels_has_no_job(self):
+        response = self._create(channels=[])
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(response.data['delivery_job_id'])
+        self.assertFalse(AnnouncementDelivery.objects.exists())
+
+    def test_worker_sends_email_and_records_status(self):
+        job_id = self._create().data['delivery_job_id']
+        out = StringIO()
+        call_command('process_announcement_deliveries', '--once', stdout=out)
+        self.assertIn('Processed 1 delivery job', out.getvalue())
+
+        job = AnnouncementDelivery.objects.get(id=job_id)
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.total_recipients, 5)
+        self.assertEqual(job.sent_count, 5)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertTrue(all(len(m.to) == 1 for m in mail.outbox))
+        self.assertFalse(AnnouncementDeliveryRecipient.objects.filter(delivery=job).exclude(status='sent').exists())
+
+        # running again does not resend anything
+        call_command('process_announcement_deliveries', '--once', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_scheduled_job_waits(self):
+        job_id = self._create(scheduled_for=(timezone.now() + timezone.timedelta(hours=1)).isoformat()).data['delivery_job_id']
+        self.assertIsNone(delivery.claim_next_job())
+        self.assertEqual(delivery.claim_next_job(now=timezone.now() + timezone.timedelta(hours=2)).id, job_id)
+
+    @override_settings(ANNOUNCEMENT_DELIVERY_STALE_SECONDS=900)
+    def test_busy_job_is_not_reclaimed(self):
+        self._create()
+        start = timezone.now()
+        job = delivery.claim_next_job(now=start)
+        later = start + timezone.timedelta(seconds=1000)
+        # a crashed worker's job is reclaimed...
+        self.assertEqual(delivery.claim_next_job(now=later).id, job.id)
+        # ...one that keeps recording batches is not
+        delivery.materialize_recipients(job)
+        with mock.patch('core.delivery.timezone.now', return_value=later):
+            delivery._record(job, list(job.recipients.all()[:1]))
+        self.assertIsNone(delivery.claim_next_job(now=later + timezone.timedelta(seconds=100)))
+
+    def test_failed_enqueue_rolls_back_announcement(self):
+        with mock.patch('core.delivery.enqueue_announcement', side_effect=RuntimeError('queue down')):
+            response = self._create()
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(Announcement.objects.exists())
+
+    @override_settings(TWILIO_ACCOUNT_SID='AC1', TWILIO_AUTH_TOKEN='tok', TWILIO_FROM_NUMBER='+10000000000', ANNOUNCEMENT_SMS_WORKERS=2)
+    def test_sms_failures_are_recorded_per_recipient(self):
+        job_id = self._create(channels=['sms']).data['delivery_job_id']
+
+        def fake_post(url, data=None, **kwargs):
+            return mock.Mock(status_code=400 if data['To'].endswith('3') else 201, text='bad number')
+
+        with mock.patch('core.delivery.requests.post', side_effect=fake_post) as post:
+            call_command('process_announcement_deliveries', '--once', stdout=StringIO())
+        self.assertEqual(post.call_count, 5)
+        job = AnnouncementDelivery.objects.get(id=job_id)
+        self.assertEqual((job.sent_count, job.failed_count), (4, 1))
+        failed = AnnouncementDeliveryRecipient.objects.get(delivery=job, status='failed')
+        self.assertEqual(failed.address, '+15550003')
+        self.assertIn('400', failed.error)
+
+    def test_job_is_visible_to_creator_only(self):
+        job_id = self._create().data['delivery_job_id']
+        response = self.client.get(f'/api/announcement-deliveries/{job_id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'pending')
+
+        student = User.objects.get(username='student0')
+        self.client.force_authenticate(student)
+        self.assertEqual(self.client.get(f'/api/announcement-deliveries/{job_id}/').status_code, 404)
+
+    def test_recipients_endpoint_lists_statuses(self):
+        announcement = Announcement.objects.create(title='A', body='B', audience='teachers', channels=['email'], created_by=self.teacher)
+        job = delivery.enqueue_announcement(announcement)
+        delivery.process_job(delivery.claim_next_job())
+        response = self.client.get(f'/api/announcement-deliveries/{job.id}/recipients/?status=sent')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['address'] for r in response.data['results']], ['t@example.com'])
+
+
+class InAppNotificationFanoutTestCase(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        self.students = [
+            User.objects.create_user(username=f'student{i}', password='pass12345', role='student')
+            for i in range(7)
+        ]
+
+    def _announce(self, audience):
+        return Announcement.objects.create(title='Holiday', body='No class', audience=audience, channels=['in-app'], created_by=self.teacher)
+
+    def test_audience_and_preferences_are_honoured(self):
+        UserSettings.objects.filter(user=self.students[0]).update(inapp_notifications=False)
+        UserSettings.objects.filter(user=self.students[1]).update(notify_announcements=False)
+        # users without a settings row get the defaults
+        UserSettings.objects.filter(user=self.students[2]).delete()
+
+        announcement = self._announce('students')
+        self.assertEqual(delivery.create_in_app_notifications(announcement), 5)
+        notified = set(Notification.objects.values_list('user_id', flat=True))
+        self.assertEqual(notified, {s.id for s in self.students[2:]})
+        n = Notification.objects.first()
+        self.assertEqual((n.notification_type, n.related_object_type, n.related_object_id), ('announcement', 'announcement', announcement.id))
+
+        # a retried job does not notify twice
+        self.assertEqual(delivery.create_in_app_notifications(announcement), 0)
+        self.assertEqual(Notification.objects.count(), 5)
+
+    @override_settings(NOTIFICATION_BULK_SIZE=3)
+    def test_rows_are_inserted_in_chunks(self):
+        announcement = self._announce('all')
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(delivery.create_in_app_notifications(announcement), 8)
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 3)
+
+    def test_worker_notifies_teachers(self):
+        job = delivery.enqueue_announcement(self._announce('teachers'))
+        call_command('process_announcement_deliveries', '--once', stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(list(Notification.objects.values_list('user_id', flat=True)), [self.teacher.id])
@@ -0,0 +1,61 @@
+"""
+Tests for assignment overdue handling: reads derive the status, the
+update_assignment_statuses command persists it.
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Course, Assignment
+
+User = get_user_model()
+
+
+class AssignmentStatusTestCase(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        self.course = Course.objects.create(title='Course', instructor=self.teacher)
+        self.future = Assignment.objects.create(
+            course=self.course, title='Future', due_date=timezone.now() + timedelta(days=2),
+            total_marks=10, created_by=self.teacher,
+        )
+        self.past = Assignment.objects.create(
+            course=self.course, title='Past', due_date=timezone.now() + timedelta(days=2),
+            total_marks=10, created_by=self.teacher,
+        )
+        # move the due date into the past without going through save() signals
+        Assignment.objects.filter(id=self.past.id).update(due_date=timezone.now() - timedelta(hours=3))
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def test_list_reports_effective_status_without_writing(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/assignments/')
+        self.assertEqual(response.status_code, 200)
+        statuses = {a['title']: a['status'] for a in response.data['results']}
+        self.assertEqual(statuses, {'Future': 'active', 'Past': 'overdue'})
+        for query in ctx.captured_queries:
+            self.assertTrue(query['sql'].lstrip().upper().startswith('SELECT'), query['sql'])
+        # stored status is untouched until the maintenance command runs
+        self.assertEqual(Assignment.objects.get(id=self.past.id).status, 'active')
+
+    def test_command_flips_overdue_assignments(self):
+        out = StringIO()
+        call_command('update_assignment_statuses', stdout=out)
+        self.assertIn('updated 1 assignment(s)', out.getvalue())
+        self.assertIn('ID %d: Past' % self.past.id, out.getvalue())
+        self.assertEqual(Assignment.objects.get(id=self.past.id).status, 'overdue')
+        self.assertEqual(Assignment.objects.get(id=self.future.id).status, 'active')
+
+    def test_command_dry_run_does_not_write(self):
+        out = StringIO()
+        call_command('update_assignment_statuses', '--dry-run', stdout=out)
+        self.assertIn('DRY RUN', out.getvalue())
+        self.assertEqual(Assignment.objects.get(id=self.past.id).status, 'active')
@@ -0,0 +1,73 @@
+"""
+Tests for bulk attendance marking (POST /api/attendance/bulk/).
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.models import Course, Enrollment, AttendanceRecord
+
+User = get_user_model()
+
+
+class BulkAttendanceTestCase(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        self.other_teacher = User.objects.create_user(username='teacher2', password='pass12345', role='teacher')
+        self.course = Course.objects.create(title='Algebra', instructor=self.teacher)
+        self.students = [
+            User.objects.create_user(username=f'student{i}', password='pass12345', role='student') for i in range(5)
+        ]
+        for student in self.students[:4]:
+            Enrollment.objects.create(student=student, course=self.course)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def _post(self, records, date='2024-05-01'):
+        return self.client.post(
+            '/api/attendance/bulk/', {'course': self.course.id, 'date': date, 'records': records}, format='json',
+        )
+
+    def test_creates_and_updates_in_one_request(self):
+        AttendanceRecord.objects.create(student=self.students[0], course=self.course, date='2024-05-01', status='absent')
+        response = self._post([
+            {'student': self.students[0].id, 'status': 'present', 'notes': 'arrived on time'},
+            {'student': self.students[1].id, 'status': 'late'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['updated'], response.data['errors']), (1, 1, 0))
+        self.assertEqual([r['result'] for r in response.data['results']], ['updated', 'created'])
+        record = AttendanceRecord.objects.get(student=self.students[0], course=self.course, date='2024-05-01')
+        self.assertEqual((record.status, record.notes, record.marked_by_id), ('present', 'arrived on time', self.teacher.id))
+        self.assertEqual(AttendanceRecord.objects.count(), 2)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        response = self._post([
+            {'student': self.students[0].id, 'status': 'present'},
+            {'student': self.students[4].id, 'status': 'present'},  # not enrolled
+            {'student': self.students[1].id, 'status': 'asleep'},
+            {'student': self.students[0].id, 'status': 'absent'},  # duplicate
+            {'status': 'present'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['result'] for r in response.data['results']], ['created', 'error', 'error', 'error', 'error'])
+        self.assertEqual(AttendanceRecord.objects.get().status, 'present')
+
+    def test_query_count_independent_of_class_size(self):
+        with CaptureQueriesContext(connection) as small:
+            self._post([{'student': self.students[0].id, 'status': 'present'}])
+        with CaptureQueriesContext(connection) as large:
+            self._post([{'student': s.id, 'status': 'absent'} for s in self.students[:4]], date='2024-05-02')
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+        self.assertEqual(AttendanceRecord.objects.filter(date='2024-05-02').count(), 4)
+
+    def test_access_and_validation(self):
+        self.client.force_authenticate(self.other_teacher)
+        self.assertEqual(self._post([{'student': self.students[0].id, 'status': 'present'}]).status_code, 403)
+        self.client.force_authenticate(self.students[0])
+        self.assertEqual(self._post([{'student': self.students[0].id, 'status': 'present'}]).status_code, 403)
+        self.client.force_authenticate(self.teacher)
+        self.assertEqual(self._post([], date='2024-05-01').status_code, 400)
+        self.assertEqual(self._post([{'student': self.students[0].id, 'status': 'present'}], date='May 1').status_code, 400)
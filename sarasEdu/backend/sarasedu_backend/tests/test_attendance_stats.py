@@ -0,0 +1,75 @@
+"""
+Tests for grouped attendance statistics (GET /api/attendance/stats/).
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.models import Course, AttendanceRecord
+
+User = get_user_model()
+
+
+class AttendanceStatsTestCase(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        self.other_teacher = User.objects.create_user(username='teacher2', password='pass12345', role='teacher')
+        self.admin = User.objects.create_user(username='admin', password='pass12345', role='admin')
+        self.course = Course.objects.create(title='Algebra', instructor=self.teacher)
+        self.other_course = Course.objects.create(title='Biology', instructor=self.other_teacher)
+        self.alice = User.objects.create_user(username='alice', password='pass12345', role='student')
+        self.bob = User.objects.create_user(username='bob', password='pass12345', role='student')
+        marks = {
+            self.alice: ['present', 'present', 'late', 'absent'],
+            self.bob: ['absent', 'absent'],
+        }
+        for student, statuses in marks.items():
+            for day, value in enumerate(statuses, start=1):
+                AttendanceRecord.objects.create(student=student, course=self.course, date=f'2024-05-0{day}', status=value)
+        AttendanceRecord.objects.create(student=self.alice, course=self.other_course, date='2024-05-01', status='present')
+        self.client = APIClient()
+
+    def _get(self, user, query=''):
+        self.client.force_authenticate(user)
+        return self.client.get(f'/api/attendance/stats/{query}')
+
+    def test_per_student_counts_and_rates(self):
+        response = self._get(self.teacher, '?course=%d' % self.course.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        alice, bob = response.data['results']
+        self.assertEqual((alice['student__username'], alice['total'], alice['present'], alice['late'], alice['absent']), ('alice', 4, 2, 1, 1))
+        self.assertEqual(alice['present_rate'], 50.0)
+        self.assertEqual((bob['absent'], bob['absent_rate']), (2, 100.0))
+        self.assertEqual(response.data['summary']['total'], 6)
+
+    def test_per_course_and_date_range(self):
+        response = self._get(self.admin, '?group=course&from=2024-05-02&to=2024-05-03')
+        rows = {row['course__title']: row for row in response.data['results']}
+        self.assertEqual(set(rows), {'Algebra'})
+        self.assertEqual((rows['Algebra']['total'], rows['Algebra']['present'], rows['Algebra']['late']), (3, 1, 1))
+
+    def test_scoping(self):
+        response = self._get(self.teacher, '?group=course')
+        self.assertEqual([row['course__title'] for row in response.data['results']], ['Algebra'])
+        response = self._get(self.bob)
+        self.assertEqual([row['student__username'] for row in response.data['results']], ['bob'])
+
+    def test_paginated_with_constant_queries(self):
+        for i in range(30):
+            student = User.objects.create_user(username=f's{i}', password='pass12345', role='student')
+            AttendanceRecord.objects.create(student=student, course=self.course, date='2024-05-01', status='present')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._get(self.admin, '?page_size=10&page=2')
+        self.assertEqual(response.data['count'], 32)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(len([q for q in ctx.captured_queries if 'core_attendancerecord' in q['sql']]), 3)
+
+    def test_rejects_bad_params(self):
+        self.assertEqual(self._get(self.admin, '?group=day').status_code, 400)
+        self.assertEqual(self._get(self.admin, '?from=yesterday').status_code, 400)
+
+    def test_requires_authentication(self):
+        self.assertEqual(self.client.get('/api/attendance/stats/').status_code, 401)
@@ -0,0 +1,116 @@
+"""
+Tests for resumable chunked uploads (/api/uploads/chunked/).
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Upload, UploadSession
+
+User = get_user_model()
+
+CONTENT = b'%PDF-1.4\n' + bytes(range(256)) * 4  # 1033 bytes
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+
+
+class ChunkedUploadTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, UPLOAD_CHUNK_BYTES=400)
+        self.settings_override.enable()
+        self.user = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        self.other = User.objects.create_user(username='teacher2', password='pass12345', role='teacher')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _start(self, file_name='notes.pdf', size=len(CONTENT)):
+        return self.client.post('/api/uploads/chunked/', {'file_name': file_name, 'size': size}, format='json')
+
+    def _put(self, session_id, offset, data):
+        return self.client.put(
+            f'/api/uploads/chunked/{session_id}/?offset={offset}', data=data, content_type='application/octet-stream',
+        )
+
+    def _stored(self, upload):
+        with open(os.path.join(self.media_root, upload.blob.storage_name), 'rb') as fh:
+            return fh.read()
+
+    def test_upload_in_chunks_and_finalize(self):
+        session = self._start().data
+        self.assertEqual((session['offset'], session['chunk_size']), (0, 400))
+        for offset in range(0, len(CONTENT), 400):
+            response = self._put(session['id'], offset, CONTENT[offset:offset + 400])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['offset'], min(offset + 400, len(CONTENT)))
+
+        response = self.client.post(f'/api/uploads/chunked/{session["id"]}/finalize/')
+        self.assertEqual(response.status_code, 201)
+        upload = Upload.objects.get(id=response.data['id'])
+        self.assertEqual((upload.file_name, upload.uploaded_by), ('notes.pdf', self.user))
+        self.assertEqual((upload.digest, upload.size), (DIGEST, len(CONTENT)))
+        self.assertEqual(self._stored(upload), CONTENT)
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'chunked', f'{session["id"]}.part')))
+        self.assertEqual(UploadSession.objects.get(id=session['id']).status, 'complete')
+
+    def test_resume_from_acknowledged_offset(self):
+        session_id = self._start().data['id']
+        self._put(session_id, 0, CONTENT[:400])
+        # a chunk past the acknowledged offset is refused with the offset to resume from
+        response = self._put(session_id, 800, CONTENT[800:])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['offset'], 400)
+        # an interrupted (short) chunk is not acknowledged
+        self.assertEqual(self._put(session_id, 400, CONTENT[400:650]).status_code, 400)
+        self.assertEqual(self.client.get(f'/api/uploads/chunked/{session_id}/').data['offset'], 400)
+        # finalize before every byte arrived is refused
+        self.assertEqual(self.client.post(f'/api/uploads/chunked/{session_id}/finalize/').status_code, 409)
+
+        self._put(session_id, 400, CONTENT[400:800])
+        self._put(session_id, 800, CONTENT[800:])
+        response = self.client.post(f'/api/uploads/chunked/{session_id}/finalize/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self._stored(Upload.objects.get(id=response.data['id'])), CONTENT)
+
+    def test_type_checked_on_first_chunk(self):
+        session_id = self._start(file_name='page.html', size=20).data['id']
+        response = self._put(session_id, 0, b'<html></html>'.ljust(20))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Invalid file type', response.data['detail'])
+        self.assertEqual(UploadSession.objects.get(id=session_id).received, 0)
+
+    def test_sessions_are_private_and_abortable(self):
+        session_id = self._start().data['id']
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(f'/api/uploads/chunked/{session_id}/').status_code, 404)
+        self.assertEqual(self._put(session_id, 0, CONTENT[:400]).status_code, 404)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.delete(f'/api/uploads/chunked/{session_id}/').status_code, 204)
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'chunked', f'{session_id}.part')))
+        self.assertEqual(self._put(session_id, 0, CONTENT[:400]).status_code, 409)
+        self.assertEqual(self._start(size=0).status_code, 400)
+
+    def test_idle_sessions_expire(self):
+        idle_id = self._start().data['id']
+        active_id = self._start().data['id']
+        self._put(idle_id, 0, CONTENT[:400])
+        UploadSession.objects.filter(id=idle_id).update(updated_at=timezone.now() - timedelta(days=2))
+        out = StringIO()
+        call_command('expire_upload_sessions', stdout=out)
+        self.assertIn('Aborted 1', out.getvalue())
+        self.assertEqual(UploadSession.objects.get(id=idle_id).status, 'aborted')
+        self.assertEqual(UploadSession.objects.get(id=active_id).status, 'uploading')
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'chunked', f'{idle_id}.part')))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, 'chunked', f'{active_id}.part')))
@@ -0,0 +1,96 @@
+"""
+Tests for the combined course page endpoint (GET /api/courses/<id>/full/).
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import (
+    Assignment, Course, CourseRating, Enrollment, Lecture, LectureMaterial, StudyMaterial, Test,
+)
+
+User = get_user_model()
+
+
+class CourseFullTestCase(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        self.other_teacher = User.objects.create_user(username='teacher2', password='pass12345', role='teacher')
+        self.student = User.objects.create_user(username='student', password='pass12345', role='student')
+        self.course = Course.objects.create(title='Algebra', instructor=self.teacher)
+        self.enrollment = Enrollment.objects.create(student=self.student, course=self.course)
+        for i in range(2):
+            self._add_lecture(i)
+        StudyMaterial.objects.create(course=self.course, title='Notes', file_url='/media/notes.pdf')
+        Assignment.objects.create(
+            course=self.course, title='Homework', due_date=timezone.now() + timedelta(days=3),
+            total_marks=10, created_by=self.teacher,
+        )
+        Test.objects.create(
+            course=self.course, title='Quiz', test_type='quiz', scheduled_date=timezone.now() + timedelta(days=7),
+            duration_minutes=30, total_marks=20, created_by=self.teacher,
+        )
+        CourseRating.objects.create(course=self.course, student=self.student, rating=4, review='Good')
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        self.url = f'/api/courses/{self.course.id}/full/'
+
+    def _add_lecture(self, index):
+        lecture = Lecture.objects.create(course=self.course, title=f'Lecture {index}', order_index=index, is_published=True)
+        for n in range(2):
+            LectureMaterial.objects.create(lecture=lecture, name=f'Slides {index}.{n}', file_url=f'/media/{index}-{n}.pdf')
+        return lecture
+
+    def test_returns_every_section(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertEqual(data['course']['id'], self.course.id)
+        self.assertEqual([l['title'] for l in data['lectures']], ['Lecture 0', 'Lecture 1'])
+        self.assertEqual([m['name'] for m in data['lectures'][0]['materials']], ['Slides 0.0', 'Slides 0.1'])
+        self.assertEqual([m['title'] for m in data['study_materials']], ['Notes'])
+        self.assertEqual([a['title'] for a in data['assignments']], ['Homework'])
+        self.assertEqual([t['title'] for t in data['tests']], ['Quiz'])
+        self.assertEqual([r['review'] for r in data['ratings']], ['Good'])
+        self.assertEqual(data['enrollment']['id'], self.enrollment.id)
+
+    def test_query_count_independent_of_lecture_count(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+        for i in range(2, 6):
+            self._add_lecture(i)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data['lectures']), 6)
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+
+    def test_repeat_view_is_not_modified_until_content_changes(self):
+        first = self.client.get(self.url)
+        etag = first['ETag']
+        self.assertIn('private', first['Cache-Control'])
+        repeat = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat['ETag'], etag)
+
+        StudyMaterial.objects.create(course=self.course, title='Worksheet', file_url='/media/worksheet.pdf')
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_role_scoping(self):
+        # teachers only see their own courses, as on /api/courses/<id>/
+        self.client.force_authenticate(self.other_teacher)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.force_authenticate(self.teacher)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['enrollment'])
+        self.client.force_authenticate(None)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['ratings'], response.data['enrollment']), ([], None))
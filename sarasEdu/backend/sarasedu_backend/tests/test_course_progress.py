@@ -0,0 +1,91 @@
+"""
+Tests for lecture counts and enrollment progress derived from LectureProgress.
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core import heartbeats
+from core.models import Course, Enrollment, Lecture, LectureProgress
+
+User = get_user_model()
+
+
+class CourseProgressTestCase(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        self.student = User.objects.create_user(username='student', password='pass12345', role='student')
+        self.course = Course.objects.create(title='Algebra', instructor=self.teacher)
+        self.lectures = [
+            Lecture.objects.create(course=self.course, title=f'L{i}', order_index=i, is_published=True) for i in range(4)
+        ]
+        self.draft = Lecture.objects.create(course=self.course, title='Draft', order_index=9)
+        self.enrollment = Enrollment.objects.create(student=self.student, course=self.course)
+
+    def _complete(self, lecture):
+        return LectureProgress.objects.create(student=self.student, lecture=lecture, status='completed')
+
+    def _progress(self):
+        self.enrollment.refresh_from_db()
+        return self.enrollment.completed_lectures, self.enrollment.progress_percentage
+
+    def test_total_lectures_counts_published(self):
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.total_lectures, 4)
+        self.draft.is_published = True
+        self.draft.save()
+        self.lectures[0].delete()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.total_lectures, 4)
+
+    def test_completion_updates_enrollment(self):
+        self._complete(self.lectures[0])
+        self.assertEqual(self._progress(), (1, Decimal('25.00')))
+        progress = self._complete(self.lectures[1])
+        self.assertEqual(self._progress(), (2, Decimal('50.00')))
+        progress.status = 'in_progress'
+        progress.save()
+        self.assertEqual(self._progress(), (1, Decimal('25.00')))
+        # unpublished lectures do not count
+        self._complete(self.draft)
+        self.assertEqual(self._progress()[0], 1)
+
+    def test_completion_is_constant_queries(self):
+        progress = LectureProgress.objects.create(student=self.student, lecture=self.lectures[0], status='in_progress')
+        progress.status = 'completed'
+        with CaptureQueriesContext(connection) as ctx:
+            progress.save()
+        self.assertFalse([q for q in ctx.captured_queries if 'COUNT' in q['sql'].upper()])
+        self.assertEqual(self._progress()[0], 1)
+
+    def test_publishing_changes_denominator(self):
+        self._complete(self.lectures[0])
+        self.lectures[1].delete()
+        self.assertEqual(self._progress(), (1, Decimal('33.33')))
+        self.lectures[0].is_published = False
+        self.lectures[0].save()
+        self.assertEqual(self._progress(), (0, Decimal('0.00')))
+
+    @override_settings(LECTURE_HEARTBEAT_FLUSH_SECONDS=3600)
+    def test_heartbeat_completion_updates_enrollment(self):
+        heartbeats._take()
+        heartbeats.record(self.student.id, [{'lecture': self.lectures[2].id, 'position': 300, 'seconds': 0, 'completed': True}])
+        heartbeats.flush()
+        self.assertEqual(self._progress(), (1, Decimal('25.00')))
+
+    def test_rebuild_command(self):
+        for lecture in self.lectures[:3]:
+            self._complete(lecture)
+        Enrollment.objects.update(completed_lectures=0, progress_percentage=0)
+        Course.objects.update(total_lectures=0)
+        out = StringIO()
+        call_command('rebuild_course_progress', stdout=out)
+        self.assertIn('1 enrollment(s)', out.getvalue())
+        self.assertEqual(self._progress(), (3, Decimal('75.00')))
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.total_lectures, 4)
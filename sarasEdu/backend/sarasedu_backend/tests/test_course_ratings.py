@@ -0,0 +1,80 @@
+"""
+Tests for the denormalized course rating aggregates.
+"""
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.models import Course, CourseRating, Enrollment
+from core.ratings import star_bucket
+
+User = get_user_model()
+
+
+class CourseRatingAggregatesTestCase(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        self.course = Course.objects.create(title='Course', instructor=self.teacher)
+        self.students = []
+        for i in range(6):
+            student = User.objects.create_user(username=f'student{i}', password='pass12345', role='student')
+            Enrollment.objects.create(student=student, course=self.course)
+            self.students.append(student)
+        self.client = APIClient()
+
+    def _rate(self, student, rating):
+        self.client.force_authenticate(student)
+        return self.client.post('/api/course-ratings/', {'course': self.course.id, 'rating': rating}, format='json')
+
+    def test_ratings_update_counters_and_average(self):
+        for student, rating in zip(self.students, ['5', '4.5', '4', '3.2', '1']):
+            self.assertEqual(self._rate(student, rating).status_code, 201)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.rating_count, 5)
+        self.assertEqual(float(self.course.rating_sum), 17.7)
+        self.assertEqual(float(self.course.average_rating), 3.54)
+        self.assertEqual(
+            [getattr(self.course, f'rating_count_{s}') for s in range(1, 6)],
+            [1, 0, 1, 1, 2],
+        )
+        response = self.client.get(f'/api/courses/{self.course.id}/')
+        self.assertEqual(response.data['rating_histogram'], {'1': 1, '2': 0, '3': 1, '4': 1, '5': 2})
+
+    def test_rating_does_not_scan_existing_ratings(self):
+        self._rate(self.students[0], 4)
+        with CaptureQueriesContext(connection) as ctx:
+            self._rate(self.students[1], 2)
+        self.assertFalse([q for q in ctx.captured_queries if 'AVG(' in q['sql'].upper()])
+
+    def test_invalid_rating_is_rejected(self):
+        self.assertEqual(self._rate(self.students[0], 'abc').status_code, 400)
+        self.assertEqual(self._rate(self.students[0], '6').status_code, 400)
+        self.assertEqual(self._rate(self.students[0], 'NaN').status_code, 400)
+        self.assertEqual(self._rate(self.students[0], 'Infinity').status_code, 400)
+        self.assertEqual(self._rate(self.students[0], '1e30').status_code, 400)
+        self.assertFalse(CourseRating.objects.exists())
+
+    def test_rating_is_rounded_before_aggregating(self):
+        self.assertEqual(self._rate(self.students[0], '4.46').status_code, 201)
+        self.course.refresh_from_db()
+        self.assertEqual(float(CourseRating.objects.get().rating), 4.5)
+        self.assertEqual((float(self.course.rating_sum), self.course.rating_count_5), (4.5, 1))
+
+    def test_star_buckets(self):
+        self.assertEqual([star_bucket(r) for r in ('0', '1.4', '1.5', '3.49', '4.5', '5')], [1, 1, 2, 3, 5, 5])
+
+    def test_rebuild_command_repairs_drift(self):
+        self._rate(self.students[0], 5)
+        self._rate(self.students[1], 2)
+        Course.objects.filter(id=self.course.id).update(rating_count=0, rating_sum=0, rating_count_5=9, average_rating=0)
+        out = StringIO()
+        call_command('rebuild_course_ratings', '--course-id', self.course.id, stdout=out)
+        self.assertIn('1 had stale', out.getvalue())
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.rating_count, self.course.rating_count_2, self.course.rating_count_5), (2, 1, 1))
+        self.assertEqual(float(self.course.average_rating), 3.5)
@@ -0,0 +1,72 @@
+"""
+Query-plan tests: the hot list endpoints must be served by an index.
+"""
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import (
+    Course, Enrollment, Assignment, AttendanceRecord, LibraryItem, ActivityLog, Notification,
+)
+from tests.explain import IndexUsageMixin, main_select
+
+User = get_user_model()
+
+
+class HotQueryIndexTestCase(IndexUsageMixin, TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass12345', role='admin')
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        self.student = User.objects.create_user(username='student', password='pass12345', role='student')
+        self.course = Course.objects.create(title='Course', instructor=self.teacher, status='active', is_published=True)
+        Enrollment.objects.create(student=self.student, course=self.course)
+        AttendanceRecord.objects.create(student=self.student, course=self.course, date=date.today(), status='present')
+        Assignment.objects.create(
+            course=self.course, title='A', due_date=timezone.now() - timedelta(days=1), total_marks=10, created_by=self.teacher,
+        )
+        LibraryItem.objects.create(title='Book', item_type='Book', uploaded_by=self.teacher)
+        ActivityLog.objects.create(activity_type='system_alert', title='x')
+        Notification.objects.create(user=self.student, title='n', message='m')
+        self.client = APIClient()
+
+    def _endpoint_sql(self, user, url, table):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return main_select(ctx.captured_queries, table)
+
+    def test_notifications_by_read_state(self):
+        sql = self._endpoint_sql(self.student, '/api/notifications/?read=false', 'core_notification')
+        self.assertUsesIndex(sql, 'core_notification', 'core_notif_user_read_idx')
+
+    def test_course_catalog(self):
+        sql = self._endpoint_sql(self.student, '/api/courses/?status=active&is_published=true', 'core_course')
+        self.assertUsesIndex(sql, 'core_course', 'core_course_catalog_idx')
+
+    def test_enrollments_of_course(self):
+        sql = self._endpoint_sql(self.teacher, f'/api/enrollments/?course={self.course.id}&status=active', 'core_enrollment')
+        self.assertUsesIndex(sql, 'core_enrollment', 'core_enroll_course_status_idx')
+
+    def test_attendance_of_course(self):
+        sql = self._endpoint_sql(self.teacher, f'/api/attendance/?course={self.course.id}', 'core_attendancerecord')
+        self.assertUsesIndex(sql, 'core_attendancerecord', 'core_attend_course_date_idx')
+
+    def test_recent_activity(self):
+        sql = self._endpoint_sql(self.admin, '/api/activity-logs/', 'core_activitylog')
+        self.assertUsesIndex(sql, 'core_activitylog', 'core_activity_created_idx')
+
+    def test_library_newest_first(self):
+        sql = self._endpoint_sql(self.student, '/api/library-items/?ordering=-upload_date', 'core_libraryitem')
+        self.assertUsesIndex(sql, 'core_libraryitem', 'core_library_upload_date_idx')
+
+    def test_overdue_assignment_scan(self):
+        with CaptureQueriesContext(connection) as ctx:
+            list(Assignment.objects.filter(status='active', due_date__lt=timezone.now()).values_list('id', flat=True))
+        sql = main_select(ctx.captured_queries, 'core_assignment')
+        self.assertUsesIndex(sql, 'core_assignment', 'core_assign_status_due_idx')
@@ -0,0 +1,94 @@
+"""
+Tests for buffered lecture-progress heartbeats (POST /api/lecture-progress/heartbeat/).
+"""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core import heartbeats
+from core.models import Course, Lecture, LectureProgress
+
+User = get_user_model()
+
+
+@override_settings(LECTURE_HEARTBEAT_FLUSH_SECONDS=3600)
+class LectureHeartbeatTestCase(TestCase):
+    def setUp(self):
+        heartbeats._take()
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        self.student = User.objects.create_user(username='student', password='pass12345', role='student')
+        course = Course.objects.create(title='Algebra', instructor=self.teacher)
+        self.lectures = [Lecture.objects.create(course=course, title=f'L{i}', order_index=i) for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def tearDown(self):
+        heartbeats._take()
+
+    def _beat(self, *events):
+        return self.client.post('/api/lecture-progress/heartbeat/', {'events': list(events)}, format='json')
+
+    def _event(self, lecture, position, watched, completed=False):
+        return {'lecture': lecture.id, 'position_seconds': position, 'watched_seconds': watched, 'completed': completed}
+
+    def test_events_are_coalesced_until_flush(self):
+        first, second = self.lectures[:2]
+        response = self._beat(self._event(first, 30, 30), self._event(second, 10, 10))
+        self.assertEqual(response.status_code, 202)
+        self._beat(self._event(first, 20, 50), self._event(first, 90, 40))
+        self.assertFalse(LectureProgress.objects.exists())
+        self.assertEqual(heartbeats.pending()[(self.student.id, first.id)], {'position': 90, 'seconds': 120, 'completed': False})
+
+        self.assertEqual(heartbeats.flush(), 2)
+        progress = LectureProgress.objects.get(student=self.student, lecture=first)
+        self.assertEqual((progress.status, progress.last_position_seconds, progress.watch_time_minutes), ('in_progress', 90, 2))
+        # the 10 seconds on the second lecture wait until they make up a minute
+        self.assertEqual(LectureProgress.objects.get(lecture=second).watch_time_minutes, 0)
+        self.assertEqual(heartbeats.pending(), {(self.student.id, second.id): {'position': 0, 'seconds': 10, 'completed': False}})
+
+    def test_flush_adds_to_existing_rows(self):
+        lecture = self.lectures[0]
+        LectureProgress.objects.create(student=self.student, lecture=lecture, status='in_progress', watch_time_minutes=5, last_position_seconds=600)
+        self._beat(self._event(lecture, 120, 60, completed=True))
+        heartbeats.flush()
+        progress = LectureProgress.objects.get(student=self.student, lecture=lecture)
+        self.assertEqual((progress.watch_time_minutes, progress.last_position_seconds, progress.status), (6, 600, 'completed'))
+        self.assertIsNotNone(progress.completed_at)
+
+    def test_flush_is_constant_queries(self):
+        for lecture in self.lectures:
+            self._beat(self._event(lecture, 60, 60))
+        with CaptureQueriesContext(connection) as ctx:
+            heartbeats.flush()
+        self.assertLessEqual(len([q for q in ctx.captured_queries if 'core_lectureprogress' in q['sql']]), 2)
+        self.assertEqual(LectureProgress.objects.count(), 3)
+
+    @override_settings(LECTURE_HEARTBEAT_FLUSH_SECONDS=0)
+    def test_flushes_when_due(self):
+        response = self._beat(self._event(self.lectures[0], 60, 60))
+        self.assertEqual(response.data['flushed'], 1)
+        self.assertEqual(LectureProgress.objects.get().watch_time_minutes, 1)
+
+    def test_rejects_bad_events(self):
+        response = self._beat({'lecture': 999999, 'position_seconds': 1}, {'position_seconds': 5}, self._event(self.lectures[0], 5, 5))
+        self.assertEqual((response.data['accepted'], response.data['rejected']), (1, 2))
+        self.assertEqual(self.client.post('/api/lecture-progress/heartbeat/', {'events': []}, format='json').status_code, 400)
+
+    @override_settings(LECTURE_HEARTBEAT_FLUSH_SECONDS=0)
+    def test_failed_flush_keeps_events_and_accepts(self):
+        lecture = self.lectures[0]
+        with mock.patch('core.heartbeats.bulk_upsert', side_effect=RuntimeError('database is down')):
+            response = self._beat(self._event(lecture, 60, 60))
+        self.assertEqual((response.status_code, response.data['flushed']), (202, 0))
+        self.assertEqual(heartbeats.pending(), {(self.student.id, lecture.id): {'position': 60, 'seconds': 60, 'completed': False}})
+
+    def test_timer_flushes_idle_buffer(self):
+        self._beat(self._event(self.lectures[0], 60, 60))
+        self.assertIsNotNone(heartbeats._timer)
+        self.assertEqual(heartbeats.flush_from_timer(), 1)
+        self.assertIsNone(heartbeats._timer)
+        self.assertEqual(LectureProgress.objects.get().watch_time_minutes, 1)
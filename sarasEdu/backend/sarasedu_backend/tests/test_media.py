@@ -0,0 +1,182 @@
+"""
+Tests for protected local media serving (/media/<path>, core.media).
+"""
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Assignment, AssignmentSubmission, ContentBlob, Course, Upload
+
+User = get_user_model()
+
+VIDEO = bytes(range(256)) * 8  # 2048 bytes
+PATH = 'assignment_submissions/answer.mp4'
+DIGEST = 'ab' * 32
+
+
+class ProtectedMediaTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, MEDIA_ACCEL_REDIRECT_PREFIX=None, MEDIA_SENDFILE_HEADER=None,
+        )
+        self.settings_override.enable()
+        self._write(PATH, VIDEO)
+
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        self.other_teacher = User.objects.create_user(username='teacher2', password='pass12345', role='teacher')
+        self.student = User.objects.create_user(username='student', password='pass12345', role='student')
+        self.other_student = User.objects.create_user(username='student2', password='pass12345', role='student')
+        self.admin = User.objects.create_user(username='admin', password='pass12345', role='admin')
+        course = Course.objects.create(title='Algebra', instructor=self.teacher)
+        assignment = Assignment.objects.create(
+            course=course, title='Homework', due_date=timezone.now() + timedelta(days=3), total_marks=10,
+        )
+        AssignmentSubmission.objects.create(assignment=assignment, student=self.student, submitted_file_url=f'/media/{PATH}')
+        self.client = APIClient()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _write(self, path, content):
+        full_path = os.path.join(self.media_root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'wb') as fh:
+            fh.write(content)
+
+    def _get(self, user=None, path=PATH, **headers):
+        if user is not None:
+            self.client.force_authenticate(user)
+        return self.client.get(f'/media/{path}', **headers)
+
+    def _body(self, response):
+        body = b''.join(response.streaming_content)
+        response.close()
+        return body
+
+    def test_access_follows_owning_model_scoping(self):
+        response = self._get(self.student)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertEqual((response['Accept-Ranges'], response['Content-Length']), ('bytes', str(len(VIDEO))))
+        self.assertEqual(self._body(response), VIDEO)
+        for user, expected in ((self.teacher, 200), (self.admin, 200), (self.other_student, 404), (self.other_teacher, 404)):
+            response = self._get(user)
+            self.assertEqual(response.status_code, expected, user.username)
+            if expected == 200:
+                response.close()
+        self.client.force_authenticate(None)
+        self.assertEqual(self._get().status_code, 401)
+        self.assertEqual(self._get(self.admin, path='../secret.txt').status_code, 404)
+        self.assertEqual(self._get(self.admin, path='assignment_submissions/missing.mp4').status_code, 404)
+
+    def test_signed_urls(self):
+        self.client.force_authenticate(self.student)
+        response = self.client.post('/api/media/sign/', {'urls': [f'/media/{PATH}', 'https://example.com/a.pdf']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        signed = response.data['urls'][f'/media/{PATH}']
+        self.assertTrue(signed.startswith(f'/media/{PATH}?sig='))
+        self.assertEqual(response.data['urls']['https://example.com/a.pdf'], 'https://example.com/a.pdf')
+        # no other student gets a signature
+        self.client.force_authenticate(self.other_student)
+        response = self.client.post('/api/media/sign/', {'urls': [f'/media/{PATH}']}, format='json')
+        self.assertIsNone(response.data['urls'][f'/media/{PATH}'])
+
+        # the signature alone grants access (media elements send no headers), to that path only
+        self.client.force_authenticate(None)
+        response = self.client.get(signed, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Referrer-Policy'], 'no-referrer')
+        self.assertEqual(self._body(response), VIDEO[:10])
+        self._write('assignment_submissions/other.mp4', VIDEO)
+        sig = signed.split('?')[1]
+        self.assertEqual(self.client.get(f'/media/assignment_submissions/other.mp4?{sig}').status_code, 403)
+        self.assertEqual(self.client.get(f'/media/{PATH}?sig=forged').status_code, 403)
+        with override_settings(MEDIA_URL_EXPIRES_SECONDS=-1):
+            self.assertEqual(self.client.get(signed).status_code, 403)
+
+    def test_byte_ranges(self):
+        response = self._get(self.student, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual((response['Content-Range'], response['Content-Length']), (f'bytes 100-199/{len(VIDEO)}', '100'))
+        self.assertEqual(self._body(response), VIDEO[100:200])
+
+        response = self._get(HTTP_RANGE='bytes=2000-')
+        self.assertEqual(self._body(response), VIDEO[2000:])
+        response = self._get(HTTP_RANGE='bytes=-10')
+        self.assertEqual(response['Content-Range'], f'bytes {len(VIDEO) - 10}-{len(VIDEO) - 1}/{len(VIDEO)}')
+        self.assertEqual(self._body(response), VIDEO[-10:])
+
+        response = self._get(HTTP_RANGE='bytes=5000-')
+        self.assertEqual((response.status_code, response['Content-Range']), (416, f'bytes */{len(VIDEO)}'))
+        # multiple ranges and ranges for a stale copy get the whole file
+        for headers in ({'HTTP_RANGE': 'bytes=0-1,5-6'}, {'HTTP_RANGE': 'bytes=0-1', 'HTTP_IF_RANGE': '"stale"'}):
+            response = self._get(**headers)
+            self.assertEqual(response.status_code, 200)
+            response.close()
+
+    def test_etag_revalidation(self):
+        response = self._get(self.student)
+        etag = response['ETag']
+        response.close()
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        response = self._get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        response.close()
+        self._write(PATH, VIDEO + b'more')
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        response.close()
+
+    def test_hands_off_to_front_proxy(self):
+        with override_settings(MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/'):
+            response = self._get(self.student, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{PATH}')
+        self.assertEqual((response['Content-Type'], response.content), ('video/mp4', b''))
+        with override_settings(MEDIA_SENDFILE_HEADER='X-Sendfile'):
+            response = self._get()
+        self.assertEqual(response['X-Sendfile'], os.path.join(self.media_root, PATH))
+        # the access check still applies
+        with override_settings(MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/'):
+            self.assertEqual(self._get(self.other_student).status_code, 404)
+
+    def test_thumbnails_follow_original(self):
+        original = f'cas/ab/ab/{DIGEST}.png'
+        variant = f'cas/ab/ab/{DIGEST}.small.webp'
+        self._write(original, b'png')
+        self._write(variant, b'webp')
+        blob = ContentBlob.objects.create(digest=DIGEST, size=3, storage_name=original, ref_count=1)
+        Upload.objects.create(file_name='d.png', file_url=f'/media/{original}', uploaded_by=self.teacher, blob=blob)
+        response = self._get(self.teacher, path=variant)
+        self.assertEqual((response.status_code, response['Content-Type']), (200, 'image/webp'))
+        response.close()
+        self.assertEqual(self._get(self.other_teacher, path=variant).status_code, 404)
+
+    def test_submission_files_stay_private(self):
+        assignment = Assignment.objects.get()
+        self.client.force_authenticate(self.other_student)
+        file = SimpleUploadedFile('answers.pdf', b'%PDF-1.4\n' + b'x' * 100, content_type='application/pdf')
+        response = self.client.post(f'/api/assignments/{assignment.id}/submissions', {'file': file}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        path = AssignmentSubmission.objects.get(student=self.other_student).submitted_file_url[len('/media/'):]
+        self.assertTrue(path.startswith('cas/'))
+        response = self._get(self.other_student, path=path)
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        response = self._get(self.teacher, path=path)
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        self.assertEqual(self._get(self.student, path=path).status_code, 404)
+        # nor may a student read a file just because another user uploaded it
+        Upload.objects.create(file_name='answers.pdf', file_url=f'/media/{path}', uploaded_by=self.other_student)
+        self.assertEqual(self._get(self.student, path=path).status_code, 404)
@@ -0,0 +1,156 @@
+"""
+Tests for presigned direct-to-bucket uploads (/api/uploads/presign/).
+
+Run against an in-process S3 (moto); skipped when moto is not installed.
+"""
+from datetime import timedelta
+from unittest import skipUnless
+
+import boto3
+import requests
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Assignment, AssignmentSubmission, ContentBlob, Course, Enrollment, Upload
+
+try:
+    from moto import mock_aws
+except ImportError:
+    mock_aws = None
+
+User = get_user_model()
+
+BUCKET = 'sarasedu-test'
+S3_SETTINGS = dict(
+    STORAGES={
+        'default': {'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    AWS_ACCESS_KEY_ID='testing',
+    AWS_SECRET_ACCESS_KEY='testing',
+    AWS_STORAGE_BUCKET_NAME=BUCKET,
+    AWS_S3_REGION_NAME='us-east-1',
+    AWS_S3_ENDPOINT_URL=None,
+    MINIO_PUBLIC_ENDPOINT=None,
+)
+PDF = b'%PDF-1.4\n' + b'x' * 100
+
+
+class PresignDisabledTestCase(TestCase):
+    def test_requires_object_storage(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='teacher', password='pass12345', role='teacher'))
+        response = client.post('/api/uploads/presign/', {'file_name': 'notes.pdf', 'size': 10}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+@skipUnless(mock_aws, 'moto is not installed')
+class PresignedUploadTestCase(TestCase):
+    def setUp(self):
+        self.mock = mock_aws()
+        self.mock.start()
+        self.settings_override = override_settings(**S3_SETTINGS)
+        self.settings_override.enable()
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket=BUCKET)
+        self.student = User.objects.create_user(username='student', password='pass12345', role='student')
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        course = Course.objects.create(title='Algebra', instructor=self.teacher)
+        Enrollment.objects.create(student=self.student, course=course)
+        self.assignment = Assignment.objects.create(
+            course=course, title='Homework', due_date=timezone.now() + timedelta(days=3), total_marks=10,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.mock.stop()
+
+    def _presign(self, **extra):
+        payload = {'file_name': 'notes.pdf', 'size': len(PDF), 'content_type': 'application/pdf', **extra}
+        response = self.client.post('/api/uploads/presign/', payload, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data
+
+    def _complete(self, token, **extra):
+        return self.client.post('/api/uploads/presign/complete/', {'token': token, **extra}, format='json')
+
+    def test_presigned_post_then_complete_creates_upload(self):
+        data = self._presign()
+        self.assertEqual(data['method'], 'POST')
+        sent = requests.post(data['url'], data=data['fields'], files={'file': ('notes.pdf', PDF)})
+        self.assertLess(sent.status_code, 300)
+
+        response = self._complete(data['token'])
+        self.assertEqual(response.status_code, 201)
+        upload = Upload.objects.get(id=response.data['id'])
+        self.assertEqual((upload.file_name, upload.uploaded_by), ('notes.pdf', self.student))
+        # completing again does not create a second row
+        self.assertEqual(self._complete(data['token']).status_code, 200)
+        self.assertEqual(Upload.objects.count(), 1)
+
+    def test_presigned_put_for_assignment_creates_submission(self):
+        data = self._presign(method='put', assignment=self.assignment.id)
+        sent = requests.put(data['url'], data=PDF, headers=data['headers'])
+        self.assertLess(sent.status_code, 300)
+
+        response = self._complete(data['token'], submission_text='see attached')
+        self.assertEqual(response.status_code, 201)
+        submission = AssignmentSubmission.objects.get(assignment=self.assignment, student=self.student)
+        self.assertEqual(submission.submission_text, 'see attached')
+        self.assertIn('assignment_submissions/', submission.submitted_file_url)
+        # submitted files are not listed in /api/uploads/
+        self.assertFalse(Upload.objects.exists())
+        self.assertEqual(self._complete(data['token']).status_code, 200)
+
+    def test_resubmission_releases_previous_content(self):
+        blob = ContentBlob.objects.create(digest='a' * 64, size=3, storage_name='cas/aa/aa/' + 'a' * 64 + '.pdf', ref_count=2)
+        AssignmentSubmission.objects.create(
+            assignment=self.assignment, student=self.student, submitted_file_url='/media/old.pdf', blob=blob,
+        )
+        data = self._presign(method='put', assignment=self.assignment.id)
+        requests.put(data['url'], data=PDF, headers=data['headers'])
+        self.assertEqual(self._complete(data['token']).status_code, 200)
+        submission = AssignmentSubmission.objects.get(assignment=self.assignment, student=self.student)
+        self.assertIsNone(submission.blob)
+        self.assertIn('assignment_submissions/', submission.submitted_file_url)
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+
+    def test_complete_verifies_the_object(self):
+        data = self._presign(method='put')
+        # nothing uploaded yet
+        self.assertEqual(self._complete(data['token']).status_code, 409)
+        # wrong size is rejected and the object removed
+        requests.put(data['url'], data=PDF + b'extra', headers=data['headers'])
+        self.assertEqual(self._complete(data['token']).status_code, 400)
+        self.assertEqual(self._complete(data['token']).status_code, 409)
+        # tokens are bound to the user they were issued to
+        self.client.force_authenticate(self.teacher)
+        self.assertEqual(self._complete(data['token']).status_code, 400)
+        self.assertEqual(self._complete('forged').status_code, 400)
+        self.assertFalse(Upload.objects.exists())
+
+    def test_request_validation(self):
+        response = self.client.post(
+            '/api/uploads/presign/', {'file_name': 'page.html', 'size': 10, 'content_type': 'text/html'}, format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.client.force_authenticate(self.teacher)
+        response = self.client.post(
+            '/api/uploads/presign/', {'file_name': 'notes.pdf', 'size': 10, 'assignment': self.assignment.id}, format='json',
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_assignment_must_be_in_an_enrolled_course(self):
+        other = Assignment.objects.create(
+            course=Course.objects.create(title='Biology', instructor=self.teacher),
+            title='Lab report', due_date=timezone.now() + timedelta(days=3), total_marks=10,
+        )
+        payload = {'file_name': 'notes.pdf', 'size': 10}
+        response = self.client.post('/api/uploads/presign/', {**payload, 'assignment': other.id}, format='json')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post('/api/uploads/presign/', {**payload, 'assignment': 'abc'}, format='json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,96 @@
+"""
+Query-count regression tests for list endpoints with nested relations.
+
+Each endpoint is listed with a few rows and then with a full page; the number
+of SQL queries must not grow with the number of rows serialized.
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import (
+    Course, Assignment, AssignmentSubmission, LiveClass, LibraryItem,
+    Notification, CourseRating, Enrollment, ActivityLog,
+)
+
+User = get_user_model()
+
+
+class ListEndpointQueryCountTestCase(TestCase):
+    """Serializing more rows must not issue more queries."""
+
+    ENDPOINTS = (
+        '/api/courses/',
+        '/api/assignments/',
+        '/api/assignment-submissions/',
+        '/api/live-classes/',
+        '/api/library-items/',
+        '/api/student-profiles/',
+        '/api/teacher-profiles/',
+        '/api/notifications/',
+        '/api/course-ratings/',
+        '/api/activity-logs/',
+    )
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass12345', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.counter = 0
+
+    def _add_rows(self, n):
+        """Create `n` rows for every endpoint under test, each with its own users."""
+        for _ in range(n):
+            self.counter += 1
+            i = self.counter
+            teacher = User.objects.create_user(username=f'teacher{i}', password='pass12345', role='teacher')
+            student = User.objects.create_user(username=f'student{i}', password='pass12345', role='student')
+            course = Course.objects.create(title=f'Course {i}', instructor=teacher)
+            assignment = Assignment.objects.create(
+                course=course, title=f'A{i}', due_date=timezone.now() + timedelta(days=7),
+                total_marks=10, created_by=teacher,
+            )
+            AssignmentSubmission.objects.create(assignment=assignment, student=student)
+            LiveClass.objects.create(title=f'Live {i}', course=course, instructor=teacher)
+            LibraryItem.objects.create(title=f'Item {i}', item_type='Book', course=course, uploaded_by=teacher)
+            Enrollment.objects.create(student=student, course=course)
+            CourseRating.objects.create(course=course, student=student, rating=4)
+            Notification.objects.create(user=self.admin, title=f'N{i}', message='m')
+            ActivityLog.objects.create(activity_type='user_enrolled', title=f'Log {i}', user=student, course=course)
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(ctx.captured_queries)
+
+    def test_list_endpoints_use_constant_queries(self):
+        self._add_rows(2)
+        small = {url: self._count_queries(url) for url in self.ENDPOINTS}
+        # fill a whole page (PAGE_SIZE=20) so every endpoint serializes many more rows
+        self._add_rows(18)
+        for url in self.ENDPOINTS:
+            with self.subTest(url=url):
+                self.assertEqual(self._count_queries(url), small[url])
+
+    def test_nested_user_endpoints_are_bounded(self):
+        self._add_rows(5)
+        for url in self.ENDPOINTS:
+            with self.subTest(url=url):
+                # count + page query, plus at most one maintenance/aggregate query
+                self.assertLessEqual(self._count_queries(url), 3)
+
+    def test_nested_user_payload_unchanged(self):
+        self._add_rows(1)
+        response = self.client.get('/api/courses/')
+        instructor = response.data['results'][0]['instructor']
+        self.assertEqual(
+            set(instructor),
+            {'id', 'username', 'email', 'first_name', 'last_name', 'role', 'avatar_url', 'bio', 'phone', 'date_joined', 'last_login'},
+        )
+        self.assertEqual(instructor['username'], 'teacher1')
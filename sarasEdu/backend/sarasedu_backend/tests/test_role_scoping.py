@@ -0,0 +1,177 @@
+"""
+Equivalence tests for the precompiled role-scoping rules in core.scoping.
+
+`legacy_scope` is the per-request field inspection BaseModelViewSet.get_queryset
+used before the rules were compiled; every router model/role pair must return
+exactly the same rows (and the same SQL) through both paths.
+"""
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core import scoping
+from core.models import (
+    Course, Lecture, LectureMaterial, StudyMaterial, Enrollment, LectureProgress,
+    Assignment, AssignmentSubmission, AssignmentAttachment, Test, Question,
+    TestSubmission, TestAnswer, AttendanceRecord, LibraryItem, LibraryFavorite,
+    LibraryDownload, Event, LiveClass, Announcement, Upload, CourseRating,
+)
+from core.urls import router
+from core.viewsets import BaseModelViewSet
+
+User = get_user_model()
+
+
+def legacy_scope(qs, user, query_params):
+    """Reference copy of the original BaseModelViewSet.get_queryset body."""
+    if not user or not user.is_authenticated:
+        return qs
+    if getattr(user, 'role', None) == 'admin':
+        return qs
+    model = qs.model
+    field_names = {f.name for f in model._meta.get_fields()}
+    course_param = query_params.get('course')
+    if course_param and 'course' in field_names:
+        try:
+            return qs.filter(course_id=course_param)
+        except Exception:
+            pass
+    model_name = model.__name__.lower()
+    role = getattr(user, 'role', None)
+    if model_name == 'enrollment' and role == 'teacher':
+        return qs.filter(course__instructor=user)
+    if model_name == 'enrollment' and role == 'student':
+        return qs.filter(student=user)
+    if model_name == 'lectureprogress':
+        if role == 'teacher':
+            return qs.filter(lecture__course__instructor=user)
+        if role == 'student':
+            return qs.filter(student=user)
+    if model_name == 'lecture':
+        if role == 'teacher':
+            return qs.filter(course__instructor=user)
+    if model_name in ('assignmentsubmission', 'testsubmission'):
+        if role == 'student':
+            return qs.filter(student=user)
+        if role == 'teacher':
+            if 'assignment' in field_names:
+                return qs.filter(assignment__course__instructor=user)
+            if 'test' in field_names:
+                return qs.filter(test__course__instructor=user)
+    if 'uploaded_by' in field_names and role == 'teacher':
+        return qs.filter(uploaded_by=user)
+    if 'uploaded_by' in field_names and role == 'student':
+        return qs
+    if model_name == 'event' and role == 'teacher':
+        if 'instructor' in field_names:
+            return qs.filter(instructor=user)
+        if 'created_by' in field_names:
+            return qs.filter(created_by=user)
+    if model_name == 'course' and role == 'teacher':
+        if 'instructor' in field_names:
+            return qs.filter(instructor=user)
+    if role == 'teacher':
+        if 'created_by' in field_names:
+            return qs.filter(created_by=user)
+        if 'instructor' in field_names:
+            return qs.filter(instructor=user)
+        if 'uploaded_by' in field_names:
+            return qs.filter(uploaded_by=user)
+    if role == 'student' and 'student' in field_names:
+        return qs.filter(student=user)
+    if 'user' in field_names:
+        return qs.filter(user=user)
+    return qs
+
+
+def scoped_viewsets():
+    """Router viewsets that rely on BaseModelViewSet's role scoping."""
+    for _prefix, viewset, _basename in router.registry:
+        if issubclass(viewset, BaseModelViewSet) and getattr(viewset, 'queryset', None) is not None:
+            yield viewset
+
+
+class RoleScopingEquivalenceTestCase(TestCase):
+    """Compiled rules must match the legacy scoping for every model/role pair."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.factory = APIRequestFactory()
+        cls.users = {}
+        for name, role in (('t1', 'teacher'), ('t2', 'teacher'), ('s1', 'student'), ('s2', 'student'), ('a1', 'admin')):
+            cls.users[name] = User.objects.create_user(username=name, email=f'{name}@test.com', password='pass12345', role=role)
+        now = timezone.now()
+        for t, s in (('t1', 's1'), ('t2', 's2')):
+            teacher, student = cls.users[t], cls.users[s]
+            course = Course.objects.create(title=f'Course {t}', instructor=teacher, status='active', is_published=True)
+            lecture = Lecture.objects.create(course=course, title='L1', order_index=1)
+            LectureMaterial.objects.create(lecture=lecture, name='m', file_url='/m')
+            StudyMaterial.objects.create(course=course, title='sm', file_url='/sm', uploaded_by=teacher)
+            Enrollment.objects.create(student=student, course=course)
+            LectureProgress.objects.create(student=student, lecture=lecture)
+            assignment = Assignment.objects.create(course=course, title='A1', due_date=now + timedelta(days=3), total_marks=10, created_by=teacher)
+            AssignmentSubmission.objects.create(assignment=assignment, student=student)
+            AssignmentAttachment.objects.create(assignment=assignment, file_name='a', file_url='/a')
+            test = Test.objects.create(course=course, title='T1', test_type='quiz', scheduled_date=now, duration_minutes=30, total_marks=10, created_by=teacher)
+            question = Question.objects.create(test=test, question_type='mcq', question_text='q', correct_answer='a', marks=5)
+            submission = TestSubmission.objects.create(test=test, student=student)
+            TestAnswer.objects.create(submission=submission, question=question, student_answer='a')
+            AttendanceRecord.objects.create(student=student, course=course, date=date(2025, 1, 1), status='present', marked_by=teacher)
+            item = LibraryItem.objects.create(title='Book', item_type='Book', course=course, uploaded_by=teacher)
+            LibraryFavorite.objects.create(user=student, library_item=item)
+            LibraryDownload.objects.create(user=student, library_item=item)
+            Event.objects.create(title='E', event_type='quiz', event_date=date(2025, 1, 2), course=course, instructor=teacher)
+            LiveClass.objects.create(title='LC', course=course, instructor=teacher)
+            Announcement.objects.create(title='An', body='b', created_by=teacher)
+            Upload.objects.create(file_name='f', file_url='/f', uploaded_by=teacher)
+            CourseRating.objects.create(course=course, student=student, rating=4)
+        cls.courses = list(Course.objects.order_by('id'))
+
+    def _view(self, viewset, user, params=None):
+        request = Request(self.factory.get('/', params or {}))
+        request.user = user
+        view = viewset()
+        view.request = request
+        view.format_kwarg = None
+        return view
+
+    def _assert_equivalent(self, viewset, user, params=None):
+        view = self._view(viewset, user, params)
+        expected = legacy_scope(viewset.queryset, user, view.request.query_params)
+        actual = BaseModelViewSet.get_queryset(view)
+        label = f'{viewset.__name__} as {user.username} {params or ""}'
+        self.assertEqual(str(actual.query), str(expected.query), label)
+        self.assertEqual(
+            sorted(actual.values_list('pk', flat=True)),
+            sorted(expected.values_list('pk', flat=True)),
+            label,
+        )
+
+    def test_every_model_role_pair_matches_legacy_rows(self):
+        for viewset in scoped_viewsets():
+            for user in self.users.values():
+                with self.subTest(viewset=viewset.__name__, user=user.username):
+                    self._assert_equivalent(viewset, user)
+
+    def test_course_param_matches_legacy_rows(self):
+        for viewset in scoped_viewsets():
+            for user in self.users.values():
+                for params in ({'course': self.courses[0].id}, {'course': 'not-a-number'}):
+                    with self.subTest(viewset=viewset.__name__, user=user.username, params=params):
+                        self._assert_equivalent(viewset, user, params)
+
+    def test_rules_are_compiled_at_startup(self):
+        for viewset in scoped_viewsets():
+            for role in scoping.scoped_roles():
+                self.assertIn((viewset.queryset.model, role), scoping._RULES)
+
+    def test_unknown_role_is_built_lazily(self):
+        user = User.objects.create_user(username='odd', password='pass12345', role='guest')
+        for viewset in scoped_viewsets():
+            with self.subTest(viewset=viewset.__name__):
+                self._assert_equivalent(viewset, user)
+        self.assertIn((Course, 'guest'), scoping._RULES)
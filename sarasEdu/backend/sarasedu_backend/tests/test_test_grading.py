@@ -0,0 +1,187 @@
+"""
+Tests for bulk auto-grading in TestSubmissionViewSet.create.
+"""
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.grading import grade_for_percentage
+from core.models import Course, Test, Question, TestSubmission, TestAnswer
+
+User = get_user_model()
+
+
+class TestGradingTestCase(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        self.student = User.objects.create_user(username='student', password='pass12345', role='student')
+        self.course = Course.objects.create(title='Course', instructor=self.teacher)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def _make_test(self, n_questions, marks=2):
+        test = Test.objects.create(
+            course=self.course, title='T', test_type='quiz', scheduled_date=timezone.now(),
+            duration_minutes=30, total_marks=n_questions * marks, created_by=self.teacher,
+        )
+        questions = Question.objects.bulk_create([
+            Question(test=test, question_type='mcq', question_text=f'q{i}', correct_answer=f'Answer {i}', marks=marks)
+            for i in range(n_questions)
+        ])
+        return test, questions
+
+    def _submit(self, test, answers):
+        return self.client.post('/api/test-submissions/', {'test': test.id, 'answers': answers}, format='json')
+
+    def test_answers_are_graded(self):
+        test, questions = self._make_test(4)
+        answers = [
+            {'question': questions[0].id, 'student_answer': ' answer 0 '},
+            {'question': questions[1].id, 'student_answer': 'Answer 1'},
+            {'question': str(questions[2].id), 'answer': 'Answer 2'},
+            {'question': questions[3].id, 'student_answer': 'wrong'},
+        ]
+        response = self._submit(test, answers)
+        self.assertEqual(response.status_code, 201)
+        submission = TestSubmission.objects.get(test=test, student=self.student)
+        self.assertEqual(float(submission.marks_obtained), 6.0)
+        self.assertEqual(submission.grade, 'B+')  # 6 of 8 marks = 75%
+        stored = {a.question_id: a for a in TestAnswer.objects.filter(submission=submission)}
+        self.assertEqual(len(stored), 4)
+        self.assertTrue(stored[questions[0].id].is_correct)
+        self.assertFalse(stored[questions[3].id].is_correct)
+        self.assertEqual(float(stored[questions[3].id].marks_awarded), 0)
+
+    def test_questions_of_other_tests_are_ignored(self):
+        test, questions = self._make_test(2)
+        _other, other_questions = self._make_test(1)
+        response = self._submit(test, [
+            {'question': questions[0].id, 'student_answer': 'Answer 0'},
+            {'question': other_questions[0].id, 'student_answer': 'Answer 0'},
+            {'question': 999999, 'student_answer': 'x'},
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(TestAnswer.objects.count(), 1)
+
+    def test_query_count_does_not_grow_with_questions(self):
+        small_test, small_q = self._make_test(5)
+        large_test, large_q = self._make_test(60)
+        with CaptureQueriesContext(connection) as small:
+            self._submit(small_test, [{'question': q.id, 'student_answer': 'x'} for q in small_q])
+        other = User.objects.create_user(username='student2', password='pass12345', role='student')
+        self.client.force_authenticate(other)
+        with CaptureQueriesContext(connection) as large:
+            self._submit(large_test, [{'question': q.id, 'student_answer': 'x'} for q in large_q])
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+        self.assertEqual(TestAnswer.objects.filter(submission__test=large_test).count(), 60)
+
+    def test_resubmission_upserts_answer_text(self):
+        test, questions = self._make_test(3)
+        self._submit(test, [{'question': questions[0].id, 'student_answer': 'Answer 0'}])
+        response = self._submit(test, [
+            {'question': questions[0].id, 'student_answer': 'changed'},
+            {'question': questions[1].id, 'student_answer': 'Answer 1'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        answers = {a.question_id: a for a in TestAnswer.objects.filter(submission__test=test)}
+        self.assertEqual(answers[questions[0].id].student_answer, 'changed')
+        # marks from the original grading are kept, as before
+        self.assertTrue(answers[questions[0].id].is_correct)
+        self.assertEqual(answers[questions[1].id].student_answer, 'Answer 1')
+
+    def test_grade_boundaries(self):
+        self.assertEqual(grade_for_percentage(95), 'A+')
+        self.assertEqual(grade_for_percentage(85), 'A')
+        self.assertEqual(grade_for_percentage(50), 'C-')
+        self.assertEqual(grade_for_percentage(49), 'F')
+
+
+class IncrementalAnswerScoringTestCase(TestCase):
+    """Answer autosaves apply score deltas instead of rebuilding the submission."""
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        self.student = User.objects.create_user(username='student', password='pass12345', role='student')
+        course = Course.objects.create(title='Course', instructor=self.teacher)
+        self.test = Test.objects.create(
+            course=course, title='T', test_type='quiz', scheduled_date=timezone.now(),
+            duration_minutes=30, total_marks=40, created_by=self.teacher,
+        )
+        self.questions = Question.objects.bulk_create([
+            Question(test=self.test, question_type='mcq', question_text=f'q{i}', correct_answer=f'a{i}', marks=2)
+            for i in range(20)
+        ])
+        self.submission = TestSubmission.objects.create(test=self.test, student=self.student)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def _answer(self, i, text):
+        return self.client.post('/api/test-answers/', {
+            'submission': self.submission.id, 'question': self.questions[i].id, 'student_answer': text,
+        }, format='json')
+
+    def test_create_and_update_apply_deltas(self):
+        self.assertEqual(self._answer(0, 'a0').status_code, 201)
+        self._answer(1, 'a1')
+        response = self._answer(2, 'wrong')
+        self.submission.refresh_from_db()
+        self.assertEqual(float(self.submission.marks_obtained), 4.0)
+        self.assertEqual(self.submission.grade, 'F')
+
+        # correcting an answer adds its marks; breaking one removes them
+        answer_id = response.data['id']
+        self.client.patch(f'/api/test-answers/{answer_id}/', {'student_answer': 'a2'}, format='json')
+        first = TestAnswer.objects.get(submission=self.submission, question=self.questions[0])
+        self.client.patch(f'/api/test-answers/{first.id}/', {'student_answer': 'nope'}, format='json')
+        self.submission.refresh_from_db()
+        self.assertEqual(float(self.submission.marks_obtained), 4.0)
+
+    def test_failed_delta_rolls_back_the_answer(self):
+        self._answer(0, 'wrong')
+        answer = TestAnswer.objects.get(submission=self.submission)
+        self.client.raise_request_exception = False
+        with mock.patch('core.grading.apply_score_delta', side_effect=RuntimeError('deadlock')):
+            response = self.client.patch(f'/api/test-answers/{answer.id}/', {'student_answer': 'a0'}, format='json')
+        self.assertEqual(response.status_code, 500)
+        answer.refresh_from_db()
+        self.submission.refresh_from_db()
+        # neither the answer nor the total moved, so they still agree
+        self.assertEqual((answer.student_answer, float(self.submission.marks_obtained or 0)), ('wrong', 0.0))
+
+    def test_teacher_marks_override_inferred_marks(self):
+        self._answer(0, 'wrong')
+        answer = TestAnswer.objects.get(submission=self.submission)
+        self.client.force_authenticate(self.teacher)
+        self.client.patch(f'/api/test-answers/{answer.id}/', {'marks_awarded': '1.5', 'student_answer': 'wrong'}, format='json')
+        self.submission.refresh_from_db()
+        self.assertEqual(float(self.submission.marks_obtained), 1.5)
+
+    def test_autosave_cost_does_not_grow_with_answers(self):
+        self._answer(0, 'a0')
+        with CaptureQueriesContext(connection) as early:
+            self._answer(1, 'a1')
+        for i in range(2, 19):
+            self._answer(i, f'a{i}')
+        with CaptureQueriesContext(connection) as late:
+            self._answer(19, 'a19')
+        self.assertEqual(len(late.captured_queries), len(early.captured_queries))
+        self.submission.refresh_from_db()
+        self.assertEqual(float(self.submission.marks_obtained), 40.0)
+        self.assertEqual(self.submission.grade, 'A+')
+
+    def test_rebuild_command_repairs_drift(self):
+        self._answer(0, 'a0')
+        self._answer(1, 'a1')
+        TestSubmission.objects.filter(id=self.submission.id).update(marks_obtained=0, grade='F')
+        out = StringIO()
+        call_command('rebuild_test_scores', '--test-id', self.test.id, stdout=out)
+        self.assertIn('1 had stale', out.getvalue())
+        self.submission.refresh_from_db()
+        self.assertEqual(float(self.submission.marks_obtained), 4.0)
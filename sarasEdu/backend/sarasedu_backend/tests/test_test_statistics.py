@@ -0,0 +1,66 @@
+"""
+Tests for the average marks / percentage fields exposed by /api/tests/.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Course, Test, TestSubmission
+
+User = get_user_model()
+
+
+class TestStatisticsTestCase(TestCase):
+    """Test averages are annotated in SQL and match the per-submission maths."""
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        self.admin = User.objects.create_user(username='admin', password='pass12345', role='admin')
+        self.course = Course.objects.create(title='Course', instructor=self.teacher)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.student_count = 0
+
+    def _make_test(self, total_marks, marks):
+        test = Test.objects.create(
+            course=self.course, title='T', test_type='quiz', scheduled_date=timezone.now(),
+            duration_minutes=30, total_marks=total_marks, created_by=self.teacher,
+        )
+        for m in marks:
+            self.student_count += 1
+            student = User.objects.create_user(username=f's{self.student_count}', password='pass12345', role='student')
+            TestSubmission.objects.create(test=test, student=student, marks_obtained=m)
+        return test
+
+    def test_detail_averages(self):
+        test = self._make_test(40, [10, 20, 33, None])
+        response = self.client.get(f'/api/tests/{test.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertAlmostEqual(float(response.data['average_marks']), 21.0)
+        # mean of 25%, 50%, 82.5%
+        self.assertEqual(response.data['average_percentage'], 52.5)
+
+    def test_no_submissions(self):
+        test = self._make_test(50, [])
+        response = self.client.get(f'/api/tests/{test.id}/')
+        self.assertEqual(response.data['average_marks'], 0.0)
+        self.assertEqual(response.data['average_percentage'], 0.0)
+
+    def test_zero_total_falls_back_to_average_marks(self):
+        test = self._make_test(0, [4, 6])
+        response = self.client.get(f'/api/tests/{test.id}/')
+        self.assertAlmostEqual(float(response.data['average_percentage']), 5.0)
+
+    def test_list_query_count_is_constant(self):
+        self._make_test(10, [5, 7])
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/tests/')
+        for _ in range(10):
+            self._make_test(10, [1, 2, 3])
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/api/tests/')
+        self.assertEqual(response.data['count'], 11)
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
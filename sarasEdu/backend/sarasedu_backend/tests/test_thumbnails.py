@@ -0,0 +1,115 @@
+"""
+Tests for background thumbnail generation (core.thumbnails, process_thumbnails).
+"""
+import io
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from core.models import ContentBlob, LibraryItem, ThumbnailJob
+
+User = get_user_model()
+
+SIZES = {'small': 40, 'large': 100}
+
+
+def png(width=300, height=150, color=(255, 0, 0, 128)):
+    buf = io.BytesIO()
+    Image.new('RGBA', (width, height), color).save(buf, 'PNG')
+    return buf.getvalue()
+
+
+@override_settings(THUMBNAIL_SIZES=SIZES)
+class ThumbnailTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _upload(self, name='diagram.png', content=None, content_type='image/png'):
+        file = SimpleUploadedFile(name, content or png(), content_type=content_type)
+        response = self.client.post('/api/uploads/', {'file': file}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        return response.data
+
+    def _run_worker(self):
+        call_command('process_thumbnails', '--once', stdout=io.StringIO())
+
+    def test_variants_generated_by_worker_not_request(self):
+        data = self._upload()
+        self.assertEqual(self.client.get(f'/api/uploads/{data["id"]}/').data['variants'], {})
+        job = ThumbnailJob.objects.get()
+        self.assertEqual(job.status, 'pending')
+
+        self._run_worker()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('completed', 1))
+        blob = ContentBlob.objects.get()
+        self.assertEqual(set(blob.variants), {'small.webp', 'small.jpg', 'large.webp', 'large.jpg'})
+        self.assertEqual((blob.variants['large.webp']['width'], blob.variants['large.webp']['height']), (100, 50))
+        self.assertEqual(blob.variants['small.jpg']['width'], 40)
+        stem = os.path.splitext(blob.storage_name)[0]
+        self.assertEqual(blob.variants['small.webp']['name'], f'{stem}.small.webp')
+        with Image.open(os.path.join(self.media_root, blob.variants['large.webp']['name'])) as im:
+            self.assertEqual((im.format, im.mode), ('WEBP', 'RGBA'))
+        with Image.open(os.path.join(self.media_root, blob.variants['large.jpg']['name'])) as im:
+            self.assertEqual((im.format, im.mode, im.size), ('JPEG', 'RGB', (100, 50)))
+
+        response = self.client.get(f'/api/uploads/{data["id"]}/')
+        self.assertTrue(response.data['variants']['small.webp'].endswith(f'{stem}.small.webp'))
+
+    def test_duplicate_content_is_rendered_once(self):
+        content = png()
+        self._upload(content=content)
+        self._upload(name='copy.png', content=content)
+        self.assertEqual(ThumbnailJob.objects.count(), 1)
+        self._run_worker()
+        variants = [u['variants'] for u in self.client.get('/api/uploads/').data['results']]
+        self.assertEqual(len(variants), 2)
+        self.assertEqual(variants[0], variants[1])
+        self.assertTrue(variants[0])
+
+    def test_non_images_are_not_queued_and_unreadable_images_are_skipped(self):
+        self._upload(name='notes.pdf', content=b'%PDF-1.4\n' + b'x' * 50, content_type='application/pdf')
+        self._upload(name='slides.zip', content=b'PK\x03\x04' + b'\0' * 40, content_type='application/zip')
+        # PDFs get a job; rendering it needs pdf2image, otherwise it is skipped
+        self.assertEqual(ThumbnailJob.objects.count(), 1)
+        self._upload(name='broken.png', content=b'\x89PNG\r\n\x1a\n' + b'\0' * 40)
+        self._run_worker()
+        statuses = set(ThumbnailJob.objects.values_list('status', flat=True))
+        self.assertNotIn('pending', statuses)
+        self.assertNotIn('completed', statuses)
+        self.assertFalse(ContentBlob.objects.exclude(variants={}).exists())
+
+    def test_library_items_expose_variants(self):
+        data = self._upload()
+        self._run_worker()
+        LibraryItem.objects.create(title='Diagram', item_type='Document', file_url=data['url'], uploaded_by=self.teacher)
+        LibraryItem.objects.create(title='Link', item_type='Article', file_url='https://example.com/a.pdf', uploaded_by=self.teacher)
+        response = self.client.get('/api/library-items/')
+        by_title = {item['title']: item['variants'] for item in response.data['results']}
+        self.assertIn('small.webp', by_title['Diagram'])
+        self.assertEqual(by_title['Link'], {})
+
+    def test_deleting_content_removes_variants(self):
+        data = self._upload()
+        self._run_worker()
+        names = [v['name'] for v in ContentBlob.objects.get().variants.values()]
+        self.assertEqual(self.client.delete(f'/api/uploads/{data["id"]}/').status_code, 204)
+        self.assertFalse(ThumbnailJob.objects.exists())
+        for name in names:
+            self.assertFalse(os.path.exists(os.path.join(self.media_root, name)))
@@ -126,3 +126,53 @@ class TotalEnrollmentsTestCase(TestCase):
         # Verify count is corrected
         self.course.refresh_from_db()
         self.assertEqual(self.course.total_enrollments, 2)
+
+    def test_progress_update_does_not_touch_course(self):
+        """Saving an existing enrollment issues no course UPDATE and no COUNT"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        enrollment = Enrollment.objects.create(student=self.student1, course=self.course)
+        enrollment.progress_percentage = 40
+        with CaptureQueriesContext(connection) as ctx:
+            enrollment.save()
+        statements = [q['sql'] for q in ctx.captured_queries]
+        self.assertFalse([sql for sql in statements if sql.startswith('UPDATE "core_course"') or 'COUNT(' in sql])
+        # the enrollment itself, and the teacher's analytics cache version
+        self.assertEqual(len(statements), 2)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.total_enrollments, 1)
+
+    def test_moving_enrollment_updates_both_courses(self):
+        """Changing an enrollment's course moves it between the counters"""
+        other = Course.objects.create(title='Other', instructor=self.teacher)
+        enrollment = Enrollment.objects.create(student=self.student1, course=self.course)
+        enrollment = Enrollment.objects.get(id=enrollment.id)
+        enrollment.course = other
+        enrollment.save()
+        self.course.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.course.total_enrollments, other.total_enrollments), (0, 1))
+
+    def test_reconciliation_uses_constant_queries(self):
+        """Reconciling all courses does not issue a COUNT per course"""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        courses = [Course.objects.create(title=f'C{i}', instructor=self.teacher) for i in range(10)]
+        for course in courses[:5]:
+            Enrollment.objects.create(student=self.student1, course=course)
+        Course.objects.update(total_enrollments=7)
+
+        out = StringIO()
+        call_command('update_total_enrollments', '--dry-run', stdout=out)
+        self.assertIn('would update 11 course(s)', out.getvalue())
+        self.assertEqual(Course.objects.filter(total_enrollments=7).count(), 11)
+
+        with CaptureQueriesContext(connection) as ctx:
+            call_command('update_total_enrollments', '--chunk-size', '4', stdout=StringIO())
+        self.assertLessEqual(len(ctx.captured_queries), 8)
+        self.assertEqual(Course.objects.filter(total_enrollments=1).count(), 5)
+        self.assertEqual(Course.objects.filter(total_enrollments=0).count(), 6)
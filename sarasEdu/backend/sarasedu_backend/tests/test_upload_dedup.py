@@ -0,0 +1,202 @@
+"""
+Tests for content-addressed, reference-counted upload storage (core.blobs).
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import skipUnless
+
+import boto3
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core import uploads
+from core.models import Assignment, AssignmentSubmission, ContentBlob, Course, Upload
+
+try:
+    from moto import mock_aws
+except ImportError:
+    mock_aws = None
+
+User = get_user_model()
+
+PDF = b'%PDF-1.4\n' + b'syllabus ' * 200
+DIGEST = hashlib.sha256(PDF).hexdigest()
+
+
+class UploadDedupTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, UPLOAD_CHUNK_BYTES=500)
+        self.settings_override.enable()
+        self.teacher = User.objects.create_user(username='teacher', password='pass12345', role='teacher')
+        self.other_teacher = User.objects.create_user(username='teacher2', password='pass12345', role='teacher')
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _upload(self, name='syllabus.pdf', content=PDF):
+        response = self.client.post('/api/uploads/', {'file': SimpleUploadedFile(name, content)}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        return Upload.objects.get(id=response.data['id'])
+
+    def _upload_chunked(self, name='syllabus.pdf', content=PDF):
+        session_id = self.client.post('/api/uploads/chunked/', {'file_name': name, 'size': len(content)}, format='json').data['id']
+        for offset in range(0, len(content), 500):
+            self.client.put(
+                f'/api/uploads/chunked/{session_id}/?offset={offset}', data=content[offset:offset + 500],
+                content_type='application/octet-stream',
+            )
+        return session_id, self.client.post(f'/api/uploads/chunked/{session_id}/finalize/')
+
+    def _stored_files(self):
+        cas = os.path.join(self.media_root, 'cas')
+        return [os.path.join(root, f) for root, _dirs, files in os.walk(cas) for f in files]
+
+    def test_duplicate_uploads_share_one_stored_copy(self):
+        first = self._upload()
+        self.client.force_authenticate(self.other_teacher)
+        second = self._upload(name='copy of syllabus.pdf')
+
+        blob = ContentBlob.objects.get()
+        self.assertEqual((blob.digest, blob.size, blob.ref_count), (DIGEST, len(PDF), 2))
+        self.assertEqual((first.blob_id, second.blob_id), (blob.id, blob.id))
+        self.assertEqual((second.digest, second.size, second.file_name), (DIGEST, len(PDF), 'copy of syllabus.pdf'))
+        self.assertEqual(first.file_url, second.file_url)
+        self.assertEqual(len(self._stored_files()), 1)
+        self.assertTrue(blob.storage_name.startswith(f'cas/{DIGEST[:2]}/{DIGEST[2:4]}/{DIGEST}'))
+
+    def test_chunked_upload_of_known_content_drops_staged_copy(self):
+        self._upload()
+        session_id, response = self._upload_chunked()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ContentBlob.objects.get().ref_count, 2)
+        self.assertEqual(Upload.objects.get(id=response.data['id']).digest, DIGEST)
+        self.assertEqual(len(self._stored_files()), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'chunked', f'{session_id}.part')))
+
+    def test_chunks_hashed_by_another_worker_are_rehashed(self):
+        session_id = self.client.post('/api/uploads/chunked/', {'file_name': 'syllabus.pdf', 'size': len(PDF)}, format='json').data['id']
+        for offset in range(0, len(PDF), 500):
+            self.client.put(
+                f'/api/uploads/chunked/{session_id}/?offset={offset}', data=PDF[offset:offset + 500],
+                content_type='application/octet-stream',
+            )
+            # as if the next request were served by a different process
+            uploads._hashers.clear()
+        response = self.client.post(f'/api/uploads/chunked/{session_id}/finalize/')
+        self.assertEqual(Upload.objects.get(id=response.data['id']).digest, DIGEST)
+
+    def test_deleting_last_reference_removes_content(self):
+        first = self._upload()
+        second = self._upload()
+        self.assertEqual(self.client.delete(f'/api/uploads/{first.id}/').status_code, 204)
+        self.assertEqual(ContentBlob.objects.get().ref_count, 1)
+        self.assertEqual(len(self._stored_files()), 1)
+        self.assertEqual(self.client.delete(f'/api/uploads/{second.id}/').status_code, 204)
+        self.assertFalse(ContentBlob.objects.exists())
+        self.assertEqual(self._stored_files(), [])
+        # the same content can be stored again afterwards
+        self.assertEqual(self._upload().blob.ref_count, 1)
+        self.assertEqual(len(self._stored_files()), 1)
+
+    def test_assignment_submissions_are_deduplicated(self):
+        course = Course.objects.create(title='Algebra', instructor=self.teacher)
+        assignment = Assignment.objects.create(
+            course=course, title='Homework', due_date=timezone.now() + timedelta(days=3), total_marks=10,
+        )
+        for i in range(2):
+            student = User.objects.create_user(username=f'student{i}', password='pass12345', role='student')
+            self.client.force_authenticate(student)
+            file = SimpleUploadedFile('answers.pdf', PDF, content_type='application/pdf')
+            response = self.client.post(
+                '/api/assignment-submissions/', {'assignment': assignment.id, 'file': file}, format='multipart',
+            )
+            self.assertEqual(response.status_code, 201)
+        urls = set(AssignmentSubmission.objects.values_list('submitted_file_url', flat=True))
+        self.assertEqual(len(urls), 1)
+        self.assertEqual(ContentBlob.objects.get().ref_count, 2)
+        self.assertEqual(len(self._stored_files()), 1)
+
+    def test_submissions_hold_their_own_reference(self):
+        course = Course.objects.create(title='Algebra', instructor=self.teacher)
+        assignment = Assignment.objects.create(
+            course=course, title='Homework', due_date=timezone.now() + timedelta(days=3), total_marks=10,
+        )
+        student = User.objects.create_user(username='student', password='pass12345', role='student')
+        other = User.objects.create_user(username='student2', password='pass12345', role='student')
+        self.client.force_authenticate(student)
+        file = SimpleUploadedFile('answers.pdf', PDF, content_type='application/pdf')
+        response = self.client.post('/api/assignment-submissions/', {'assignment': assignment.id, 'file': file}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        submission = AssignmentSubmission.objects.get()
+        self.assertEqual((submission.blob.digest, submission.blob.ref_count), (DIGEST, 1))
+        # not listed as an upload to other students
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get('/api/uploads/').data['count'], 0)
+        self.assertFalse(Upload.objects.exists())
+
+        # resubmitting other content releases the first file
+        self.client.force_authenticate(student)
+        file = SimpleUploadedFile('answers.pdf', PDF + b'v2', content_type='application/pdf')
+        response = self.client.post('/api/assignment-submissions/', {'assignment': assignment.id, 'file': file}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(ContentBlob.objects.filter(digest=DIGEST).exists())
+        self.assertEqual(len(self._stored_files()), 1)
+        AssignmentSubmission.objects.get().delete()
+        self.assertFalse(ContentBlob.objects.exists())
+        self.assertEqual(self._stored_files(), [])
+
+
+@skipUnless(mock_aws, 'moto is not installed')
+class S3ChunkedDedupTestCase(TestCase):
+    """Chunked uploads against S3: multipart staging, then a server-side copy to the content key."""
+
+    def setUp(self):
+        self.mock = mock_aws()
+        self.mock.start()
+        self.settings_override = override_settings(
+            STORAGES={
+                'default': {'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+            AWS_ACCESS_KEY_ID='testing', AWS_SECRET_ACCESS_KEY='testing', AWS_STORAGE_BUCKET_NAME='sarasedu-test',
+            AWS_S3_REGION_NAME='us-east-1', AWS_S3_ENDPOINT_URL=None, UPLOAD_CHUNK_BYTES=1,
+        )
+        self.settings_override.enable()
+        self.s3 = boto3.client('s3', region_name='us-east-1')
+        self.s3.create_bucket(Bucket='sarasedu-test')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='teacher', password='pass12345', role='teacher'))
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.mock.stop()
+
+    def test_chunked_upload_is_stored_once(self):
+        content = b'%PDF-1.4\n' + os.urandom(uploads.S3_MIN_PART_BYTES)
+        digest = hashlib.sha256(content).hexdigest()
+        for _ in range(2):
+            session = self.client.post('/api/uploads/chunked/', {'file_name': 'video.pdf', 'size': len(content)}, format='json').data
+            self.assertEqual(session['chunk_size'], uploads.S3_MIN_PART_BYTES)
+            for offset in range(0, len(content), session['chunk_size']):
+                response = self.client.put(
+                    f'/api/uploads/chunked/{session["id"]}/?offset={offset}',
+                    data=content[offset:offset + session['chunk_size']], content_type='application/octet-stream',
+                )
+                self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.client.post(f'/api/uploads/chunked/{session["id"]}/finalize/').status_code, 201)
+
+        blob = ContentBlob.objects.get()
+        self.assertEqual((blob.digest, blob.ref_count), (digest, 2))
+        keys = [o['Key'] for o in self.s3.list_objects_v2(Bucket='sarasedu-test').get('Contents', [])]
+        self.assertEqual(keys, [blob.storage_name])
+        self.assertEqual(self.s3.get_object(Bucket='sarasedu-test', Key=blob.storage_name)['Body'].read(), content)
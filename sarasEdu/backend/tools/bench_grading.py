@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Benchmark test-submission auto-grading: per-answer queries vs bulk grading.
+
+Creates a throwaway test database (like `manage.py test`), builds tests with
+50/100/500 questions and grades one submission per test with both the previous
+per-answer loop and `core.grading.grade_new_submission`, reporting query counts
+and wall time.
+
+Usage:
+    python tools/bench_grading.py [question counts...]
+"""
+import os
+import sys
+import time
+
+import django
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(BASE_DIR, 'sarasedu_backend')
+if os.path.isdir(PROJECT_DIR):
+    sys.path.insert(0, PROJECT_DIR)
+else:
+    sys.path.insert(0, BASE_DIR)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sarasedu_backend.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core import grading
+from core.models import Course, Test, Question, TestSubmission, TestAnswer
+
+User = get_user_model()
+
+
+def legacy_grade(submission, answers_payload):
+    """The per-answer loop TestSubmissionViewSet.create used before bulk grading."""
+    total_awarded = 0
+    for a in answers_payload:
+        qid = a.get('question') or a.get('question_id')
+        ans_text = a.get('student_answer') or a.get('answer') or ''
+        try:
+            q = Question.objects.get(id=qid)
+        except Question.DoesNotExist:
+            continue
+        correct = (q.correct_answer or '').strip().lower()
+        if correct and ans_text and correct == str(ans_text).strip().lower():
+            is_correct, marks_awarded = True, float(q.marks or 0)
+            total_awarded += marks_awarded
+        else:
+            is_correct, marks_awarded = False, 0
+        TestAnswer.objects.create(
+            submission=submission, question=q, student_answer=ans_text,
+            is_correct=is_correct, marks_awarded=marks_awarded,
+        )
+    submission.marks_obtained = total_awarded
+    submission.grade = grading.grade_for_percentage(grading.percentage_of(total_awarded, submission.test.total_marks))
+    submission.save()
+
+
+def make_test(course, teacher, n):
+    test = Test.objects.create(
+        course=course, title=f'Bench {n}', test_type='quiz', scheduled_date=timezone.now(),
+        duration_minutes=60, total_marks=n, created_by=teacher,
+    )
+    questions = Question.objects.bulk_create([
+        Question(test=test, question_type='mcq', question_text=f'q{i}', correct_answer='a', marks=1)
+        for i in range(n)
+    ])
+    payload = [{'question': q.id, 'student_answer': 'a' if i % 2 else 'b'} for i, q in enumerate(questions)]
+    return test, payload
+
+
+def run(fn, test, student, payload):
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        submission = TestSubmission.objects.create(test=test, student=student, status='submitted')
+        fn(submission, payload)
+        elapsed = (time.perf_counter() - start) * 1000
+    return len(ctx.captured_queries), elapsed
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [50, 100, 500]
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        teacher = User.objects.create_user(username='bench_teacher', password='x', role='teacher')
+        course = Course.objects.create(title='Bench', instructor=teacher)
+        print(f'{"questions":>10}{"legacy queries":>16}{"legacy ms":>11}{"bulk queries":>14}{"bulk ms":>10}')
+        for n in sizes:
+            test, payload = make_test(course, teacher, n)
+            s1 = User.objects.create_user(username=f'bench_a{n}', password='x', role='student')
+            s2 = User.objects.create_user(username=f'bench_b{n}', password='x', role='student')
+            legacy_q, legacy_ms = run(legacy_grade, test, s1, payload)
+            bulk_q, bulk_ms = run(grading.grade_new_submission, test, s2, payload)
+            print(f'{n:>10}{legacy_q:>16}{legacy_ms:>11.1f}{bulk_q:>14}{bulk_ms:>10.1f}')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
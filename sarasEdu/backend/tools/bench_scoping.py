@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for BaseModelViewSet.get_queryset role scoping.
+
+Compares the legacy per-request field inspection (kept as the reference in
+`tests/test_role_scoping.py`) with the precompiled rules from `core.scoping`.
+Only queryset construction is timed; no queries are executed, so any configured
+database settings work.
+
+Usage:
+    python tools/bench_scoping.py [iterations]
+"""
+import os
+import sys
+import time
+
+import django
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(BASE_DIR, 'sarasedu_backend')
+if os.path.isdir(PROJECT_DIR):
+    sys.path.insert(0, PROJECT_DIR)
+else:
+    sys.path.insert(0, BASE_DIR)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sarasedu_backend.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.viewsets import BaseModelViewSet
+from tests.test_role_scoping import legacy_scope, scoped_viewsets
+
+User = get_user_model()
+
+
+def build_views(user):
+    factory = APIRequestFactory()
+    views = []
+    for viewset in scoped_viewsets():
+        request = Request(factory.get('/'))
+        request.user = user
+        view = viewset()
+        view.request = request
+        views.append(view)
+    return views
+
+
+def timed(fn, views, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for view in views:
+            fn(view)
+    elapsed = time.perf_counter() - start
+    return elapsed / (iterations * len(views)) * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f'{"role":<10}{"legacy us/req":>16}{"compiled us/req":>18}{"speedup":>10}')
+    for role in ('teacher', 'student'):
+        user = User(id=1, username=f'bench_{role}', role=role)
+        views = build_views(user)
+
+        def legacy(view):
+            return legacy_scope(view.queryset, view.request.user, view.request.query_params)
+
+        def compiled(view):
+            return BaseModelViewSet.get_queryset(view)
+
+        # warm up model metadata caches for both paths
+        timed(legacy, views, 10)
+        timed(compiled, views, 10)
+        before = timed(legacy, views, iterations)
+        after = timed(compiled, views, iterations)
+        print(f'{role:<10}{before:>16.2f}{after:>18.2f}{before / after:>9.2f}x')
+
+
+if __name__ == '__main__':
+    main()
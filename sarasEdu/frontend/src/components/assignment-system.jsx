@@ -937,8 +937,8 @@ function CreateAssignmentDialog({ open, onOpenChange, onCreated, initial = null,
                           key={idx}
                           role="button"
                           tabIndex={0}
-                          onKeyDown={(e) => { if (e.key === 'Enter' || e.key === ' ') { e.preventDefault(); href && window.open(href, '_blank', 'noopener,noreferrer'); } }}
-                          onClick={() => { if (href) window.open(href, '_blank', 'noopener,noreferrer'); }}
+                          onKeyDown={(e) => { if (e.key === 'Enter' || e.key === ' ') { e.preventDefault(); href && api.openMedia(href).catch(() => toast.error('Unable to open file')); } }}
+                          onClick={() => { if (href) api.openMedia(href).catch(() => toast.error('Unable to open file')); }}
                           className="flex items-center justify-between p-3 border rounded-lg cursor-pointer"
                         >
                           <div className="flex items-center gap-4">
@@ -1037,12 +1037,13 @@ function CreateAssignmentDialog({ open, onOpenChange, onCreated, initial = null,
                               )}
                               {fileUrl && (
                                 <>
-                                  <a href={fileUrl} target="_blank" rel="noopener noreferrer" download onClick={(e) => { try { e.stopPropagation(); } catch (ex) {} }}>
-                                    <Button size="sm" variant="outline" onClick={(e) => { try { e.stopPropagation(); } catch (ex) {} }}>
-                                      <Download className="h-3 w-3 mr-1" />
-                                      Download
-                                    </Button>
-                                  </a>
+                                  <Button size="sm" variant="outline" onClick={(e) => {
+                                    try { e.stopPropagation(); } catch (ex) {}
+                                    api.openMedia(fileUrl).catch(() => toast.error('Unable to open file'));
+                                  }}>
+                                    <Download className="h-3 w-3 mr-1" />
+                                    Download
+                                  </Button>
                                   {status === 'submitted' && (
                                     <Button size="sm" onClick={() => {
                                       try { if (typeof document !== 'undefined' && document.activeElement && typeof document.activeElement.blur === 'function') document.activeElement.blur(); } catch (ex) { }
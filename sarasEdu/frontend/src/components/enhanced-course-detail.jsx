@@ -68,74 +68,87 @@ export function EnhancedCourseDetail({ courseId, userRole, onBack }) {
     setLectures(prev => prev.map(l => ({ ...l, current: l.id === lectureId })));
     setCurrentProgress(0);
     setVideoError(false);
-    // optimistic playback: only for Google Drive-hosted videos
+    // optimistic playback: only for Google Drive-hosted and uploaded videos
     const raw = lec.video_url || lec.video_file;
     const playable = getPlayableSrc(raw);
     if (!playable) {
-      // unsupported source (not Google Drive)
+      // unsupported source (not Google Drive or local media)
       setVideoSrc('');
       setVideoLoading(false);
       setVideoError(true);
-      setVideoErrorMessage('Only Google Drive-hosted videos are supported.');
+      setVideoErrorMessage('Only Google Drive-hosted and uploaded videos are supported.');
       return;
     }
 
-    const srcToUse = playable;
-
-    setVideoSrc(srcToUse);
-    setVideoLoading(true);
-    setVideoError(false);
-    setVideoErrorMessage('');
+    const startPlayback = (srcToUse) => {
+      setVideoSrc(srcToUse);
+      setVideoLoading(true);
+      setVideoError(false);
+      setVideoErrorMessage('');
 
-    // Try to play immediately; if autoplay is blocked, retry muted, then fall back to absolute backend proxied URL.
-    const el = videoRef.current;
-    if (!el) {
-      setIsPlaying(false);
-      return;
-    }
+      // Try to play immediately; if autoplay is blocked, retry muted, then fall back to absolute backend proxied URL.
+      const el = videoRef.current;
+      if (!el) {
+        setIsPlaying(false);
+        return;
+      }
 
-    const tryPlay = async (srcToUse, mutedAttempt = false) => {
-      try {
-        el.src = srcToUse;
-        // ensure browser tries to preload small amount
-        try { el.load?.(); } catch(e){}
-        if (mutedAttempt) {
-          try { el.muted = true; } catch (e) {}
+      const tryPlay = async (srcToUse, mutedAttempt = false) => {
+        try {
+          el.src = srcToUse;
+          // ensure browser tries to preload small amount
+          try { el.load?.(); } catch(e){}
+          if (mutedAttempt) {
+            try { el.muted = true; } catch (e) {}
+          }
+          await el.play();
+          setIsPlaying(true);
+          setVideoLoading(false);
+          return true;
+        } catch (e) {
+          return false;
         }
-        await el.play();
-        setIsPlaying(true);
+      };
+
+      (async () => {
+        // Try direct playable URL. Autoplay may be blocked; try muted fallback.
+        let ok = await tryPlay(srcToUse, false);
+        if (ok) return;
+        ok = await tryPlay(srcToUse, true);
+        if (ok) return;
+
+        // all attempts failed — show helpful message
+        setIsPlaying(false);
         setVideoLoading(false);
-        return true;
-      } catch (e) {
-        return false;
-      }
+        setVideoError(true);
+        setVideoErrorMessage('Unable to start playback quickly. Check network or cross-origin restrictions.');
+        console.warn('Playback attempts failed for', srcToUse);
+      })();
     };
 
-    (async () => {
-      // Try direct playable URL. Autoplay may be blocked; try muted fallback.
-      let ok = await tryPlay(srcToUse, false);
-      if (ok) return;
-      ok = await tryPlay(srcToUse, true);
-      if (ok) return;
-
-      // all attempts failed — show helpful message
-      setIsPlaying(false);
-      setVideoLoading(false);
-      setVideoError(true);
-      setVideoErrorMessage('Unable to start playback quickly. Check network or cross-origin restrictions.');
-      console.warn('Playback attempts failed for', srcToUse);
-    })();
+    if (api.isLocalMedia(playable)) {
+      // files under /media are loaded through a short-lived signed URL
+      setVideoLoading(true);
+      api.mediaUrl(playable).then(startPlayback).catch(() => {
+        setVideoLoading(false);
+        setVideoError(true);
+        setVideoErrorMessage('Unable to load this video.');
+      });
+      return;
+    }
+    startPlayback(playable);
   };
 
   // Turn common drive/google share links into a direct-download/streamable URL when possible
   const getPlayableSrc = (raw) => {
-    // Only support Google Drive / docs links. The URL is expected to be
-    // stored in the database already in a playable form. Return the raw
-    // DB value when it points to Drive/docs; otherwise return empty.
+    // Support Google Drive / docs links and files uploaded to local media.
+    // The URL is expected to be stored in the database already in a playable
+    // form. Return the raw DB value when it is one of those; otherwise empty.
     if (!raw) return '';
     try {
       const url = String(raw).trim();
       if (url.includes('drive.google.com') || url.includes('docs.google.com')) return url;
+      if (api.isLocalMedia(url)) return url;
       return '';
     } catch (e) {
       return '';
@@ -173,7 +186,7 @@ export function EnhancedCourseDetail({ courseId, userRole, onBack }) {
     const url = getMaterialUrl(material);
     if (!url) return alert('No preview available for this material');
     // Open in a new tab for preview; the browser will open PDFs, images, or the hosted file.
-    window.open(url, '_blank');
+    api.openMedia(url).catch(() => alert('Unable to open this material'));
   };
 
   const handleDownload = async (materialId) => {
@@ -182,10 +195,12 @@ export function EnhancedCourseDetail({ courseId, userRole, onBack }) {
     const url = getMaterialUrl(material);
     if (!url) return alert('No downloadable URL available for this material');
 
+    let href = url;
     try {
+      href = await api.mediaUrl(url);
       // Attempt a simple download by creating an anchor. This works for same-origin or CORS-enabled URLs.
       const a = document.createElement('a');
-      a.href = url;
+      a.href = href;
       // prefer a sensible filename if available
       const safeName = (material.title || `material-${material.id}`).replace(/[^a-z0-9._-]/gi, '_');
       a.download = safeName;
@@ -195,7 +210,7 @@ export function EnhancedCourseDetail({ courseId, userRole, onBack }) {
       a.remove();
     } catch (e) {
       console.error('Download failed, falling back to open in new tab', e);
-      window.open(url, '_blank');
+      window.open(href, '_blank');
     }
   };
 
@@ -238,7 +253,7 @@ export function EnhancedCourseDetail({ courseId, userRole, onBack }) {
       const zip = new JSZipLib();
       for (const item of urls) {
         try {
-          const resp = await fetch(item.url, { cache: 'no-store' });
+          const resp = await fetch(await api.mediaUrl(item.url), { cache: 'no-store' });
           if (!resp.ok) {
             console.warn('Failed to fetch', item.url, resp.status);
             continue;
@@ -256,9 +271,11 @@ export function EnhancedCourseDetail({ courseId, userRole, onBack }) {
     } catch (e) {
       console.warn('ZIP process failed, falling back to individual downloads', e);
       for (const item of urls) {
+        let href = item.url;
         try {
+          href = await api.mediaUrl(item.url);
           const a = document.createElement('a');
-          a.href = item.url;
+          a.href = href;
           a.target = '_blank';
           a.download = (item.title || `file-${item.id}`).replace(/[^a-z0-9._-]/gi, '_');
           document.body.appendChild(a);
@@ -266,7 +283,7 @@ export function EnhancedCourseDetail({ courseId, userRole, onBack }) {
           a.remove();
         } catch (err) {
           console.warn('Fallback download failed for', item.url, err);
-          window.open(item.url, '_blank');
+          window.open(href, '_blank');
         }
       }
     }
@@ -315,17 +332,13 @@ export function EnhancedCourseDetail({ courseId, userRole, onBack }) {
     const load = async () => {
       setLoading(true);
       try {
-        const [courseData, lecturesData, materialsData] = await Promise.all([
-          api.getCourse(courseId),
-          api.getLectures(courseId),
-          api.getStudyMaterials(courseId)
-        ]);
+        const page = await api.getCourseFull(courseId);
 
         if (!mounted) return;
 
-        // lecturesData may be paginated or an array
-        const lecturesList = Array.isArray(lecturesData) ? lecturesData : (lecturesData.results || []);
-        const materialsList = Array.isArray(materialsData) ? materialsData : (materialsData.results || []);
+        const courseData = page.course;
+        const lecturesList = page.lectures || [];
+        const materialsList = page.study_materials || [];
 
         // normalize lectures: ensure id, title, duration, completed, progress
         const normalizedLectures = lecturesList.map((l, idx) => ({
@@ -512,9 +525,9 @@ export function EnhancedCourseDetail({ courseId, userRole, onBack }) {
     const raw = currentVideoData && (currentVideoData.video_url || currentVideoData.video_file);
     const playable = getPlayableSrc(raw);
     if (!raw || !playable) {
-      // Only Google Drive files are supported by the player
+      // Only Google Drive and local media files are supported by the player
       setVideoError(true);
-      setVideoErrorMessage('Only Google Drive-hosted videos are supported.');
+      setVideoErrorMessage('Only Google Drive-hosted and uploaded videos are supported.');
       setVideoLoading(false);
       return;
     }
@@ -535,7 +548,9 @@ export function EnhancedCourseDetail({ courseId, userRole, onBack }) {
         // Decide whether to probe via backend proxy for Drive URLs (to avoid CORS and Drive viewer HTML)
         const isDrive = playable && (playable.includes('drive.google.com') || playable.includes('docs.google.com') || playable.includes('uc?export=download'));
         const proxyPrefix = '/api/video-proxy/?url=';
-        const probeUrl = isDrive ? `${proxyPrefix}${encodeURIComponent(playable)}` : playable;
+        // local media is only readable through a signed URL
+        const source = api.isLocalMedia(playable) ? await api.mediaUrl(playable) : playable;
+        const probeUrl = isDrive ? `${proxyPrefix}${encodeURIComponent(playable)}` : source;
 
         // Try the direct playable URL (or proxy endpoint for Drive)
         let result = await attemptFetch(probeUrl);
@@ -543,7 +558,7 @@ export function EnhancedCourseDetail({ courseId, userRole, onBack }) {
         if (result && result.resp && (result.resp.status === 200 || result.resp.status === 206)) {
           // if dev server returned index.html (vite), txt will contain the HTML
           if (result.ct.startsWith('video') || result.ct.includes('application/octet-stream')) {
-            if (!videoSrc) setVideoSrc(playable);
+            if (!videoSrc) setVideoSrc(source);
             setVideoError(false);
             setVideoErrorMessage('');
             setVideoLoading(false);
@@ -620,7 +635,7 @@ export function EnhancedCourseDetail({ courseId, userRole, onBack }) {
   if (loading) return <div>Loading course...</div>;
   if (!course) return <div>Course not found</div>;
 
-  // Only support Google Drive-hosted videos for playback.
+  // Only support Google Drive-hosted and uploaded videos for playback.
   const rawCurrentVideo = currentVideoData && (currentVideoData.video_url || currentVideoData.video_file);
   const currentPlayable = getPlayableSrc(rawCurrentVideo);
   // If the stored Drive URL is a share/view/open link, derive the Drive preview URL
@@ -748,7 +763,7 @@ export function EnhancedCourseDetail({ courseId, userRole, onBack }) {
                       <video
                         ref={videoRef}
                         className="absolute inset-0 w-full h-full object-contain"
-                        src={videoSrc || currentPlayable || undefined}
+                        src={videoSrc || (api.isLocalMedia(currentPlayable) ? undefined : currentPlayable) || undefined}
                         controls
                         playsInline
                         preload="auto"
@@ -773,8 +788,8 @@ export function EnhancedCourseDetail({ courseId, userRole, onBack }) {
                 ) : (
                   <div className="absolute inset-0 flex items-center justify-center">
                     <div className="text-center text-white bg-black/50 p-4 rounded">
-                      <h3 className="text-lg font-semibold mb-2">Only Google Drive videos supported</h3>
-                      <p className="text-sm opacity-80 mb-2">This player only supports Google Drive-hosted video files. Add a Drive file URL to the lecture.</p>
+                      <h3 className="text-lg font-semibold mb-2">Only Google Drive and uploaded videos supported</h3>
+                      <p className="text-sm opacity-80 mb-2">This player only supports Google Drive-hosted and uploaded video files. Add a Drive file URL or upload the video to the lecture.</p>
                       {currentVideoData && currentVideoData.title && (
                         <p className="text-sm opacity-80">Selected: {currentVideoData.title}</p>
                       )}
@@ -795,7 +810,7 @@ export function EnhancedCourseDetail({ courseId, userRole, onBack }) {
                         const playable = getPlayableSrc(raw);
                         // Open the original DB URL when available (user requested DB links be used as-is).
                         const toOpen = raw || videoSrc || playable;
-                        window.open(toOpen, '_blank');
+                        api.openMedia(toOpen).catch(() => alert('Unable to open this video'));
                     }}>
                       <ExternalLink className="h-4 w-4 mr-2" />
                       Open in New Tab
@@ -168,12 +168,10 @@ export function EnhancedLibrary() {
       toast.error('No file available to view');
       return;
     }
-    try {
-      window.open(url, '_blank', 'noopener,noreferrer');
-    } catch (err) {
+    api.openMedia(url).catch((err) => {
       console.error('Failed to open file', err);
       toast.error('Unable to open file');
-    }
+    });
   };
 
     const downloadResource = async (resource) => {
@@ -184,7 +182,7 @@ export function EnhancedLibrary() {
       }
 
       try {
-        const res = await fetch(url);
+        const res = await fetch(await api.mediaUrl(url));
         if (!res.ok) throw new Error(`Network error ${res.status}`);
         const blob = await res.blob();
         const urlParts = url.split('/');
@@ -211,7 +209,7 @@ export function EnhancedLibrary() {
       } catch (err) {
         console.error('Download failed, falling back to opening in new tab', err);
         try {
-          window.open(url, '_blank', 'noopener,noreferrer');
+          await api.openMedia(url);
           toast('Opened file in new tab; use browser Save As to download');
           try {
             const resp = await api.recordLibraryDownload(resource.id);
@@ -1,10 +1,26 @@
-import React, { useState } from 'react'
+import React, { useEffect, useState } from 'react'
+import api from '../../services/api'
 
 const ERROR_IMG_SRC =
   'data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iODgiIGhlaWdodD0iODgiIHhtbG5zPSJodHRwOi8vd3d3LnczLm9yZy8yMDAwL3N2ZyIgc3Ryb2tlPSIjMDAwIiBzdHJva2UtbGluZWpvaW49InJvdW5kIiBvcGFjaXR5PSIuMyIgZmlsbD0ibm9uZSIgc3Ryb2tlLXdpZHRoPSIzLjciPjxyZWN0IHg9IjE2IiB5PSIxNiIgd2lkdGg9IjU2IiBoZWlnaHQ9IjU2IiByeD0iNiIvPjxwYXRoIGQ9Im0xNiA1OCAxNi0xOCAzMiAzMiIvPjxjaXJjbGUgY3g9IjUzIiBjeT0iMzUiIHI9IjciLz48L3N2Zz4KCg=='
 
 export function ImageWithFallback(props) {
   const [didError, setDidError] = useState(false)
+  // uploaded images (/media/...) are loaded through a signed URL
+  const [resolvedSrc, setResolvedSrc] = useState(api.isLocalMedia(props.src) ? undefined : props.src)
+
+  useEffect(() => {
+    let cancelled = false
+    if (!api.isLocalMedia(props.src)) {
+      setResolvedSrc(props.src)
+      return
+    }
+    setResolvedSrc(undefined)
+    api.mediaUrl(props.src)
+      .then((url) => { if (!cancelled) setResolvedSrc(url) })
+      .catch(() => { if (!cancelled) setDidError(true) })
+    return () => { cancelled = true }
+  }, [props.src])
 
   const handleError = () => {
     // Log broken source for quick diagnosis (network / CORS / 404)
@@ -25,7 +41,7 @@ export function ImageWithFallback(props) {
     </div>
   ) : (
     <img
-      src={src}
+      src={resolvedSrc}
       alt={alt}
       className={className}
       style={style}
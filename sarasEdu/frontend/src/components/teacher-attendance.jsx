@@ -28,6 +28,7 @@ import {
   Download
 } from 'lucide-react';
 import { format } from 'date-fns';
+import { markAttendanceBulk } from '../services/api';
 
 // Removed TypeScript-only declarations. Data should be fetched from API.
 export function TeacherAttendance() {
@@ -85,11 +86,23 @@ export function TeacherAttendance() {
     setShowNotesDialog(false);
   };
 
-  const handleSubmitAttendance = () => {
-    // Here you would submit to API
-    console.log('Submitting attendance:', attendance);
-    alert('Attendance marked successfully!');
-    setEditMode(false);
+  const handleSubmitAttendance = async () => {
+    const records = Object.values(attendance)
+      .filter(a => a.status)
+      .map(a => ({ student: a.studentId, status: a.status, notes: a.notes || '' }));
+    try {
+      const res = await markAttendanceBulk(selectedCourse, format(selectedDate, 'yyyy-MM-dd'), records);
+      if (res.errors) {
+        const failed = res.results.filter(r => r.result === 'error');
+        alert(`Attendance saved for ${res.created + res.updated} students; ${failed.length} failed: ${failed.map(r => r.error).join(', ')}`);
+      } else {
+        alert('Attendance marked successfully!');
+      }
+      setEditMode(false);
+    } catch (error) {
+      console.error('Error marking attendance:', error);
+      alert(error.message || 'Failed to mark attendance');
+    }
   };
 
   const markAllPresent = () => {
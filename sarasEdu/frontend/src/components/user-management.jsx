@@ -230,13 +230,12 @@ export function UserManagement({ userType, onSelectStudent, currentUser }) {
 
         // Fetch attendance records for each student
         try {
-          const attendanceRes = await api.request('/attendance/');
-          const records = attendanceRes.results || attendanceRes || [];
+          // per-student present rates, aggregated server-side
+          const attendanceRes = await api.request('/attendance/stats/?group=student&page_size=500');
+          const rates = new Map((attendanceRes.results || []).map(r => [r.student_id, r.present_rate]));
           students.forEach(student => {
-            const studentAttendance = records.filter(r => r.student === student.id);
-            if (studentAttendance.length > 0) {
-              const presentCount = studentAttendance.filter(r => r.status === 'present').length;
-              student.attendance = Math.round((presentCount / studentAttendance.length) * 100);
+            if (rates.has(student.id)) {
+              student.attendance = Math.round(rates.get(student.id));
             }
           });
         } catch (err) {
@@ -618,13 +617,12 @@ export function UserManagement({ userType, onSelectStudent, currentUser }) {
       }
 
       try {
-        const attendanceRes = await api.request('/attendance/');
-        const records = attendanceRes.results || attendanceRes || [];
+        // per-student present rates, aggregated server-side
+        const attendanceRes = await api.request('/attendance/stats/?group=student&page_size=500');
+        const rates = new Map((attendanceRes.results || []).map(r => [r.student_id, r.present_rate]));
         students.forEach(student => {
-          const studentAttendance = records.filter(r => r.student === student.id);
-          if (studentAttendance.length > 0) {
-            const presentCount = studentAttendance.filter(r => r.status === 'present').length;
-            student.attendance = Math.round((presentCount / studentAttendance.length) * 100);
+          if (rates.has(student.id)) {
+            student.attendance = Math.round(rates.get(student.id));
           }
         });
       } catch (err) {
@@ -5,20 +5,22 @@ import { request } from './api';
  */
 
 // Student Analytics
+// Computed server-side (GET /analytics/student/<id>/) from grouped queries over
+// all of the student's rows, rather than paginated lists fetched per resource.
 export async function getStudentAnalytics(userId, timeRange = 'monthly') {
   try {
-    const [overview, courses, activity, scores] = await Promise.all([
-      getStudentOverview(userId, timeRange),
-      getStudentCoursePerformance(userId, timeRange),
-      getStudentStudyActivity(userId, timeRange),
-      getStudentRecentScores(userId, timeRange)
-    ]);
-
+    const data = await request(`/analytics/student/${userId}/?timeRange=${encodeURIComponent(timeRange)}`);
     return {
-      overview,
-      coursePerformance: courses,
-      studyActivity: activity,
-      recentScores: scores
+      overview: data.overview,
+      coursePerformance: data.coursePerformance || [],
+      studyActivity: (data.studyActivity || []).map(day => ({
+        date: new Date(`${day.date}T00:00:00`).getTime(),
+        hours: day.hours
+      })),
+      recentScores: (data.recentScores || []).map(score => ({
+        ...score,
+        date: new Date(score.date).toLocaleDateString()
+      }))
     };
   } catch (error) {
     console.error('Error fetching student analytics:', error);
@@ -26,240 +28,20 @@ export async function getStudentAnalytics(userId, timeRange = 'monthly') {
   }
 }
 
-async function getStudentOverview(userId, timeRange) {
-  try {
-    // Get overall score from test submissions and assignment submissions
-    const [submissionsRes, assignmentRes, lectureRes, enrollmentsRes, allStudentsRes] = await Promise.allSettled([
-      request(`/test-submissions/?student=${userId}`),
-      request(`/assignment-submissions/?student=${userId}`),
-      request(`/lecture-progress/?student=${userId}`),
-      request(`/enrollments/?student=${userId}`),
-      request('/users/')
-    ]);
-
-    const submissionsList = submissionsRes.status === 'fulfilled' ? (submissionsRes.value?.results || submissionsRes.value || []) : [];
-    const assignmentList = assignmentRes.status === 'fulfilled' ? (assignmentRes.value?.results || assignmentRes.value || []) : [];
-    const progressList = lectureRes.status === 'fulfilled' ? (lectureRes.value?.results || lectureRes.value || []) : [];
-    const enrollmentList = enrollmentsRes.status === 'fulfilled' ? (enrollmentsRes.value?.results || enrollmentsRes.value || []) : [];
-    const allStudents = allStudentsRes.status === 'fulfilled' ? (allStudentsRes.value?.results || allStudentsRes.value || []) : [];
-
-    // Overall score: average of test and assignment marks
-    const testScores = submissionsList.map(s => parseFloat(s.marks_obtained)).filter(v => !isNaN(v));
-    const assignmentScores = assignmentList.map(a => parseFloat(a.marks_obtained)).filter(v => !isNaN(v));
-    const allScores = [...testScores, ...assignmentScores];
-    const overallScore = allScores.length > 0 
-      ? Math.round(allScores.reduce((acc, score) => acc + score, 0) / allScores.length) 
-      : 0;
-
-    // Study hours from lecture progress using watch_time_minutes
-    const studyHours = Math.round(progressList.reduce((acc, lp) => acc + (lp.watch_time_minutes || 0), 0) / 60);
-
-    // Total courses enrolled
-    const totalCourses = enrollmentList.length;
-
-    // Calculate rank based on overall scores of all students
-    const studentScores = new Map();
-    studentScores.set(userId, overallScore);
-    
-    // Calculate average score for all students to estimate ranks
-    const studentIds = [...new Set(submissionsList.map(s => s.student).concat(assignmentList.map(a => a.student)))];
-    let rank = 1;
-    for (const sid of studentIds) {
-      if (sid === userId) continue;
-      const subs = submissionsList.filter(s => s.student === sid);
-      const assigns = assignmentList.filter(a => a.student === sid);
-      const scores = [
-        ...subs.map(s => parseFloat(s.marks_obtained)).filter(v => !isNaN(v)),
-        ...assigns.map(a => parseFloat(a.marks_obtained)).filter(v => !isNaN(v))
-      ];
-      const avg = scores.length > 0 ? scores.reduce((a, b) => a + b, 0) / scores.length : 0;
-      if (avg > overallScore) rank++;
-    }
-
-    const totalStudents = allStudents.filter(u => u.role === 'student').length;
-
-    return {
-      overallScore,
-      studyHours,
-      totalCourses,
-      rank: Math.max(1, rank),
-      totalStudents
-    };
-  } catch (error) {
-    console.error('Error fetching student overview:', error);
-    return { overallScore: 0, studyHours: 0, totalCourses: 0, rank: 0, totalStudents: 0 };
-  }
-}
-
-async function getStudentCoursePerformance(userId, timeRange) {
-  try {
-    const [enrollmentsRes, submissionsRes, assignmentRes] = await Promise.allSettled([
-      request(`/enrollments/?student=${userId}`),
-      request(`/test-submissions/?student=${userId}`),
-      request(`/assignment-submissions/?student=${userId}`)
-    ]);
-
-    const enrollmentList = enrollmentsRes.status === 'fulfilled' ? (enrollmentsRes.value?.results || enrollmentsRes.value || []) : [];
-    const submissionsList = submissionsRes.status === 'fulfilled' ? (submissionsRes.value?.results || submissionsRes.value || []) : [];
-    const assignmentList = assignmentRes.status === 'fulfilled' ? (assignmentRes.value?.results || assignmentRes.value || []) : [];
-
-    const coursePerformance = [];
-    
-    for (const enrollment of enrollmentList) {
-      const courseId = enrollment.course;
-      
-      // Get course details
-      let courseName = `Course ${courseId}`;
-      try {
-        const courseRes = await request(`/courses/${courseId}/`);
-        if (courseRes?.title) courseName = courseRes.title;
-      } catch (_) { /* use default name */ }
-
-      // Get test submissions for this course
-      const courseSubmissions = submissionsList.filter(sub => sub.course === courseId);
-      const testScores = courseSubmissions.map(s => parseFloat(s.marks_obtained)).filter(v => !isNaN(v));
-
-      // Get assignment submissions for this course
-      const courseAssignments = assignmentList.filter(a => a.course === courseId);
-      const assignmentScores = courseAssignments.map(a => parseFloat(a.marks_obtained)).filter(v => !isNaN(v));
-
-      // Combined average score
-      const allScores = [...testScores, ...assignmentScores];
-      const avgScore = allScores.length > 0 
-        ? Math.round(allScores.reduce((acc, score) => acc + score, 0) / allScores.length)
-        : 0;
-
-      // Progress from enrollment
-      const progress = Math.round(parseFloat(enrollment.progress_percentage) || 0);
-
-      coursePerformance.push({
-        course: courseName,
-        score: avgScore,
-        progress: Math.min(100, progress),
-        assignments: courseAssignments.length,
-        tests: courseSubmissions.length
-      });
-    }
-
-    return coursePerformance;
-  } catch (error) {
-    console.error('Error fetching course performance:', error);
-    return [];
-  }
-}
-
-async function getStudentStudyActivity(userId, timeRange) {
-  try {
-    const lectureProgressRes = await request(`/lecture-progress/?student=${userId}`);
-    const progressList = lectureProgressRes?.results || lectureProgressRes || [];
-
-    // Generate last 7 days activity based on watch_time_minutes
-    const today = new Date();
-    const activity = [];
-    
-    for (let i = 6; i >= 0; i--) {
-      const date = new Date(today);
-      date.setDate(date.getDate() - i);
-      date.setHours(0, 0, 0, 0);
-      
-      const dayProgress = progressList.filter(lp => {
-        const lpDate = new Date(lp.updated_at || lp.created_at || lp.completed_at || 0);
-        lpDate.setHours(0, 0, 0, 0);
-        return lpDate.getTime() === date.getTime();
-      });
-      
-      // Sum watch_time_minutes and convert to hours
-      const totalMinutes = dayProgress.reduce((acc, lp) => acc + (lp.watch_time_minutes || 0), 0);
-      const hours = Math.round((totalMinutes / 60) * 10) / 10; // 1 decimal place
-
-      activity.push({
-        date: date.getTime(),
-        hours: Math.max(0, hours)
-      });
-    }
-
-    return activity;
-  } catch (error) {
-    console.error('Error fetching study activity:', error);
-    return [];
-  }
-}
-
-async function getStudentRecentScores(userId, timeRange) {
-  try {
-    const [submissionsRes, assignmentRes] = await Promise.allSettled([
-      request(`/test-submissions/?student=${userId}`),
-      request(`/assignment-submissions/?student=${userId}`)
-    ]);
-
-    const submissionsList = submissionsRes.status === 'fulfilled' ? (submissionsRes.value?.results || submissionsRes.value || []) : [];
-    const assignmentList = assignmentRes.status === 'fulfilled' ? (assignmentRes.value?.results || assignmentRes.value || []) : [];
-
-    const recentScores = [];
-
-    // Add test submissions (last 5)
-    for (const submission of submissionsList.slice(-5)) {
-      let testName = `Test ${submission.test}`;
-      try {
-        const testRes = await request(`/tests/${submission.test}/`);
-        if (testRes?.title) testName = testRes.title;
-      } catch (_) { /* use default name */ }
-
-      const marks = parseFloat(submission.marks_obtained) || 0;
-      const totalMarks = parseFloat(submission.total_marks) || 100;
-
-      recentScores.push({
-        type: 'Test',
-        subject: testName,
-        date: new Date(submission.created_at).toLocaleDateString(),
-        score: Math.round(marks),
-        maxScore: Math.round(totalMarks)
-      });
-    }
-
-    // Add assignment submissions (last 5)
-    for (const submission of assignmentList.slice(-5)) {
-      let assignmentName = `Assignment ${submission.assignment}`;
-      try {
-        const assignRes = await request(`/assignments/${submission.assignment}/`);
-        if (assignRes?.title) assignmentName = assignRes.title;
-      } catch (_) { /* use default name */ }
-
-      const marks = parseFloat(submission.marks_obtained) || 0;
-      const totalMarks = parseFloat(submission.total_marks) || 100;
-
-      recentScores.push({
-        type: 'Assignment',
-        subject: assignmentName,
-        date: new Date(submission.created_at).toLocaleDateString(),
-        score: Math.round(marks),
-        maxScore: Math.round(totalMarks)
-      });
-    }
-
-    // Sort by date (most recent first) and keep last 5
-    recentScores.sort((a, b) => new Date(b.date) - new Date(a.date));
-    return recentScores.slice(0, 5);
-  } catch (error) {
-    console.error('Error fetching recent scores:', error);
-    return [];
-  }
-}
-
 // Teacher Analytics
+// Rolled up per course on the server (GET /analytics/teacher/<id>/, cached briefly).
 export async function getTeacherAnalytics(userId, timeRange = 'monthly') {
   try {
-    const [overview, engagement, coursePerf, aiInsights] = await Promise.all([
-      getTeacherOverview(userId, timeRange),
-      getEngagementMetrics(userId, timeRange),
-      getTeacherCoursePerformance(userId, timeRange),
+    const [data, aiInsights] = await Promise.all([
+      request(`/analytics/teacher/${userId}/?timeRange=${encodeURIComponent(timeRange)}`),
       getAIInsights(userId, timeRange)
     ]);
 
     return {
-      overview,
-      engagementMetrics: engagement,
-      coursePerformance: coursePerf,
+      overview: data.overview,
+      engagement: data.engagement,
+      engagementMetrics: data.engagementMetrics || [],
+      coursePerformance: data.coursePerformance || [],
       aiInsights
     };
   } catch (error) {
@@ -268,264 +50,6 @@ export async function getTeacherAnalytics(userId, timeRange = 'monthly') {
   }
 }
 
-async function getTeacherOverview(userId, timeRange) {
-  try {
-    // Get courses created by teacher
-    const courses = await request(`/courses/?instructor=${userId}`);
-    const courseList = courses?.results || courses || [];
-
-    if (courseList.length === 0) {
-      return { totalStudents: 0, avgProgress: 0, avgScore: 0, studyTime: 0 };
-    }
-
-    let totalStudents = 0;
-    let totalStudyTime = 0;
-    const allEnrollments = [];
-
-    // Gather all enrollments for teacher's courses
-    for (const course of courseList) {
-      const enrollments = await request(`/enrollments/?course=${course.id}`);
-      const enrollmentList = enrollments?.results || enrollments || [];
-      allEnrollments.push(...enrollmentList);
-      totalStudents += enrollmentList.length;
-    }
-
-    if (allEnrollments.length === 0) {
-      return { totalStudents: 0, avgProgress: 0, avgScore: 0, studyTime: 0 };
-    }
-
-    // Calculate average progress from enrollments
-    const progresses = allEnrollments.map(e => parseFloat(e.progress_percentage)).filter(v => !isNaN(v));
-    const avgProgress = progresses.length > 0 
-      ? Math.round(progresses.reduce((a, b) => a + b, 0) / progresses.length) 
-      : 0;
-
-    // Collect student IDs for score and study time calculation
-    const studentIds = [...new Set(allEnrollments.map(e => e.student))];
-
-    // Get test/quiz submissions for all students
-    let totalTestScore = 0;
-    let totalTestCount = 0;
-    
-    for (const studentId of studentIds) {
-      const submissions = await request(`/test-submissions/?student=${studentId}`);
-      const submissionsList = submissions?.results || submissions || [];
-      for (const sub of submissionsList) {
-        const marks = parseFloat(sub.marks_obtained);
-        if (!isNaN(marks)) {
-          totalTestScore += marks;
-          totalTestCount++;
-        }
-      }
-
-      // Get lecture progress for study time
-      const progress = await request(`/lecture-progress/?student=${studentId}`);
-      const progressList = progress?.results || progress || [];
-      totalStudyTime += progressList.reduce((acc, p) => acc + (p.watch_time_minutes || 0), 0) * 60; // convert to seconds
-    }
-
-    // Get assignment submissions for all students
-    let totalAssignmentScore = 0;
-    let totalAssignmentCount = 0;
-    
-    for (const studentId of studentIds) {
-      const assignmentSubs = await request(`/assignment-submissions/?student=${studentId}`);
-      const assignmentList = assignmentSubs?.results || assignmentSubs || [];
-      for (const sub of assignmentList) {
-        const marks = parseFloat(sub.marks_obtained);
-        if (!isNaN(marks)) {
-          totalAssignmentScore += marks;
-          totalAssignmentCount++;
-        }
-      }
-    }
-
-    // Calculate average score combining tests and assignments
-    const totalScoreSum = totalTestScore + totalAssignmentScore;
-    const totalScoreCount = totalTestCount + totalAssignmentCount;
-    const avgScore = totalScoreCount > 0 
-      ? Math.round(totalScoreSum / totalScoreCount) 
-      : 0;
-
-    return {
-      totalStudents,
-      avgProgress,
-      avgScore,
-      studyTime: totalStudyTime
-    };
-  } catch (error) {
-    console.error('Error fetching teacher overview:', error);
-    return { totalStudents: 0, avgProgress: 0, avgScore: 0, studyTime: 0 };
-  }
-}
-
-async function getEngagementMetrics(userId, timeRange) {
-  try {
-    // Get courses created by teacher
-    const courses = await request(`/courses/?instructor=${userId}`);
-    const courseList = courses?.results || courses || [];
-
-    if (courseList.length === 0) {
-      return [];
-    }
-
-    // Gather all enrollments for teacher's courses
-    const allEnrollments = [];
-    for (const course of courseList) {
-      const enrollments = await request(`/enrollments/?course=${course.id}`);
-      const enrollmentList = enrollments?.results || enrollments || [];
-      allEnrollments.push(...enrollmentList);
-    }
-
-    if (allEnrollments.length === 0) {
-      return [];
-    }
-
-    const studentIds = [...new Set(allEnrollments.map(e => e.student))];
-
-    // Student Participation: % of students with recent lecture progress
-    const now = new Date();
-    const weekAgo = new Date(now); weekAgo.setDate(now.getDate() - 7);
-    let activeStudents = 0;
-    for (const studentId of studentIds) {
-      const progress = await request(`/lecture-progress/?student=${studentId}`);
-      const progressList = progress?.results || progress || [];
-      const recentActivity = progressList.some(p => {
-        const ts = new Date(p.completed_at || p.updated_at || p.created_at || 0);
-        return ts >= weekAgo;
-      });
-      if (recentActivity) activeStudents++;
-    }
-    const participationRate = studentIds.length > 0 
-      ? Math.round((activeStudents / studentIds.length) * 100)
-      : 0;
-
-    // Assignment Completion: % of assignments that have submissions
-    let totalAssignments = 0;
-    let completedAssignments = 0;
-    for (const course of courseList) {
-      const assignments = await request(`/assignments/?course=${course.id}`);
-      const assignmentList = assignments?.results || assignments || [];
-      totalAssignments += assignmentList.length;
-      
-      for (const assignment of assignmentList) {
-        const subs = await request(`/assignment-submissions/?assignment=${assignment.id}`);
-        const subsList = subs?.results || subs || [];
-        if (subsList.length > 0) completedAssignments++;
-      }
-    }
-    const assignmentCompletion = totalAssignments > 0
-      ? Math.round((completedAssignments / totalAssignments) * 100)
-      : 0;
-
-    // Test Performance: average test score percentage
-    let totalTestScore = 0;
-    let totalTestMax = 0;
-    for (const studentId of studentIds) {
-      const submissions = await request(`/test-submissions/?student=${studentId}`);
-      const submissionsList = submissions?.results || submissions || [];
-      for (const sub of submissionsList) {
-        const marks = parseFloat(sub.marks_obtained) || 0;
-        totalTestScore += marks;
-        totalTestMax += 100; // assume each test is out of 100
-      }
-    }
-    const testPerformance = totalTestMax > 0
-      ? Math.round((totalTestScore / totalTestMax) * 100)
-      : 0;
-
-    // Course Completion: % of enrollments completed
-    const completedEnrollments = allEnrollments.filter(e => 
-      (e.status || '').toLowerCase() === 'completed'
-    ).length;
-    const courseCompletion = allEnrollments.length > 0
-      ? Math.round((completedEnrollments / allEnrollments.length) * 100)
-      : 0;
-
-    return [
-      { metric: 'Student Participation', value: participationRate, trend: '+0%' },
-      { metric: 'Assignment Completion', value: assignmentCompletion, trend: '+0%' },
-      { metric: 'Test Performance', value: testPerformance, trend: '+0%' },
-      { metric: 'Course Completion', value: courseCompletion, trend: '+0%' }
-    ];
-  } catch (error) {
-    console.error('Error fetching engagement metrics:', error);
-    return [];
-  }
-}
-
-async function getTeacherCoursePerformance(userId, timeRange) {
-  try {
-    const courses = await request(`/courses/?instructor=${userId}`);
-    const courseList = courses?.results || courses || [];
-
-    if (courseList.length === 0) {
-      return [];
-    }
-
-    const coursePerformance = [];
-
-    for (const course of courseList) {
-      // Get enrollments for this course
-      const enrollments = await request(`/enrollments/?course=${course.id}`);
-      const enrollmentList = enrollments?.results || enrollments || [];
-      
-      if (enrollmentList.length === 0) {
-        coursePerformance.push({
-          course: course.title || `Course ${course.id}`,
-          avgScore: 0
-        });
-        continue;
-      }
-
-      const studentIds = enrollmentList.map(e => e.student);
-      
-      // Calculate average score from test submissions
-      let totalScore = 0;
-      let scoreCount = 0;
-
-      for (const studentId of studentIds) {
-        const submissions = await request(`/test-submissions/?student=${studentId}`);
-        const submissionsList = submissions?.results || submissions || [];
-        
-        for (const sub of submissionsList) {
-          const marks = parseFloat(sub.marks_obtained);
-          if (!isNaN(marks)) {
-            totalScore += marks;
-            scoreCount++;
-          }
-        }
-
-        // Include assignment scores
-        const assignmentSubs = await request(`/assignment-submissions/?student=${studentId}`);
-        const assignmentList = assignmentSubs?.results || assignmentSubs || [];
-        
-        for (const sub of assignmentList) {
-          const marks = parseFloat(sub.marks_obtained);
-          if (!isNaN(marks)) {
-            totalScore += marks;
-            scoreCount++;
-          }
-        }
-      }
-
-      const avgScore = scoreCount > 0 
-        ? Math.round(totalScore / scoreCount)
-        : 0;
-
-      coursePerformance.push({
-        course: course.title || `Course ${course.id}`,
-        avgScore
-      });
-    }
-
-    return coursePerformance;
-  } catch (error) {
-    console.error('Error fetching course performance:', error);
-    return [];
-  }
-}
-
 async function getAIInsights(userId, timeRange) {
   try {
     return {
@@ -552,20 +76,40 @@ async function getAIInsights(userId, timeRange) {
 }
 
 // Admin Analytics
+// Read from daily rollups on the server (GET /analytics/admin/), kept current by
+// `manage.py update_daily_rollups`, instead of listing every user/enrollment/log.
 export async function getAdminAnalytics(timeRange = 'monthly') {
   try {
-    const [userAnalytics, courseAnalytics, performance, systemWide] = await Promise.all([
-      getAdminUserAnalytics(),
-      getAdminCourseAnalytics(),
-      getAdminPerformance(),
-      getAdminSystemWide()
+    const t0 = Date.now();
+    const [data, performance] = await Promise.all([
+      request(`/analytics/admin/?timeRange=${encodeURIComponent(timeRange)}`),
+      getAdminPerformance()
     ]);
+    const latencyMs = Date.now() - t0;
+    const usage = data.systemWide?.usage || [];
+
+    // System health approximations
+    // Uptime: percentage of last 24 hours with at least one activity log
+    const hoursWithActivity = usage.filter(u => u.users > 0).length;
+    const uptimePercent = Math.round((hoursWithActivity / 24) * 100);
+    const dbPerfScore = Math.max(0, Math.min(100, 80 + ((data.systemWide?.content?.totalFiles || 0) > 0 ? 20 : 0)));
+    const apiResponseScore = Math.max(0, Math.min(100, Math.round(100 - (latencyMs / 10))));
 
     return {
-      userAnalytics,
-      courseAnalytics,
+      userAnalytics: data.userAnalytics,
+      courseAnalytics: data.courseAnalytics,
       performance,
-      systemWide
+      systemWide: {
+        usage,
+        content: data.systemWide?.content || { totalFiles: 0, totalVideos: 0, totalQuizzes: 0, monthlyUploads: 0 },
+        health: {
+          uptimePercent,
+          dbPerfScore,
+          apiLatencyMs: Math.max(0, Math.round(latencyMs)),
+          apiResponseScore
+        }
+      },
+      daily: data.daily || []
     };
   } catch (error) {
     console.error('Error fetching admin analytics:', error);
@@ -573,137 +117,6 @@ export async function getAdminAnalytics(timeRange = 'monthly') {
   }
 }
 
-async function getAdminUserAnalytics() {
-  try {
-    const [usersRes, progressRes, enrollmentsRes] = await Promise.allSettled([
-      request('/users'),
-      request('/lecture-progress/'),
-      request('/enrollments/')
-    ]);
-
-    const users = usersRes.status === 'fulfilled' ? (usersRes.value?.results || usersRes.value || []) : [];
-    const progressList = progressRes.status === 'fulfilled' ? (progressRes.value?.results || progressRes.value || []) : [];
-    const enrollments = enrollmentsRes.status === 'fulfilled' ? (enrollmentsRes.value?.results || enrollmentsRes.value || []) : [];
-
-    const now = new Date();
-    const d1 = new Date(now); d1.setDate(now.getDate() - 1);
-    const d7 = new Date(now); d7.setDate(now.getDate() - 7);
-    const d30 = new Date(now); d30.setDate(now.getDate() - 30);
-
-    const parseDate = (v) => v ? new Date(v) : null;
-
-    // Active users by last_login window
-    const lastLoginIn = (u, since) => {
-      const ll = parseDate(u.last_login);
-      return ll && ll >= since;
-    };
-    const activeDaily = users.filter(u => lastLoginIn(u, d1)).length;
-    const activeWeekly = users.filter(u => lastLoginIn(u, d7)).length;
-    const activeMonthly = users.filter(u => lastLoginIn(u, d30)).length;
-
-    // New registrations
-    const students = users.filter(u => u.role === 'student');
-    const teachers = users.filter(u => u.role === 'teacher');
-    const joinedSince = (u, since) => {
-      const dj = parseDate(u.date_joined);
-      return dj && dj >= since;
-    };
-    const thisMonth = users.filter(u => joinedSince(u, d30)).length;
-
-    // Engagement: average study time (hours) from lecture progress, weekly logins, dropout %
-    const totalWatchMinutes = progressList.reduce((acc, p) => acc + (p.watch_time_minutes || 0), 0);
-    // Avoid division by zero
-    const denomUsers = users.length || 1;
-    const avgTimeHours = Math.round(((totalWatchMinutes / denomUsers) / 60) * 10) / 10; // 1 decimal
-
-    // Logins/Week: unique users with last_login within 7 days
-    const logins = activeWeekly;
-
-    // Dropouts: % of enrollments with status 'dropped'
-    const totalEnroll = enrollments.length || 1;
-    const dropped = enrollments.filter(e => (e.status || '').toLowerCase() === 'dropped').length;
-    const dropoutsPct = Math.round((dropped / totalEnroll) * 100);
-
-    return {
-      activeUsers: {
-        daily: activeDaily,
-        weekly: activeWeekly,
-        monthly: activeMonthly
-      },
-      newRegistrations: {
-        students: students.length,
-        teachers: teachers.length,
-        thisMonth
-      },
-      engagement: {
-        avgTime: isFinite(avgTimeHours) ? avgTimeHours : 0,
-        logins,
-        dropouts: isFinite(dropoutsPct) ? dropoutsPct : 0
-      }
-    };
-  } catch (error) {
-    console.error('Error fetching user analytics:', error);
-    return {
-      activeUsers: { daily: 0, weekly: 0, monthly: 0 },
-      newRegistrations: { students: 0, teachers: 0, thisMonth: 0 },
-      engagement: { avgTime: 0, logins: 0, dropouts: 0 }
-    };
-  }
-}
-
-async function getAdminCourseAnalytics() {
-  try {
-    const [coursesRes, enrollmentsRes] = await Promise.allSettled([
-      request('/courses/'),
-      request('/enrollments/')
-    ]);
-
-    const courses = coursesRes.status === 'fulfilled' ? (coursesRes.value?.results || coursesRes.value || []) : [];
-    const enrollments = enrollmentsRes.status === 'fulfilled' ? (enrollmentsRes.value?.results || enrollmentsRes.value || []) : [];
-
-    const totalEnroll = enrollments.length || 1;
-    const completed = enrollments.filter(e => (e.status || '').toLowerCase() === 'completed').length;
-    const completion = Math.round((completed / totalEnroll) * 100);
-
-    // Average final grade across enrollments (0-100)
-    const grades = enrollments.map(e => parseFloat(e.final_grade)).filter(v => !isNaN(v));
-    const averageGrades = grades.length ? Math.round(grades.reduce((a, b) => a + b, 0) / grades.length) : 0;
-
-    // Engagement: average progress percentage across enrollments
-    const progresses = enrollments.map(e => parseFloat(e.progress_percentage)).filter(v => !isNaN(v));
-    const engagement = progresses.length ? Math.round(progresses.reduce((a, b) => a + b, 0) / progresses.length) : 0;
-
-    // Popular courses by enrollment count
-    const byCourse = new Map();
-    enrollments.forEach(e => {
-      const cid = e.course;
-      byCourse.set(cid, (byCourse.get(cid) || 0) + 1);
-    });
-    const courseMap = new Map(courses.map(c => [c.id, c]));
-    const popular = Array.from(byCourse.entries())
-      .sort((a, b) => b[1] - a[1])
-      .slice(0, 5)
-      .map(([cid, count]) => {
-        const c = courseMap.get(cid) || { title: `Course ${cid}`, average_rating: 0 };
-        return {
-          name: c.title || `Course ${cid}`,
-          enrollments: count,
-          rating: (parseFloat(c.average_rating) || 0).toFixed(1)
-        };
-      });
-
-    return { completion, averageGrades, engagement, popular };
-  } catch (error) {
-    console.error('Error fetching course analytics:', error);
-    return {
-      completion: 0,
-      averageGrades: 0,
-      engagement: 0,
-      popular: []
-    };
-  }
-}
-
 async function getAdminPerformance() {
   try {
     const now = new Date();
@@ -751,103 +164,3 @@ async function getAdminPerformance() {
   }
 }
 
-async function getAdminSystemWide() {
-  try {
-    // Fetch activity logs (admin-only), uploads, tests to compute real stats
-    const [activityLogsRes, uploadsRes, testsRes, usersStart] = await Promise.allSettled([
-      request('/activity-logs/'),
-      request('/uploads/'),
-      request('/tests/'),
-      // Start timing a lightweight request to estimate API latency/health
-      (async () => {
-        const t0 = Date.now();
-        try { await request('/users'); } catch (_) { /* ignore for health calc */ }
-        return Date.now() - t0;
-      })()
-    ]);
-
-    const activityLogs = activityLogsRes.status === 'fulfilled' ? (activityLogsRes.value?.results || activityLogsRes.value || []) : [];
-    const uploads = uploadsRes.status === 'fulfilled' ? (uploadsRes.value?.results || uploadsRes.value || []) : [];
-    const tests = testsRes.status === 'fulfilled' ? (testsRes.value?.results || testsRes.value || []) : [];
-    const apiLatencyMs = usersStart.status === 'fulfilled' ? usersStart.value : null;
-
-    // Build peak usage hours based on activity log timestamps over last 24 hours
-    const now = new Date();
-    const last24 = [];
-    for (let i = 23; i >= 0; i--) {
-      const d = new Date(now);
-      d.setHours(now.getHours() - i, 0, 0, 0);
-      last24.push(d);
-    }
-    const usageMap = new Map(last24.map(d => [d.getHours(), 0]));
-    activityLogs.forEach(log => {
-      const ts = new Date(log.created_at || log.createdAt || log.created || Date.now());
-      const diffHrs = (now - ts) / (1000 * 60 * 60);
-      if (diffHrs >= 0 && diffHrs <= 24) {
-        const hr = ts.getHours();
-        usageMap.set(hr, (usageMap.get(hr) || 0) + 1);
-      }
-    });
-    const usage = Array.from(usageMap.entries())
-      .sort((a, b) => a[0] - b[0])
-      .map(([hr, count]) => ({ hour: `${hr.toString().padStart(2, '0')}:00`, users: count }));
-
-    // Content statistics derived from uploads/tests
-    const videoExts = new Set(['.mp4', '.mov', '.mkv', '.webm', '.avi']);
-    const getExt = (nameOrUrl) => {
-      try {
-        const s = (nameOrUrl || '').toLowerCase();
-        const idx = s.lastIndexOf('.');
-        return idx >= 0 ? s.slice(idx) : '';
-      } catch { return ''; }
-    };
-
-    const totalFiles = uploads.length;
-    const totalVideos = uploads.reduce((acc, u) => acc + (videoExts.has(getExt(u.file_name || u.file_url)) ? 1 : 0), 0);
-    const totalQuizzes = tests.length; // number of tests as quizzes count
-
-    const monthAgo = new Date();
-    monthAgo.setDate(monthAgo.getDate() - 30);
-    const monthlyUploads = uploads.reduce((acc, u) => {
-      const ts = new Date(u.uploaded_at || u.created_at || u.createdAt || 0);
-      return acc + (ts >= monthAgo ? 1 : 0);
-    }, 0);
-
-    // System health approximations
-    // Uptime: percentage of last 24 hours with at least one activity log
-    const hoursWithActivity = usage.filter(u => u.users > 0).length;
-    const uptimePercent = Math.round((hoursWithActivity / 24) * 100);
-
-    // DB performance score: if we could list uploads and tests, score higher
-    const dbPerfScore = Math.max(0, Math.min(100, 50
-      + (uploads.length > 0 ? 20 : 0)
-      + (tests.length >= 0 ? 20 : 0)
-      + (activityLogs.length >= 0 ? 10 : 0)));
-
-    // API response health: map latency ms to 0-100 score (lower latency => higher score)
-    const latencyMs = typeof apiLatencyMs === 'number' ? apiLatencyMs : 0;
-    const apiResponseScore = Math.max(0, Math.min(100, Math.round(100 - (latencyMs / 10))));
-
-    return {
-      usage,
-      content: {
-        totalFiles,
-        totalVideos,
-        totalQuizzes,
-        monthlyUploads
-      },
-      health: {
-        uptimePercent,
-        dbPerfScore,
-        apiLatencyMs: Math.max(0, Math.round(latencyMs)),
-        apiResponseScore
-      }
-    };
-  } catch (error) {
-    return {
-      usage: [],
-      content: { totalFiles: 0, totalVideos: 0, totalQuizzes: 0, monthlyUploads: 0 },
-      health: { uptimePercent: 0, dbPerfScore: 0, apiLatencyMs: 0, apiResponseScore: 0 }
-    };
-  }
-}
@@ -345,6 +345,95 @@ export async function getCourse(id) {
   return await request(`/courses/${id}/`, { method: 'GET' });
 }
 
+// Whole course page in one request: course, lectures (each with `materials`),
+// study_materials, assignments, tests, ratings and the caller's enrollment.
+// The server sends an ETag, so the browser revalidates repeat views with a 304.
+export async function getCourseFull(id) {
+  return await request(`/courses/${id}/full/`, { method: 'GET' });
+}
+
+// Local media (/media/...) is served behind an access check. Links, <img> and
+// <video> can't send the Authorization header, so media URLs are exchanged for
+// short-lived signed URLs (each valid for one file) before use. Other URLs
+// (S3, Drive, external) are returned unchanged.
+const MEDIA_ORIGIN = BASE.replace(/\/api\/?$/, '');
+const _signedMedia = new Map();
+
+function _localMediaPath(url) {
+  if (!url || typeof url !== 'string') return null;
+  let path = url;
+  if (path.startsWith(MEDIA_ORIGIN + '/media/')) path = path.slice(MEDIA_ORIGIN.length);
+  return path.startsWith('/media/') ? path.split('?')[0] : null;
+}
+
+export function isLocalMedia(url) {
+  return _localMediaPath(url) !== null;
+}
+
+// Paths requested in the same tick (e.g. a grid of thumbnails) are signed in
+// one request.
+let _pendingSign = null;
+
+function _signBatched(path) {
+  if (!_pendingSign) {
+    const batch = { paths: new Set(), promise: null };
+    batch.promise = Promise.resolve().then(async () => {
+      _pendingSign = null;
+      const urls = Array.from(batch.paths);
+      const data = await request('/media/sign/', { method: 'POST', body: JSON.stringify({ urls }) });
+      const expires = Date.now() + ((data && data.expires_in) || 0) * 1000;
+      for (const p of urls) {
+        const signed = data && data.urls ? data.urls[p] : null;
+        if (signed) _signedMedia.set(p, { url: MEDIA_ORIGIN + signed, expires });
+      }
+    });
+    _pendingSign = batch;
+  }
+  _pendingSign.paths.add(path);
+  return _pendingSign.promise;
+}
+
+export async function mediaUrl(url) {
+  const path = _localMediaPath(url);
+  if (!path) return url;
+  const fresh = () => {
+    const cached = _signedMedia.get(path);
+    // re-sign a minute before expiry so a just-issued URL never lapses in use
+    return cached && cached.expires - 60000 > Date.now() ? cached.url : null;
+  };
+  if (fresh()) return fresh();
+  await _signBatched(path);
+  const signed = fresh();
+  if (!signed) {
+    const err = new Error('File not available');
+    err.status = 404;
+    throw err;
+  }
+  return signed;
+}
+
+// Open a media URL in a new tab. The tab is opened synchronously (inside the
+// click) so popup blockers allow it, then pointed at the signed URL.
+export async function openMedia(url) {
+  if (!isLocalMedia(url)) {
+    window.open(url, '_blank', 'noopener,noreferrer');
+    return;
+  }
+  const win = window.open('', '_blank');
+  try {
+    const signed = await mediaUrl(url);
+    if (win) {
+      win.opener = null;
+      win.location.href = signed;
+    } else {
+      window.open(signed, '_blank', 'noopener,noreferrer');
+    }
+  } catch (e) {
+    if (win) win.close();
+    throw e;
+  }
+}
+
 // Live classes endpoints
 export async function getLiveClasses() {
   const data = await request('/live-classes/');
@@ -456,12 +545,81 @@ export async function createEvent(payload) {
   return await request('/events/', { method: 'POST', body: JSON.stringify(payload), headers: { 'Content-Type': 'application/json' } });
 }
 
-export async function uploadFile(file) {
+// Files above this size go through the resumable chunked upload API.
+const CHUNKED_UPLOAD_THRESHOLD = 16 * 1024 * 1024;
+
+export async function uploadFile(file, opts = {}) {
+  if (file && file.size > CHUNKED_UPLOAD_THRESHOLD) return await uploadFileChunked(file, opts);
   const fd = new FormData();
   fd.append('file', file);
   return await request('/uploads/', { method: 'POST', body: fd });
 }
 
+// Resumable upload: open a session, PUT `chunk_size` slices at the acknowledged
+// offset and finalize. A failed chunk is retried from the offset the server
+// reports, so a dropped connection only costs the chunk in flight.
+// Pass `opts.sessionId` to resume an earlier session; `opts.onProgress(sent, total)`.
+export async function uploadFileChunked(file, opts = {}) {
+  const { onProgress, maxRetries = 5 } = opts;
+  let session = opts.sessionId
+    ? await request(`/uploads/chunked/${opts.sessionId}/`)
+    : await request('/uploads/chunked/', {
+      method: 'POST',
+      body: JSON.stringify({ file_name: file.name, size: file.size, content_type: file.type }),
+    });
+  let offset = session.offset;
+  let retries = 0;
+  while (offset < file.size) {
+    const chunk = file.slice(offset, offset + session.chunk_size);
+    try {
+      const ack = await request(`/uploads/chunked/${session.id}/?offset=${offset}`, {
+        method: 'PUT', body: chunk, headers: { 'Content-Type': 'application/octet-stream' },
+      });
+      offset = ack.offset;
+      retries = 0;
+      if (onProgress) onProgress(offset, file.size);
+    } catch (err) {
+      if (err.status && err.status !== 409 && err.status < 500) throw err;
+      if (++retries > maxRetries) throw err;
+      // resume from whatever the server acknowledged
+      offset = err.data && typeof err.data.offset === 'number'
+        ? err.data.offset
+        : (await request(`/uploads/chunked/${session.id}/`)).offset;
+    }
+  }
+  return await request(`/uploads/chunked/${session.id}/finalize/`, { method: 'POST' });
+}
+
+// Direct-to-bucket upload (backend USE_S3=1): the file goes straight to object
+// storage with a presigned POST and the backend only records it afterwards.
+// Pass `opts.assignment` to submit the file to an assignment (returns the
+// submission). Falls back to uploadFile when direct uploads are not enabled.
+export async function uploadFileDirect(file, opts = {}) {
+  let presigned;
+  try {
+    presigned = await request('/uploads/presign/', {
+      method: 'POST',
+      body: JSON.stringify({ file_name: file.name, size: file.size, content_type: file.type, assignment: opts.assignment }),
+    });
+  } catch (err) {
+    if (err.status === 404 && !opts.assignment) return await uploadFile(file, opts);
+    throw err;
+  }
+  const fd = new FormData();
+  Object.entries(presigned.fields).forEach(([k, v]) => fd.append(k, v));
+  fd.append('file', file);
+  const res = await fetch(presigned.url, { method: 'POST', body: fd });
+  if (!res.ok) {
+    const err = new Error(`Upload to storage failed (HTTP ${res.status})`);
+    err.status = res.status;
+    throw err;
+  }
+  return await request('/uploads/presign/complete/', {
+    method: 'POST',
+    body: JSON.stringify({ token: presigned.token, submission_text: opts.submissionText }),
+  });
+}
+
 export async function getUploads() {
   const data = await request('/uploads/');
   if (data && data.results) return data.results;
@@ -678,8 +836,32 @@ export async function rateCourse(courseId, rating, review = '') {
   });
 }
 
+// Attendance: mark a whole class for one date in a single request.
+// records: [{ student, status: 'present'|'absent'|'late'|'excused', notes }]
+export async function markAttendanceBulk(courseId, date, records) {
+  return await request('/attendance/bulk/', {
+    method: 'POST',
+    body: JSON.stringify({ course: courseId, date, records }),
+    headers: { 'Content-Type': 'application/json' }
+  });
+}
+
+// Lecture progress: post the player's queued ticks in one batch every few seconds.
+// events: [{ lecture, position_seconds, watched_seconds, completed }]
+export async function sendLectureHeartbeats(events) {
+  if (!events || events.length === 0) return null;
+  return await request('/lecture-progress/heartbeat/', {
+    method: 'POST',
+    body: JSON.stringify({ events }),
+    headers: { 'Content-Type': 'application/json' }
+  });
+}
+
 export default {
   login,
+  mediaUrl,
+  openMedia,
+  isLocalMedia,
   register,
   me,
   logout,
@@ -728,4 +910,6 @@ export default {
   checkEnrollment,
   getCourseRatings,
   rateCourse,
+  markAttendanceBulk,
+  sendLectureHeartbeats,
 };